@@ -1,8 +1,132 @@
 from flask_login import UserMixin
 from firebase_admin import firestore
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.services.password_hasher import password_hasher
+from app.database.email_index import EmailIndex, normalize_email
+from collections import OrderedDict
+import threading
+import copy
 import time
 import uuid
+import os
+
+# User document fields kept out of the cache
+CREDENTIAL_FIELDS = ('password_hash', 'salt')
+
+class UserCache:
+    """
+    Short-lived cache of user documents, plus email to user ID mappings.
+    
+    User documents expire after ttl seconds, so changes made by other
+    processes show up quickly; changes made through this module update the
+    cache directly. Email mappings do not expire: a user's ID never changes,
+    and a stale mapping is caught by checking the cached document's email.
+    Both maps are bounded LRUs. Credentials are never cached: a password
+    change in another process must take effect immediately, so
+    authentication always reads the stored hash.
+    """
+    
+    def __init__(self, ttl=30.0, max_entries=4096):
+        """
+        Initialize the cache
+        
+        Args:
+            ttl (float): Seconds a user document stays cached (0 disables the cache)
+            max_entries (int): Maximum number of cached users
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._users = OrderedDict()
+        self._email_ids = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, user_id):
+        """Get a copy of a cached user document, or None"""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user_data = entry
+            if expires_at < time.time():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return copy.deepcopy(user_data)
+    
+    def put(self, user_data):
+        """Cache a user document, without its credentials"""
+        if not self.ttl:
+            return
+        profile = {k: v for k, v in user_data.items() if k not in CREDENTIAL_FIELDS}
+        with self._lock:
+            self._users[user_data['id']] = (time.time() + self.ttl, copy.deepcopy(profile))
+            self._users.move_to_end(user_data['id'])
+            if user_data.get('email'):
+                self._put_email(user_data['email'], user_data['id'])
+            while len(self._users) > self.max_entries:
+                self._users.popitem(last=False)
+    
+    def get_id(self, email):
+        """Get the cached user ID of an email address, or None"""
+        with self._lock:
+            return self._email_ids.get(normalize_email(email))
+    
+    def put_id(self, email, user_id):
+        """Cache the user ID of an email address"""
+        with self._lock:
+            self._put_email(email, user_id)
+    
+    def invalidate(self, user_id):
+        """Drop a cached user document"""
+        with self._lock:
+            self._users.pop(user_id, None)
+    
+    def clear(self):
+        """Drop everything"""
+        with self._lock:
+            self._users.clear()
+            self._email_ids.clear()
+    
+    def _put_email(self, email, user_id):
+        key = normalize_email(email)
+        self._email_ids[key] = user_id
+        self._email_ids.move_to_end(key)
+        while len(self._email_ids) > self.max_entries:
+            self._email_ids.popitem(last=False)
+
+user_cache = UserCache(ttl=float(os.environ.get('USER_CACHE_TTL', '30')))
+
+def _load_user_data(db, user_id, fresh=False):
+    """
+    Get a user document through the cache (one keyed read on a miss)
+    
+    Cached documents have no credentials; pass fresh=True to read the
+    stored document, including its password hash.
+    """
+    if not fresh:
+        user_data = user_cache.get(user_id)
+        if user_data is not None:
+            return user_data
+    
+    user_doc = db.collection('users').document(user_id).get()
+    if not user_doc.exists:
+        return None
+    user_data = user_doc.to_dict()
+    user_cache.put(user_data)
+    return user_data
+
+def _find_user_data(db, email, fresh=False):
+    """Get a user document by email, without querying the users collection"""
+    user_id = user_cache.get_id(email)
+    if user_id is not None:
+        user_data = _load_user_data(db, user_id, fresh)
+        if user_data and normalize_email(user_data.get('email', '')) == normalize_email(email):
+            return user_data
+    
+    user_id = EmailIndex(db).lookup(email)
+    if user_id is None:
+        return None
+    user_cache.put_id(email, user_id)
+    return _load_user_data(db, user_id, fresh)
 
 class User(UserMixin):
     """User model for authentication and profile management"""
@@ -42,11 +166,7 @@ class User(UserMixin):
         Returns:
             User: The created user object
         """
-        # Check if user already exists
         db = firestore.client()
-        existing_user = db.collection('users').where('email', '==', email).limit(1).get()
-        if len(existing_user) > 0:
-            raise ValueError(f"User with email {email} already exists")
         
         # Generate user ID
         user_id = str(uuid.uuid4())
@@ -56,7 +176,7 @@ class User(UserMixin):
         user_data = {
             'id': user_id,
             'email': email,
-            'password_hash': generate_password_hash(password),
+            'password_hash': password_hasher.hash(password),
             'first_name': first_name,
             'last_name': last_name,
             'role': role,
@@ -65,8 +185,9 @@ class User(UserMixin):
             'profile_data': {}
         }
         
-        # Save to database
-        db.collection('users').document(user_id).set(user_data)
+        # Save to database; fails if the email is already taken
+        EmailIndex(db).create_user(db.collection('users').document(user_id), user_data, email)
+        user_cache.put(user_data)
         
         # Return user object
         return User(
@@ -90,13 +211,10 @@ class User(UserMixin):
         Returns:
             User: User object or None if not found
         """
-        db = firestore.client()
-        user_doc = db.collection('users').document(user_id).get()
-        
-        if not user_doc.exists:
+        user_data = _load_user_data(firestore.client(), user_id)
+        if user_data is None:
             return None
         
-        user_data = user_doc.to_dict()
         return User(
             user_id=user_data['id'],
             email=user_data['email'],
@@ -119,26 +237,20 @@ class User(UserMixin):
         Returns:
             User: User object or None if not found
         """
-        db = firestore.client()
-        users = db.collection('users').where('email', '==', email).limit(1).get()
-        
-        if not users:
+        user_data = _find_user_data(firestore.client(), email)
+        if user_data is None:
             return None
         
-        for user_doc in users:
-            user_data = user_doc.to_dict()
-            return User(
-                user_id=user_data['id'],
-                email=user_data['email'],
-                first_name=user_data.get('first_name'),
-                last_name=user_data.get('last_name'),
-                role=user_data.get('role', 'user'),
-                created_at=user_data.get('created_at'),
-                last_login=user_data.get('last_login'),
-                profile_data=user_data.get('profile_data', {})
-            )
-        
-        return None
+        return User(
+            user_id=user_data['id'],
+            email=user_data['email'],
+            first_name=user_data.get('first_name'),
+            last_name=user_data.get('last_name'),
+            role=user_data.get('role', 'user'),
+            created_at=user_data.get('created_at'),
+            last_login=user_data.get('last_login'),
+            profile_data=user_data.get('profile_data', {})
+        )
     
     @staticmethod
     def authenticate(email, password):
@@ -153,30 +265,35 @@ class User(UserMixin):
             User: Authenticated user or None if authentication failed
         """
         db = firestore.client()
-        users = db.collection('users').where('email', '==', email).limit(1).get()
+        # Always check against the stored hash, never a cached copy
+        user_data = _find_user_data(db, email, fresh=True)
+        if user_data is None:
+            return None
         
-        if not users:
+        # Hashing runs on the bounded pool; outdated hashes are upgraded here
+        verified, new_hash = password_hasher.verify_and_update(
+            password, user_data.get('password_hash', ''))
+        if not verified:
             return None
         
-        for user_doc in users:
-            user_data = user_doc.to_dict()
-            if check_password_hash(user_data.get('password_hash', ''), password):
-                # Update last login
-                now = int(time.time())
-                db.collection('users').document(user_data['id']).update({'last_login': now})
-                
-                return User(
-                    user_id=user_data['id'],
-                    email=user_data['email'],
-                    first_name=user_data.get('first_name'),
-                    last_name=user_data.get('last_name'),
-                    role=user_data.get('role', 'user'),
-                    created_at=user_data.get('created_at'),
-                    last_login=now,
-                    profile_data=user_data.get('profile_data', {})
-                )
+        # Update last login
+        now = int(time.time())
+        update_data = {'last_login': now}
+        if new_hash:
+            update_data['password_hash'] = new_hash
+        db.collection('users').document(user_data['id']).update(update_data)
+        user_cache.put({**user_data, **update_data})
         
-        return None
+        return User(
+            user_id=user_data['id'],
+            email=user_data['email'],
+            first_name=user_data.get('first_name'),
+            last_name=user_data.get('last_name'),
+            role=user_data.get('role', 'user'),
+            created_at=user_data.get('created_at'),
+            last_login=now,
+            profile_data=user_data.get('profile_data', {})
+        )
     
     def update_profile(self, data):
         """
@@ -206,6 +323,7 @@ class User(UserMixin):
         
         # Update in database
         db.collection('users').document(self.id).update(update_data)
+        user_cache.invalidate(self.id)
         return True
     
     def change_password(self, current_password, new_password):
@@ -219,6 +337,7 @@ class User(UserMixin):
         Returns:
             bool: True if successful, False if current password is incorrect
         """
+        # Read the stored hash directly rather than through the cache
         db = firestore.client()
         user_doc = db.collection('users').document(self.id).get()
         
@@ -228,13 +347,14 @@ class User(UserMixin):
         user_data = user_doc.to_dict()
         
         # Verify current password
-        if not check_password_hash(user_data.get('password_hash', ''), current_password):
+        if not password_hasher.verify(current_password, user_data.get('password_hash', '')):
             return False
         
         # Update password
         db.collection('users').document(self.id).update({
-            'password_hash': generate_password_hash(new_password)
+            'password_hash': password_hasher.hash(new_password)
         })
+        user_cache.invalidate(self.id)
         
         return True
     
@@ -6,7 +6,7 @@ import pyrebase
 import os
 from functools import wraps
 from datetime import datetime
-from database.firebase_client import FirebaseClient
+from app.database.firebase_client import FirebaseClient
 
 # Create authentication blueprint
 auth_bp = Blueprint('auth', __name__)
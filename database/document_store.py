@@ -0,0 +1,917 @@
+import os
+import copy
+import json
+import time
+import uuid
+import base64
+import datetime
+import functools
+import threading
+from contextlib import contextmanager
+
+from app.services.sqlite_pool import SQLitePool
+
+try:
+    from firebase_admin import firestore
+except ImportError:
+    firestore = None
+
+try:
+    from google.api_core.exceptions import AlreadyExists, NotFound
+except ImportError:
+    class AlreadyExists(Exception):
+        """A document to create already exists"""
+
+    class NotFound(Exception):
+        """A document to update does not exist"""
+
+# Reuse Firestore's sentinels so the same calling code works on both stores
+SERVER_TIMESTAMP = firestore.SERVER_TIMESTAMP if firestore else object()
+DELETE_FIELD = firestore.DELETE_FIELD if firestore else object()
+
+DOCUMENT_ID = '__name__'
+
+RANGE_OPERATORS = {'<', '<=', '>', '>=', '!=', 'not-in'}
+
+# 'memory' URLs share one store per process, like a database would
+_memory_store = None
+_memory_store_lock = threading.Lock()
+
+
+def create_client(url=None):
+    """
+    Create a document store client from a URL
+
+    Args:
+        url (str, optional): 'firestore', 'memory' or 'sqlite:///path/to.db'
+            (default: the DOCUMENT_STORE environment variable, else 'firestore');
+            every 'memory' client is the same process-wide store
+
+    Returns:
+        Firestore client or a DocumentStore with the same interface
+    """
+    global _memory_store
+    url = url or os.environ.get('DOCUMENT_STORE', 'firestore')
+    if url == 'firestore':
+        if firestore is None:
+            raise ValueError("firebase_admin is not installed; use DOCUMENT_STORE=memory or sqlite")
+        return firestore.client()
+    if url == 'memory':
+        with _memory_store_lock:
+            if _memory_store is None:
+                _memory_store = MemoryDocumentStore()
+            return _memory_store
+    if url.startswith('sqlite:'):
+        path = url[len('sqlite:'):]
+        return SQLiteDocumentStore(path[2:] if path.startswith('//') else path)
+    raise ValueError(f"Unknown document store: {url}")
+
+
+def _split_path(path):
+    """Split a document path into its collection path and document ID"""
+    collection_path, _, doc_id = path.rpartition('/')
+    return collection_path, doc_id
+
+
+def _new_document_id():
+    """Generate a random 20 character document ID, like Firestore"""
+    return uuid.uuid4().hex[:20]
+
+
+def _normalize(value, now):
+    """
+    Convert a value to what Firestore would store and return
+
+    Tuples become lists, datetimes become UTC-aware (naive ones are taken
+    as UTC) and SERVER_TIMESTAMP becomes the commit time.
+    """
+    if value is SERVER_TIMESTAMP:
+        return now
+    if value is DELETE_FIELD:
+        raise ValueError("DELETE_FIELD is only allowed in update() and set(merge=True)")
+    if isinstance(value, dict):
+        return {str(key): _normalize(item, now) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item, now) for item in value]
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            return value.replace(tzinfo=datetime.timezone.utc)
+        return value.astimezone(datetime.timezone.utc)
+    return value
+
+
+def _merge(existing, updates, now):
+    """Deep-merge updates into a copy of existing, as set(merge=True) does"""
+    result = dict(existing or {})
+    for key, value in updates.items():
+        if value is DELETE_FIELD:
+            result.pop(key, None)
+        elif isinstance(value, dict):
+            current = result.get(key)
+            result[key] = _merge(current if isinstance(current, dict) else {}, value, now)
+        else:
+            result[key] = _normalize(value, now)
+    return result
+
+
+def _get_field(data, field):
+    """
+    Get a possibly nested (dotted) field
+
+    Returns:
+        tuple: (found, value)
+    """
+    for part in field.split('.'):
+        if not isinstance(data, dict) or part not in data:
+            return False, None
+        data = data[part]
+    return True, data
+
+
+def _sort_key(value):
+    """Order values across types the way Firestore does"""
+    if value is None:
+        return (0,)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return (3, value)
+    if isinstance(value, str):
+        return (4, value)
+    if isinstance(value, bytes):
+        return (5, value)
+    if isinstance(value, DocumentReference):
+        return (6, tuple(value.path.split('/')))
+    if isinstance(value, (list, tuple)):
+        return (8, tuple(_sort_key(item) for item in value))
+    if isinstance(value, dict):
+        return (9, tuple((key, _sort_key(value[key])) for key in sorted(value)))
+    return (7, str(value))
+
+
+def _compare(a, b):
+    """Three-way comparison of two Firestore values"""
+    a, b = _sort_key(a), _sort_key(b)
+    return (a > b) - (a < b)
+
+
+def _matches(found, value, op, operand):
+    """Evaluate one where() filter against a field value"""
+    if not found:
+        return False
+    if op == '==':
+        return _compare(value, operand) == 0
+    if op == 'in':
+        return any(_compare(value, item) == 0 for item in operand)
+    if op == 'array-contains':
+        return isinstance(value, list) and any(_compare(item, operand) == 0 for item in value)
+    if op == 'array-contains-any':
+        return isinstance(value, list) and any(_compare(item, other) == 0
+                                               for item in value for other in operand)
+    if op == 'not-in':
+        return value is not None and all(_compare(value, item) != 0 for item in operand)
+
+    # Range filters only match values of the same type
+    if _sort_key(value)[0] != _sort_key(operand)[0]:
+        return False
+    result = _compare(value, operand)
+    if op == '!=':
+        return result != 0
+    if op == '<':
+        return result < 0
+    if op == '<=':
+        return result <= 0
+    if op == '>':
+        return result > 0
+    if op == '>=':
+        return result >= 0
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def _project(data, fields):
+    """Keep only the selected (possibly dotted) fields of a document"""
+    result = {}
+    for field in fields:
+        found, value = _get_field(data, field)
+        if not found:
+            continue
+        target = result
+        parts = field.split('.')
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return result
+
+
+class DocumentSnapshot:
+    """A document read from a DocumentStore"""
+
+    def __init__(self, reference, data, read_time):
+        self.reference = reference
+        self._data = data
+        self.read_time = read_time
+
+    @property
+    def id(self):
+        return self.reference.id
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        """Get a copy of the document data, or None if it does not exist"""
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path):
+        """Get one (possibly dotted) field"""
+        found, value = _get_field(self._data or {}, field_path)
+        if not found:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class DocumentChange:
+    """A document added, modified or removed in a listener's results"""
+
+    def __init__(self, type, document):
+        self.type = type
+        self.document = document
+
+
+class DocumentReference:
+    """Reference to a document in a DocumentStore"""
+
+    def __init__(self, store, path):
+        self._store = store
+        self.path = path
+
+    def __eq__(self, other):
+        return (isinstance(other, DocumentReference) and other._store is self._store
+                and other.path == self.path)
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def __repr__(self):
+        return f"DocumentReference({self.path!r})"
+
+    def __deepcopy__(self, memo):
+        # References are immutable and must keep pointing at the same store
+        return self
+
+    @property
+    def id(self):
+        return _split_path(self.path)[1]
+
+    @property
+    def parent(self):
+        return CollectionReference(self._store, _split_path(self.path)[0])
+
+    def collection(self, name):
+        """Get a subcollection of this document"""
+        return CollectionReference(self._store, f"{self.path}/{name}")
+
+    def get(self, field_paths=None):
+        """
+        Read the document
+
+        Args:
+            field_paths (list, optional): Only return these fields
+
+        Returns:
+            DocumentSnapshot: Snapshot (check .exists)
+        """
+        snapshot = self._store._get_document(self)
+        if field_paths is not None and snapshot.exists:
+            snapshot = DocumentSnapshot(self, _project(snapshot._data, field_paths), snapshot.read_time)
+        return snapshot
+
+    def set(self, document_data, merge=False):
+        """Write the document, replacing it unless merge is set"""
+        return self._store._commit([('set', self.path, document_data, merge)])[0]
+
+    def create(self, document_data):
+        """Write the document, failing with AlreadyExists if it exists"""
+        return self._store._commit([('create', self.path, document_data, False)])[0]
+
+    def update(self, field_updates):
+        """Update (dotted) fields, failing with NotFound if the document does not exist"""
+        return self._store._commit([('update', self.path, field_updates, False)])[0]
+
+    def delete(self):
+        """Delete the document"""
+        return self._store._commit([('delete', self.path, None, False)])[0]
+
+
+class Query:
+    """
+    Immutable query over one collection
+
+    Supports the Firestore operators, ordering across value types, implicit
+    document ID ordering, start_after cursors, select() projections and
+    on_snapshot() listeners.
+    """
+
+    def __init__(self, store, collection_path, filters=(), orders=(), limit=None,
+                 projection=None, start_after=None):
+        self._store = store
+        self._collection_path = collection_path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._projection = projection
+        self._start_after = start_after
+
+    def _copy(self, **changes):
+        state = {
+            'filters': self._filters,
+            'orders': self._orders,
+            'limit': self._limit,
+            'projection': self._projection,
+            'start_after': self._start_after
+        }
+        state.update(changes)
+        return Query(self._store, self._collection_path, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        """Add a filter; accepts positional arguments or a FieldFilter"""
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path, direction='ASCENDING'):
+        """Add a sort order"""
+        direction = 'DESCENDING' if str(direction).upper() == 'DESCENDING' else 'ASCENDING'
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count):
+        """Return at most count documents"""
+        return self._copy(limit=count)
+
+    def select(self, field_paths):
+        """Only return these fields"""
+        return self._copy(projection=tuple(field_paths))
+
+    def start_after(self, document_fields_or_snapshot):
+        """Start after a snapshot, a dict of order field values or a list of them"""
+        return self._copy(start_after=document_fields_or_snapshot)
+
+    def stream(self):
+        """Run the query, yielding DocumentSnapshots"""
+        return iter(self._store._run_query(self))
+
+    def get(self):
+        """Run the query and return a list of DocumentSnapshots"""
+        return self._store._run_query(self)
+
+    def on_snapshot(self, callback):
+        """
+        Listen to the query's results
+
+        callback(docs, changes, read_time) is called with the current
+        results right away and again after every commit that changes them.
+
+        Returns:
+            Watch: Call unsubscribe() to stop listening
+        """
+        return Watch(self._store, self, callback)
+
+    def _effective_orders(self):
+        """Explicit orders plus Firestore's implicit ones"""
+        orders = list(self._orders)
+        if not orders:
+            for field, op, _ in self._filters:
+                if op in RANGE_OPERATORS:
+                    orders.append((field, 'ASCENDING'))
+                    break
+        if not orders or orders[-1][0] != DOCUMENT_ID:
+            orders.append((DOCUMENT_ID, orders[-1][1] if orders else 'ASCENDING'))
+        return orders
+
+    def _cursor_values(self, orders):
+        """Values of the start_after cursor, aligned with orders"""
+        cursor = self._start_after
+        if isinstance(cursor, DocumentSnapshot):
+            return [cursor.reference if field == DOCUMENT_ID else _get_field(cursor._data, field)[1]
+                    for field, _ in orders]
+        if isinstance(cursor, dict):
+            values = []
+            for field, _ in orders:
+                if field not in cursor:
+                    break
+                values.append(cursor[field])
+            return values
+        return list(cursor)
+
+    def _execute(self, documents):
+        """
+        Apply the query to a collection's documents
+
+        Args:
+            documents (list): (DocumentReference, data) pairs
+
+        Returns:
+            list: (DocumentReference, data) pairs of the results
+        """
+        orders = self._effective_orders()
+
+        def field_value(ref, data, field):
+            if field == DOCUMENT_ID:
+                return True, ref
+            return _get_field(data, field)
+
+        results = []
+        for ref, data in documents:
+            if not all(_matches(*field_value(ref, data, field), op, self._resolve_operand(field, value))
+                       for field, op, value in self._filters):
+                continue
+            keys = [field_value(ref, data, field) for field, _ in orders]
+            if not all(found for found, _ in keys):
+                continue
+            results.append(([value for _, value in keys], ref, data))
+
+        directions = [direction for _, direction in orders]
+
+        def compare_keys(a, b):
+            for x, y, direction in zip(a, b, directions):
+                result = _compare(x, y)
+                if result:
+                    return -result if direction == 'DESCENDING' else result
+            return 0
+
+        results.sort(key=functools.cmp_to_key(lambda a, b: compare_keys(a[0], b[0])))
+
+        if self._start_after is not None:
+            cursor = [self._resolve_operand(field, value)
+                      for (field, _), value in zip(orders, self._cursor_values(orders))]
+            results = [item for item in results if compare_keys(item[0][:len(cursor)], cursor) > 0]
+
+        if self._limit is not None:
+            results = results[:self._limit]
+
+        if self._projection is not None:
+            return [(ref, _project(data, self._projection)) for _, ref, data in results]
+        return [(ref, data) for _, ref, data in results]
+
+    def _resolve_operand(self, field, value):
+        """Document ID filters and cursors may use plain IDs or paths"""
+        if field != DOCUMENT_ID or isinstance(value, DocumentReference):
+            return value
+        if isinstance(value, (list, tuple)):
+            return [self._resolve_operand(field, item) for item in value]
+        path = value if '/' in str(value) else f"{self._collection_path}/{value}"
+        return DocumentReference(self._store, path)
+
+
+class CollectionReference(Query):
+    """Reference to a collection in a DocumentStore"""
+
+    def __init__(self, store, path):
+        super().__init__(store, path)
+        self.path = path
+
+    @property
+    def id(self):
+        return _split_path(self.path)[1]
+
+    @property
+    def parent(self):
+        collection_path, _ = _split_path(self.path)
+        return DocumentReference(self._store, collection_path) if collection_path else None
+
+    def document(self, document_id=None):
+        """Get a document reference, with a random ID if none is given"""
+        return DocumentReference(self._store, f"{self.path}/{document_id or _new_document_id()}")
+
+    def add(self, document_data, document_id=None):
+        """
+        Create a document
+
+        Returns:
+            tuple: (write time, DocumentReference)
+        """
+        doc_ref = self.document(document_id)
+        return doc_ref.create(document_data), doc_ref
+
+
+class WriteBatch:
+    """Writes committed atomically by commit()"""
+
+    def __init__(self, store):
+        self._store = store
+        self._writes = []
+
+    def __len__(self):
+        return len(self._writes)
+
+    def set(self, reference, document_data, merge=False):
+        self._writes.append(('set', reference.path, document_data, merge))
+
+    def create(self, reference, document_data):
+        self._writes.append(('create', reference.path, document_data, False))
+
+    def update(self, reference, field_updates):
+        self._writes.append(('update', reference.path, field_updates, False))
+
+    def delete(self, reference):
+        self._writes.append(('delete', reference.path, None, False))
+
+    def commit(self):
+        """
+        Apply every write, or none of them if one fails
+
+        Returns:
+            list: Write time of each write
+        """
+        writes, self._writes = self._writes, []
+        return self._store._commit(writes)
+
+
+class Watch:
+    """on_snapshot() listener of a DocumentStore query"""
+
+    def __init__(self, store, query, callback):
+        self._store = store
+        self._query = query
+        self._callback = callback
+        self._lock = threading.Lock()
+        self._previous = {}
+        self._started = False
+        self._active = True
+        store._add_watch(self)
+        self._refresh()
+
+    def unsubscribe(self):
+        """Stop listening"""
+        self._active = False
+        self._store._remove_watch(self)
+
+    def _refresh(self):
+        """Re-run the query and report any changes to the callback"""
+        with self._lock:
+            if not self._active:
+                return
+            read_time = datetime.datetime.now(datetime.timezone.utc)
+            results = self._query._execute(self._store._list_collection(self._query._collection_path))
+            docs = [DocumentSnapshot(ref, data, read_time) for ref, data in results]
+            current = {doc.reference.path: doc for doc in docs}
+
+            changes = []
+            for path, doc in current.items():
+                previous = self._previous.get(path)
+                if previous is None:
+                    changes.append(DocumentChange('ADDED', doc))
+                elif previous._data != doc._data:
+                    changes.append(DocumentChange('MODIFIED', doc))
+            for path, doc in self._previous.items():
+                if path not in current:
+                    changes.append(DocumentChange('REMOVED', doc))
+
+            # The first snapshot is always delivered, even when empty
+            first = not self._started
+            if changes or first:
+                self._started = True
+                self._previous = current
+                self._store._count('documents_read', max(len(changes), 1 if first else 0))
+                try:
+                    self._callback(docs, changes, read_time)
+                except Exception as e:
+                    print(f"Error in document store listener: {e}")
+
+
+class DocumentStore:
+    """
+    In-process stand-in for the Firestore client.
+
+    Mirrors the parts of the Firestore API this app uses (collections,
+    documents, subcollections, queries, batches and listeners) and its
+    semantics: batches commit atomically, create() and update() check
+    existence, set(merge=True) deep-merges, update() takes dotted field
+    paths, SERVER_TIMESTAMP and DELETE_FIELD are honoured, datetimes come
+    back UTC-aware and queries order values across types and break ties on
+    the document ID. Subclasses provide the storage.
+
+    latency adds a delay to every simulated RPC, so load tests can model
+    the network round trips of the real service. stats() counts reads and
+    writes the way Firestore bills them.
+    """
+
+    def __init__(self, latency=0.0):
+        """
+        Initialize the store
+
+        Args:
+            latency (float): Seconds added to every read, query and commit
+        """
+        self.latency = latency
+        self._watches = []
+        self._watch_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'lookups': 0, 'queries': 0, 'documents_read': 0, 'commits': 0, 'writes': 0}
+
+    # Firestore client interface
+
+    def collection(self, collection_path):
+        """Get a collection reference"""
+        return CollectionReference(self, collection_path)
+
+    def document(self, document_path):
+        """Get a document reference"""
+        return DocumentReference(self, document_path)
+
+    def batch(self):
+        """Start a write batch"""
+        return WriteBatch(self)
+
+    def get_all(self, references):
+        """Read several documents, yielding one snapshot per reference"""
+        for reference in references:
+            yield self._get_document(reference)
+
+    def stats(self):
+        """
+        Get operation counts
+
+        Returns:
+            dict: lookups, queries, documents_read, commits, writes and listeners
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        with self._watch_lock:
+            stats['listeners'] = len(self._watches)
+        return stats
+
+    def close(self):
+        """Stop every listener and release the storage"""
+        with self._watch_lock:
+            watches, self._watches = self._watches, []
+        for watch in watches:
+            watch._active = False
+
+    # Storage, provided by subclasses
+
+    def _read(self, path):
+        """Get a document's data, or None if it does not exist"""
+        raise NotImplementedError
+
+    def _list_collection(self, collection_path):
+        """Get (DocumentReference, data) pairs of every document in a collection"""
+        raise NotImplementedError
+
+    def _write_transaction(self):
+        """Context manager yielding an object with get(path), put(path, data) and delete(path)"""
+        raise NotImplementedError
+
+    # Engine
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _simulate_latency(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _get_document(self, reference):
+        self._simulate_latency()
+        data = self._read(reference.path)
+        self._count('lookups')
+        self._count('documents_read')
+        return DocumentSnapshot(reference, data, datetime.datetime.now(datetime.timezone.utc))
+
+    def _run_query(self, query):
+        self._simulate_latency()
+        read_time = datetime.datetime.now(datetime.timezone.utc)
+        results = query._execute(self._list_collection(query._collection_path))
+        self._count('queries')
+        # Firestore bills at least one read per query
+        self._count('documents_read', max(len(results), 1))
+        return [DocumentSnapshot(ref, data, read_time) for ref, data in results]
+
+    def _commit(self, writes):
+        """Apply writes atomically and notify listeners of the collections they touched"""
+        if not writes:
+            return []
+        self._simulate_latency()
+        now = datetime.datetime.now(datetime.timezone.utc)
+
+        with self._write_transaction() as txn:
+            # Resolve every write before storing anything, so a failed
+            # precondition leaves the store untouched
+            staged = {}
+            for op, path, data, merge in writes:
+                current = staged[path] if path in staged else txn.get(path)
+                staged[path] = self._apply_write(op, path, current, data, merge, now)
+            for path, data in staged.items():
+                if data is None:
+                    txn.delete(path)
+                else:
+                    txn.put(path, data)
+
+        self._count('commits')
+        self._count('writes', len(writes))
+        self._notify({_split_path(path)[0] for path in staged})
+        return [now] * len(writes)
+
+    def _apply_write(self, op, path, current, data, merge, now):
+        """Compute a document's new data (None when deleted)"""
+        if op == 'delete':
+            return None
+        if op == 'create':
+            if current is not None:
+                raise AlreadyExists(f"Document already exists: {path}")
+            return _normalize(data, now)
+        if op == 'set':
+            return _merge(current, data, now) if merge else _normalize(data, now)
+
+        if current is None:
+            raise NotFound(f"No document to update: {path}")
+        result = copy.deepcopy(current)
+        for field, value in data.items():
+            parts = field.split('.')
+            target = result
+            for part in parts[:-1]:
+                if not isinstance(target.get(part), dict):
+                    target[part] = {}
+                target = target[part]
+            if value is DELETE_FIELD:
+                target.pop(parts[-1], None)
+            else:
+                target[parts[-1]] = _normalize(value, now)
+        return result
+
+    def _add_watch(self, watch):
+        with self._watch_lock:
+            self._watches.append(watch)
+
+    def _remove_watch(self, watch):
+        with self._watch_lock:
+            if watch in self._watches:
+                self._watches.remove(watch)
+
+    def _notify(self, collection_paths):
+        """Refresh the listeners of changed collections, outside any store lock"""
+        with self._watch_lock:
+            watches = [watch for watch in self._watches
+                       if watch._query._collection_path in collection_paths]
+        for watch in watches:
+            watch._refresh()
+
+
+class _MemoryWriter:
+    """Write access to a MemoryDocumentStore's collections"""
+
+    def __init__(self, collections):
+        self._collections = collections
+
+    def get(self, path):
+        collection_path, doc_id = _split_path(path)
+        return self._collections.get(collection_path, {}).get(doc_id)
+
+    def put(self, path, data):
+        collection_path, doc_id = _split_path(path)
+        self._collections.setdefault(collection_path, {})[doc_id] = data
+
+    def delete(self, path):
+        collection_path, doc_id = _split_path(path)
+        documents = self._collections.get(collection_path)
+        if documents is not None:
+            documents.pop(doc_id, None)
+            if not documents:
+                del self._collections[collection_path]
+
+
+class MemoryDocumentStore(DocumentStore):
+    """
+    DocumentStore held in process memory.
+
+    Stored documents are never modified in place (every write stores a new
+    dict), so reads can share them without copying under the lock.
+    """
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency=latency)
+        self._collections = {}
+        self._lock = threading.RLock()
+
+    def _read(self, path):
+        with self._lock:
+            return _MemoryWriter(self._collections).get(path)
+
+    def _list_collection(self, collection_path):
+        with self._lock:
+            documents = list(self._collections.get(collection_path, {}).items())
+        return [(DocumentReference(self, f"{collection_path}/{doc_id}"), data)
+                for doc_id, data in documents]
+
+    @contextmanager
+    def _write_transaction(self):
+        with self._lock:
+            yield _MemoryWriter(self._collections)
+
+
+class _SQLiteWriter:
+    """Write access to a SQLiteDocumentStore inside one transaction"""
+
+    def __init__(self, store, conn):
+        self._store = store
+        self._conn = conn
+
+    def get(self, path):
+        collection_path, doc_id = _split_path(path)
+        row = self._conn.execute(
+            "SELECT data FROM documents WHERE collection = ? AND doc_id = ?", (collection_path, doc_id)
+        ).fetchone()
+        return self._store._decode(row["data"]) if row else None
+
+    def put(self, path, data):
+        collection_path, doc_id = _split_path(path)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO documents (collection, doc_id, data) VALUES (?, ?, ?)",
+            (collection_path, doc_id, self._store._encode(data))
+        )
+
+    def delete(self, path):
+        collection_path, doc_id = _split_path(path)
+        self._conn.execute(
+            "DELETE FROM documents WHERE collection = ? AND doc_id = ?", (collection_path, doc_id)
+        )
+
+
+class SQLiteDocumentStore(DocumentStore):
+    """
+    DocumentStore persisted in SQLite, one row per document.
+
+    Each batch commits in one write transaction, so it stays atomic across
+    threads and processes sharing the database file.
+    """
+
+    def __init__(self, db_path="document_store.db", pool=None, latency=0.0):
+        """
+        Initialize the store
+
+        Args:
+            db_path (str): Path to the SQLite database
+            pool (SQLitePool, optional): Existing connection pool to share
+            latency (float): Seconds added to every read, query and commit
+        """
+        super().__init__(latency=latency)
+        self.pool = pool or SQLitePool(db_path)
+        with self.pool.transaction() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                collection TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (collection, doc_id)
+            ) WITHOUT ROWID
+            """)
+
+    def close(self):
+        super().close()
+        self.pool.close()
+
+    def _encode(self, data):
+        def default(value):
+            if isinstance(value, datetime.datetime):
+                return {'$datetime': value.isoformat()}
+            if isinstance(value, DocumentReference):
+                return {'$ref': value.path}
+            if isinstance(value, bytes):
+                return {'$bytes': base64.b64encode(value).decode('ascii')}
+            raise TypeError(f"Cannot store value of type {type(value).__name__}")
+        return json.dumps(data, default=default, separators=(',', ':'))
+
+    def _decode(self, text):
+        def object_hook(obj):
+            if len(obj) == 1:
+                if '$datetime' in obj:
+                    return datetime.datetime.fromisoformat(obj['$datetime'])
+                if '$ref' in obj:
+                    return DocumentReference(self, obj['$ref'])
+                if '$bytes' in obj:
+                    return base64.b64decode(obj['$bytes'])
+            return obj
+        return json.loads(text, object_hook=object_hook)
+
+    def _read(self, path):
+        with self.pool.connection() as conn:
+            return _SQLiteWriter(self, conn).get(path)
+
+    def _list_collection(self, collection_path):
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT doc_id, data FROM documents WHERE collection = ?", (collection_path,)
+            ).fetchall()
+        return [(DocumentReference(self, f"{collection_path}/{row['doc_id']}"), self._decode(row['data']))
+                for row in rows]
+
+    @contextmanager
+    def _write_transaction(self):
+        with self.pool.transaction() as conn:
+            yield _SQLiteWriter(self, conn)
@@ -0,0 +1,165 @@
+import os
+from urllib.parse import quote
+from app.database.document_store import AlreadyExists
+
+EMAIL_INDEX_COLLECTION = 'user_emails'
+
+# Fall back to querying users by email when the index has no entry, for
+# users created before the index existed. Only enable it while migrating,
+# until backfill() has run.
+LEGACY_EMAIL_LOOKUP = os.environ.get('EMAIL_INDEX_LEGACY_LOOKUP', '0') == '1'
+
+
+def normalize_email(email):
+    """Normalize an email address for uniqueness checks"""
+    return email.strip().lower()
+
+
+def email_key(email):
+    """
+    Get the index document ID of an email address
+
+    Args:
+        email (str): Email address
+
+    Returns:
+        str: Normalized address, with '/' and '%' escaped (not allowed in IDs)
+    """
+    return quote(normalize_email(email), safe='@+')
+
+
+class EmailIndex:
+    """
+    Unique email index kept in its own collection.
+
+    Each address owns one document keyed by the normalized address and
+    holding the user ID. It is written with create() in the same batch as
+    the user document, so the commit fails atomically if another user
+    already claimed the address; lookups are a single keyed read instead
+    of a query on the users collection.
+    """
+
+    def __init__(self, db, users_collection='users', collection=EMAIL_INDEX_COLLECTION,
+                 legacy_lookup=None):
+        """
+        Initialize the index
+
+        Args:
+            db: Firestore client or DocumentStore
+            users_collection (str): Collection holding the user documents
+            collection (str): Collection holding the index documents
+            legacy_lookup (bool, optional): Query users on index misses
+                (default: LEGACY_EMAIL_LOOKUP)
+        """
+        self.db = db
+        self.users_collection = users_collection
+        self.collection = collection
+        self.legacy_lookup = LEGACY_EMAIL_LOOKUP if legacy_lookup is None else legacy_lookup
+
+    def reference(self, email):
+        """Get the index document reference of an email address"""
+        return self.db.collection(self.collection).document(email_key(email))
+
+    def lookup(self, email):
+        """
+        Get the ID of the user with an email address
+
+        Args:
+            email (str): Email address
+
+        Returns:
+            str: User ID, or None if no user has the address
+        """
+        doc = self.reference(email).get()
+        if doc.exists:
+            return doc.to_dict().get('user_id')
+        if self.legacy_lookup:
+            return self._legacy_lookup(email)
+        return None
+
+    def create_user(self, user_ref, user_data, email):
+        """
+        Write a new user and claim its email address in one atomic batch
+
+        Args:
+            user_ref: Reference of the new user document
+            user_data (dict): User document data
+            email (str): Email address to claim
+
+        Raises:
+            ValueError: If another user already has the address
+        """
+        if self.legacy_lookup and self._legacy_lookup(email):
+            raise ValueError(f"User with email {email} already exists")
+
+        batch = self.db.batch()
+        batch.create(self.reference(email), {'user_id': user_ref.id, 'email': email})
+        batch.set(user_ref, user_data)
+        try:
+            batch.commit()
+        except AlreadyExists:
+            raise ValueError(f"User with email {email} already exists")
+
+    def change_email(self, user_ref, old_email, new_email, update_data):
+        """
+        Move a user to a new email address together with other updates
+
+        Args:
+            user_ref: Reference of the user document
+            old_email (str): Current email address (None if the user has none)
+            new_email (str): New email address
+            update_data (dict): User fields to update (including 'email')
+
+        Raises:
+            ValueError: If another user already has the new address
+        """
+        batch = self.db.batch()
+        if not old_email or email_key(old_email) != email_key(new_email):
+            batch.create(self.reference(new_email), {'user_id': user_ref.id, 'email': new_email})
+            if old_email:
+                batch.delete(self.reference(old_email))
+        batch.update(user_ref, update_data)
+        try:
+            batch.commit()
+        except AlreadyExists:
+            raise ValueError(f"User with email {new_email} already exists")
+
+    def backfill(self):
+        """
+        Create index documents for users that do not have one
+
+        This scans the users collection once; run it before turning off
+        legacy lookups.
+
+        Returns:
+            int: Number of index documents created
+        """
+        created = 0
+        for doc in self.db.collection(self.users_collection).select(['email']).stream():
+            email = (doc.to_dict() or {}).get('email')
+            if not email:
+                continue
+            try:
+                self.reference(email).create({'user_id': doc.id, 'email': email})
+                created += 1
+            except AlreadyExists:
+                pass
+        return created
+
+    def _legacy_lookup(self, email):
+        """Find a user by querying the email field, indexing it if found"""
+        # Legacy users may have stored the address as typed, not normalized
+        docs = []
+        for candidate in dict.fromkeys([normalize_email(email), email.strip()]):
+            docs = list(self.db.collection(self.users_collection)
+                        .where('email', '==', candidate).limit(1).stream())
+            if docs:
+                break
+        if not docs:
+            return None
+
+        try:
+            self.reference(email).create({'user_id': docs[0].id, 'email': email})
+        except AlreadyExists:
+            pass
+        return docs[0].id
@@ -1,8 +1,12 @@
 import os
 import json
+import time
 import firebase_admin
 from firebase_admin import credentials, firestore
-from datetime import datetime
+from app.database.query_cache import QueryCache, FirestoreReadMetrics, CacheEntry
+from app.database.query_planner import query_planner, normalize_order_by, encode_cursor
+from app.database.models import get_client
+from app.database.email_index import EmailIndex
 
 def initialize_firebase():
     """Initialize Firebase Admin SDK"""
@@ -33,26 +37,42 @@ def initialize_firebase():
     firebase_admin.initialize_app(cred)
     return firestore.client()
 
+# Fields a session history list needs, fetched instead of whole sessions
+SESSION_SUMMARY_FIELDS = ['user_id', 'job_id', 'job_title', 'status', 'created_at', 'start_time',
+                          'end_time', 'duration', 'metrics.overall_score']
+
 class FirebaseClient:
     """Firebase client for database operations"""
     
-    def __init__(self):
-        """Initialize the Firebase client"""
-        self.db = firestore.client()
+    def __init__(self, cache_ttl=30.0, cache_size=256, live_queries=True, listener_timeout=5.0,
+                 db=None):
+        """
+        Initialize the Firebase client
+        
+        Args:
+            cache_ttl (float): Seconds a plain cached query stays cached, and
+                seconds an unused live query stays cached
+            cache_size (int): Maximum number of cached queries
+            live_queries (bool): Keep cached queries current with on_snapshot listeners
+            listener_timeout (float): Seconds to wait for a listener's first snapshot
+                before falling back to a plain read
+            db: Firestore client or DocumentStore (default: the shared client)
+        """
+        self.db = db if db is not None else get_client()
+        self.email_index = EmailIndex(self.db)
+        self.cache = QueryCache(ttl=cache_ttl, max_entries=cache_size)
+        self.read_metrics = FirestoreReadMetrics()
+        self.live_queries = live_queries
+        self.listener_timeout = listener_timeout
     
     def document_to_dict(self, doc):
         """Convert Firestore document to dictionary"""
         if not doc.exists:
             return None
         
+        # Timestamps are already returned as datetime values
         doc_dict = doc.to_dict()
         doc_dict['id'] = doc.id
-        
-        # Convert Firestore timestamps to Python datetime
-        for key, value in doc_dict.items():
-            if isinstance(value, firestore.firestore.SERVER_TIMESTAMP):
-                doc_dict[key] = datetime.now()
-        
         return doc_dict
     
     def collection_to_list(self, collection):
@@ -64,28 +84,91 @@ class FirebaseClient:
                 result.append(doc_dict)
         return result
     
+    def get_read_metrics(self):
+        """Get Firestore read counts, latency and cache usage"""
+        return {**self.read_metrics.summary(), 'cache': self.cache.stats()}
+    
+    def close(self):
+        """Drop cached queries and stop their listeners and the cache sweeper"""
+        self.cache.close()
+    
+    def _get_document(self, operation, doc_ref):
+        """Read one document, recording read metrics"""
+        start = time.perf_counter()
+        doc = doc_ref.get()
+        self.read_metrics.record_read(operation, 1, time.perf_counter() - start)
+        return self.document_to_dict(doc)
+    
+    def _cached_query(self, operation, collection, query, key):
+        """
+        Run a query through the read-through cache
+        
+        On a miss the query is registered as an on_snapshot listener and
+        its first snapshot becomes the cached result; later snapshots
+        update the entry in place, so cached results stay current until
+        the entry expires. If the listener cannot be started the query is
+        read once and cached for the TTL.
+        """
+        entry = self.cache.get(key)
+        if entry is not None and entry.ready.is_set():
+            self.read_metrics.record_cache(True)
+            return [dict(doc) for doc in entry.value]
+        self.read_metrics.record_cache(False)
+        
+        start = time.perf_counter()
+        result = None
+        if self.live_queries:
+            entry = CacheEntry(collection)
+            
+            def on_snapshot(docs, changes, read_time):
+                value = [doc_dict for doc_dict in map(self.document_to_dict, docs) if doc_dict]
+                if entry.ready.is_set():
+                    self.read_metrics.record_snapshot(len(changes))
+                entry.value = value
+                entry.ready.set()
+            
+            try:
+                entry.watch = query.on_snapshot(on_snapshot)
+                if entry.ready.wait(self.listener_timeout):
+                    result = entry.value
+                    self.cache.put(key, entry)
+                else:
+                    entry.close()
+            except Exception as e:
+                print(f"Error starting Firestore listener for {operation}: {e}")
+                entry.close()
+        
+        if result is None:
+            result = self.collection_to_list(query.stream())
+            self.cache.put(key, CacheEntry(collection, result))
+        
+        self.read_metrics.record_read(operation, len(result), time.perf_counter() - start)
+        return [dict(doc) for doc in result]
+    
     # User operations
     def get_user(self, user_id):
         """Get user by ID"""
         doc_ref = self.db.collection('users').document(user_id)
-        doc = doc_ref.get()
-        return self.document_to_dict(doc)
+        return self._get_document('get_user', doc_ref)
+    
+    def get_user_by_email(self, email):
+        """Get user by email, through the email index"""
+        user_id = self.email_index.lookup(email)
+        return self.get_user(user_id) if user_id else None
     
     def create_user(self, user_data):
         """Create a new user"""
-        # Check if user with email already exists
-        email = user_data.get('email')
-        if email:
-            query = self.db.collection('users').where('email', '==', email).limit(1)
-            if len(list(query.stream())) > 0:
-                raise ValueError(f"User with email {email} already exists")
-        
         # Add timestamp
         user_data['created_at'] = firestore.SERVER_TIMESTAMP
         
-        # Add to database
+        # Add to database, claiming the email in the same atomic batch
         doc_ref = self.db.collection('users').document()
-        doc_ref.set(user_data)
+        email = user_data.get('email')
+        if email:
+            self.email_index.create_user(doc_ref, user_data, email)
+        else:
+            doc_ref.set(user_data)
+        self.cache.invalidate_collection('users')
         
         # Return with ID
         return {**user_data, 'id': doc_ref.id}
@@ -93,7 +176,14 @@ class FirebaseClient:
     def update_user(self, user_id, update_data):
         """Update user data"""
         doc_ref = self.db.collection('users').document(user_id)
-        doc_ref.update(update_data)
+        if 'email' in update_data:
+            current = self.get_user(user_id)
+            if current is None:
+                raise ValueError(f"User {user_id} does not exist")
+            self.email_index.change_email(doc_ref, current.get('email'), update_data['email'], update_data)
+        else:
+            doc_ref.update(update_data)
+        self.cache.invalidate_collection('users')
         return True
     
     # Interview session operations
@@ -106,6 +196,7 @@ class FirebaseClient:
         # Add to database
         doc_ref = self.db.collection('interview_sessions').document()
         doc_ref.set(session_data)
+        self.cache.invalidate_collection('interview_sessions')
         
         # Return with ID
         return {**session_data, 'id': doc_ref.id}
@@ -113,24 +204,58 @@ class FirebaseClient:
     def get_interview_session(self, session_id):
         """Get interview session by ID"""
         doc_ref = self.db.collection('interview_sessions').document(session_id)
-        doc = doc_ref.get()
-        return self.document_to_dict(doc)
+        return self._get_document('get_interview_session', doc_ref)
     
     def update_interview_session(self, session_id, update_data):
         """Update interview session data"""
         update_data['updated_at'] = firestore.SERVER_TIMESTAMP
         doc_ref = self.db.collection('interview_sessions').document(session_id)
         doc_ref.update(update_data)
+        self.cache.invalidate_collection('interview_sessions')
         return True
     
-    def get_user_sessions(self, user_id, limit=10):
+    def get_user_sessions(self, user_id, limit=10, use_cache=True):
         """Get interview sessions for a user"""
-        query = self.db.collection('interview_sessions')\
-            .where('user_id', '==', user_id)\
-            .order_by('created_at', direction='DESCENDING')\
-            .limit(limit)
+        query, _ = query_planner.build(
+            self.db.collection('interview_sessions'), 'interview_sessions',
+            filters=[('user_id', '==', user_id)],
+            order_by=[('created_at', 'DESCENDING')],
+            limit=limit
+        )
+        
+        if not use_cache:
+            start = time.perf_counter()
+            result = self.collection_to_list(query.stream())
+            self.read_metrics.record_read('get_user_sessions', len(result), time.perf_counter() - start)
+            return result
+        
+        key = repr(('get_user_sessions', user_id, limit))
+        return self._cached_query('get_user_sessions', 'interview_sessions', query, key)
+    
+    def get_user_sessions_page(self, user_id, page_size=20, cursor=None, select=SESSION_SUMMARY_FIELDS):
+        """
+        Get one page of a user's sessions, newest first
+        
+        Only the summary fields are fetched by default, so history views
+        read a small projection of each session one page at a time.
         
-        return self.collection_to_list(query.stream())
+        Args:
+            user_id (str): User ID
+            page_size (int): Sessions per page
+            cursor (str, optional): next_cursor of the previous page
+            select (list, optional): Fields to return (None for whole documents)
+        
+        Returns:
+            dict: 'items' and 'next_cursor' (None on the last page)
+        """
+        return self.query_page(
+            'interview_sessions',
+            filters=[('user_id', '==', user_id)],
+            order_by=[('created_at', 'DESCENDING')],
+            page_size=page_size,
+            select=select,
+            cursor=cursor
+        )
     
     # Document operations
     def save_document(self, collection, data):
@@ -142,6 +267,7 @@ class FirebaseClient:
         # Add to database
         doc_ref = self.db.collection(collection).document()
         doc_ref.set(data)
+        self.cache.invalidate_collection(collection)
         
         # Return with ID
         return {**data, 'id': doc_ref.id}
@@ -149,39 +275,101 @@ class FirebaseClient:
     def get_document(self, collection, doc_id):
         """Get a document by ID"""
         doc_ref = self.db.collection(collection).document(doc_id)
-        doc = doc_ref.get()
-        return self.document_to_dict(doc)
+        return self._get_document('get_document', doc_ref)
     
     def update_document(self, collection, doc_id, update_data):
         """Update a document"""
         update_data['updated_at'] = firestore.SERVER_TIMESTAMP
         doc_ref = self.db.collection(collection).document(doc_id)
         doc_ref.update(update_data)
+        self.cache.invalidate_collection(collection)
         return True
     
     def delete_document(self, collection, doc_id):
         """Delete a document"""
         doc_ref = self.db.collection(collection).document(doc_id)
         doc_ref.delete()
+        self.cache.invalidate_collection(collection)
         return True
     
-    def query_collection(self, collection, filters=None, order_by=None, limit=None):
-        """Query a collection with filters"""
-        query = self.db.collection(collection)
+    def query_collection(self, collection, filters=None, order_by=None, limit=None, use_cache=True,
+                         select=None, start_after=None):
+        """
+        Query a collection with filters
         
-        # Apply filters
-        if filters:
-            for field, op, value in filters:
-                query = query.where(field, op, value)
+        Args:
+            collection (str): Collection name
+            filters (list, optional): (field, op, value) tuples
+            order_by: Field name, (field, direction) tuple, or a list of either
+            limit (int, optional): Maximum number of documents
+            use_cache (bool): Serve the result through the query cache
+            select (list, optional): Only return these fields (plus 'id')
+            start_after (str, optional): Cursor from query_page
+        """
+        query, _ = query_planner.build(
+            self.db.collection(collection), collection,
+            filters=filters,
+            order_by=normalize_order_by(order_by),
+            select=select,
+            start_after=start_after,
+            limit=limit
+        )
+        
+        if not use_cache:
+            start = time.perf_counter()
+            result = self.collection_to_list(query.stream())
+            self.read_metrics.record_read('query_collection', len(result), time.perf_counter() - start)
+            return result
+        
+        key = repr(('query_collection', collection, filters, order_by, limit,
+                    tuple(select) if select else None, start_after))
+        return self._cached_query('query_collection', collection, query, key)
+    
+    def query_page(self, collection, filters=None, order_by=None, page_size=20, select=None,
+                   cursor=None):
+        """
+        Get one page of a query, continuing from a cursor
         
-        # Apply ordering
-        if order_by:
-            field, direction = order_by if isinstance(order_by, tuple) else (order_by, 'ASCENDING')
-            direction = firestore.Query.DESCENDING if direction.upper() == 'DESCENDING' else firestore.Query.ASCENDING
-            query = query.order_by(field, direction=direction)
+        Pages are read directly rather than through the query cache: each
+        page is usually read once, so a listener per page would only add
+        reads.
+        
+        Args:
+            collection (str): Collection name
+            filters (list, optional): (field, op, value) tuples
+            order_by: Field name, (field, direction) tuple, or a list of either
+            page_size (int): Documents per page
+            select (list, optional): Only return these fields (plus 'id')
+            cursor (str, optional): next_cursor of the previous page
+        
+        Returns:
+            dict: 'items' and 'next_cursor' (None on the last page)
+        """
+        query, orders = query_planner.build(
+            self.db.collection(collection), collection,
+            filters=filters,
+            order_by=normalize_order_by(order_by),
+            select=select,
+            start_after=cursor,
+            limit=page_size,
+            paginate=True
+        )
+        
+        start = time.perf_counter()
+        items = self.collection_to_list(query.stream())
+        self.read_metrics.record_read('query_page', len(items), time.perf_counter() - start)
+        
+        next_cursor = encode_cursor(items[-1], orders) if len(items) == page_size else None
+        return {'items': items, 'next_cursor': next_cursor}
+    
+    def write_index_manifest(self, path='firestore.indexes.json'):
+        """
+        Write the composite indexes needed by the queries run so far
         
-        # Apply limit
-        if limit:
-            query = query.limit(limit)
+        Args:
+            path (str): firestore.indexes.json path to merge into
         
-        return self.collection_to_list(query.stream())
\ No newline at end of file
+        Returns:
+            dict: Merged manifest
+        """
+        return query_planner.write_index_manifest(path)
\ No newline at end of file
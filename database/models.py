@@ -1,17 +1,125 @@
-from firebase_admin import firestore
+from concurrent.futures import ThreadPoolExecutor
+from app.database.query_planner import query_planner, normalize_order_by, encode_cursor
+from app.database.document_store import create_client
+import threading
 import uuid
 import time
 from datetime import datetime
 
+# Firestore allows at most 500 writes per batch
+MAX_BATCH_WRITES = 500
+
+_client = None
+_client_lock = threading.Lock()
+
+# Shared pool for concurrent reads (e.g. session subcollections)
+_read_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="firestore-read")
+
+def get_client():
+    """
+    Get the shared Firestore client, creating it on first use
+    
+    The DOCUMENT_STORE environment variable ('memory' or 'sqlite:///path')
+    selects an in-process stand-in instead of Firestore.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_client()
+    return _client
+
+def set_client(client):
+    """
+    Replace the shared client, e.g. with a DocumentStore for tests and load tests
+    
+    Args:
+        client: Firestore client or DocumentStore (None to recreate on next use)
+    """
+    global _client
+    with _client_lock:
+        _client = client
+
+class UnitOfWork:
+    """
+    Collects writes and commits them through Firestore WriteBatch.
+    
+    Use as a context manager; staged writes are committed when the block
+    exits without an error and discarded otherwise. Writes beyond the
+    Firestore batch limit are split across several batches, so only each
+    batch of 500 is atomic.
+    
+        with UnitOfWork() as uow:
+            session = InterviewSession.create(data, uow=uow)
+            InterviewSession.add_to_session(session['id'], 'questions', question, uow=uow)
+    """
+    
+    def __init__(self, db=None):
+        self.db = db or get_client()
+        self._writes = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+    
+    def __len__(self):
+        return len(self._writes)
+    
+    def set(self, doc_ref, data, merge=False):
+        """Stage a set of a document"""
+        self._writes.append(('set', doc_ref, data, merge))
+    
+    def update(self, doc_ref, data):
+        """Stage an update of a document"""
+        self._writes.append(('update', doc_ref, data, None))
+    
+    def delete(self, doc_ref):
+        """Stage a delete of a document"""
+        self._writes.append(('delete', doc_ref, None, None))
+    
+    def commit(self):
+        """
+        Commit all staged writes
+        
+        Returns:
+            int: Number of writes committed
+        """
+        writes, self._writes = self._writes, []
+        for start in range(0, len(writes), MAX_BATCH_WRITES):
+            batch = self.db.batch()
+            for op, doc_ref, data, merge in writes[start:start + MAX_BATCH_WRITES]:
+                if op == 'set':
+                    batch.set(doc_ref, data, merge=merge)
+                elif op == 'update':
+                    batch.update(doc_ref, data)
+                else:
+                    batch.delete(doc_ref)
+            batch.commit()
+        return len(writes)
+    
+    def rollback(self):
+        """Discard all staged writes"""
+        self._writes = []
+
 class BaseModel:
     """Base model for all database models"""
     
     collection_name = None
     
     @classmethod
-    def create(cls, data):
-        """Create a new document"""
-        db = firestore.client()
+    def collection(cls):
+        """Get the model's collection reference"""
+        return get_client().collection(cls.collection_name)
+    
+    @classmethod
+    def create(cls, data, uow=None):
+        """Create a new document, staged in uow if given"""
         doc_id = str(uuid.uuid4())
         
         # Add timestamps
@@ -21,14 +129,17 @@ class BaseModel:
         data['id'] = doc_id
         
         # Save to database
-        db.collection(cls.collection_name).document(doc_id).set(data)
+        doc_ref = cls.collection().document(doc_id)
+        if uow is not None:
+            uow.set(doc_ref, data)
+        else:
+            doc_ref.set(data)
         return data
     
     @classmethod
     def get(cls, doc_id):
         """Get a document by ID"""
-        db = firestore.client()
-        doc = db.collection(cls.collection_name).document(doc_id).get()
+        doc = cls.collection().document(doc_id).get()
         
         if not doc.exists:
             return None
@@ -36,43 +147,54 @@ class BaseModel:
         return doc.to_dict()
     
     @classmethod
-    def update(cls, doc_id, data):
-        """Update a document"""
-        db = firestore.client()
-        
+    def update(cls, doc_id, data, uow=None):
+        """Update a document, staged in uow if given"""
         # Add updated timestamp
         data['updated_at'] = int(time.time())
         
         # Update database
-        db.collection(cls.collection_name).document(doc_id).update(data)
+        doc_ref = cls.collection().document(doc_id)
+        if uow is not None:
+            uow.update(doc_ref, data)
+        else:
+            doc_ref.update(data)
         return True
     
     @classmethod
-    def delete(cls, doc_id):
-        """Delete a document"""
-        db = firestore.client()
-        db.collection(cls.collection_name).document(doc_id).delete()
+    def delete(cls, doc_id, uow=None):
+        """Delete a document, staged in uow if given"""
+        doc_ref = cls.collection().document(doc_id)
+        if uow is not None:
+            uow.delete(doc_ref)
+        else:
+            doc_ref.delete()
         return True
     
     @classmethod
-    def query(cls, filters=None, order_by=None, direction='ASCENDING', limit=None):
-        """Query collection with filters"""
-        db = firestore.client()
-        query = db.collection(cls.collection_name)
+    def query(cls, filters=None, order_by=None, direction='ASCENDING', limit=None, select=None,
+              start_after=None):
+        """
+        Query collection with filters
         
-        # Apply filters
-        if filters:
-            for field, op, value in filters:
-                query = query.where(field, op, value)
-        
-        # Apply ordering
-        if order_by:
-            direction_value = firestore.Query.DESCENDING if direction.upper() == 'DESCENDING' else firestore.Query.ASCENDING
-            query = query.order_by(order_by, direction=direction_value)
-        
-        # Apply limit
-        if limit:
-            query = query.limit(limit)
+        Args:
+            filters (list, optional): (field, op, value) tuples
+            order_by: Field name, (field, direction) tuple, or a list of either
+            direction (str): Direction for bare order_by field names
+            limit (int, optional): Maximum number of documents
+            select (list, optional): Only return these fields (plus 'id')
+            start_after (str, optional): Cursor from query_page
+            
+        Returns:
+            list: Matching documents
+        """
+        query, _ = query_planner.build(
+            cls.collection(), cls.collection_name,
+            filters=filters,
+            order_by=normalize_order_by(order_by, direction),
+            select=select,
+            start_after=start_after,
+            limit=limit
+        )
         
         # Execute query
         docs = query.stream()
@@ -84,6 +206,42 @@ class BaseModel:
             result.append(doc_dict)
         
         return result
+    
+    @classmethod
+    def query_page(cls, filters=None, order_by=None, direction='ASCENDING', page_size=20,
+                   select=None, cursor=None):
+        """
+        Get one page of a query, continuing from a cursor
+        
+        Args:
+            filters (list, optional): (field, op, value) tuples
+            order_by: Field name, (field, direction) tuple, or a list of either
+            direction (str): Direction for bare order_by field names
+            page_size (int): Documents per page
+            select (list, optional): Only return these fields (plus 'id')
+            cursor (str, optional): next_cursor of the previous page
+            
+        Returns:
+            dict: 'items' and 'next_cursor' (None on the last page)
+        """
+        query, orders = query_planner.build(
+            cls.collection(), cls.collection_name,
+            filters=filters,
+            order_by=normalize_order_by(order_by, direction),
+            select=select,
+            start_after=cursor,
+            limit=page_size,
+            paginate=True
+        )
+        
+        items = []
+        for doc in query.stream():
+            doc_dict = doc.to_dict()
+            doc_dict['id'] = doc.id
+            items.append(doc_dict)
+        
+        next_cursor = encode_cursor(items[-1], orders) if len(items) == page_size else None
+        return {'items': items, 'next_cursor': next_cursor}
 
 class Resume(BaseModel):
     """Resume model"""
@@ -129,44 +287,118 @@ class InterviewSession(BaseModel):
             limit=limit
         )
     
+    # Fields needed to list sessions in a history view
+    SUMMARY_FIELDS = ['user_id', 'job_id', 'job_title', 'status', 'created_at', 'start_time',
+                      'end_time', 'duration', 'metrics.overall_score']
+    
     @classmethod
-    def get_session_questions(cls, session_id):
-        """Get questions for an interview session"""
-        db = firestore.client()
-        questions = db.collection('interview_sessions').document(session_id).collection('questions').stream()
+    def get_user_sessions_page(cls, user_id, page_size=20, cursor=None, select=None):
+        """
+        Get one page of a user's sessions, newest first, with only summary fields
+        
+        Args:
+            user_id (str): User ID
+            page_size (int): Sessions per page
+            cursor (str, optional): next_cursor of the previous page
+            select (list, optional): Fields to return (default: SUMMARY_FIELDS)
+            
+        Returns:
+            dict: 'items' and 'next_cursor' (None on the last page)
+        """
+        return cls.query_page(
+            filters=[('user_id', '==', user_id)],
+            order_by='created_at',
+            direction='DESCENDING',
+            page_size=page_size,
+            select=select or cls.SUMMARY_FIELDS,
+            cursor=cursor
+        )
+    
+    SUBCOLLECTIONS = ('questions', 'answers', 'feedback')
+    
+    @classmethod
+    def _get_subcollection(cls, session_id, name):
+        """Get all documents of a session subcollection"""
+        docs = cls.collection().document(session_id).collection(name).stream()
         
         result = []
-        for q in questions:
-            q_dict = q.to_dict()
-            q_dict['id'] = q.id
-            result.append(q_dict)
+        for doc in docs:
+            doc_dict = doc.to_dict()
+            doc_dict['id'] = doc.id
+            result.append(doc_dict)
         
         return result
     
+    @classmethod
+    def get_session_questions(cls, session_id):
+        """Get questions for an interview session"""
+        return cls._get_subcollection(session_id, 'questions')
+    
     @classmethod
     def get_session_answers(cls, session_id):
         """Get answers for an interview session"""
-        db = firestore.client()
-        answers = db.collection('interview_sessions').document(session_id).collection('answers').stream()
-        
-        result = []
-        for a in answers:
-            a_dict = a.to_dict()
-            a_dict['id'] = a.id
-            result.append(a_dict)
-        
-        return result
+        return cls._get_subcollection(session_id, 'answers')
     
     @classmethod
     def get_session_feedback(cls, session_id):
         """Get feedback for an interview session"""
-        db = firestore.client()
-        feedback = db.collection('interview_sessions').document(session_id).collection('feedback').stream()
+        return cls._get_subcollection(session_id, 'feedback')
+    
+    @classmethod
+    def load_session(cls, session_id):
+        """
+        Load a session with its questions, answers and feedback
         
-        result = []
-        for f in feedback:
-            f_dict = f.to_dict()
-            f_dict['id'] = f.id
-            result.append(f_dict)
+        The session document and the three subcollections are fetched
+        concurrently, so loading costs one round trip instead of four.
         
-        return result
\ No newline at end of file
+        Args:
+            session_id (str): Session ID
+            
+        Returns:
+            dict: Session data with 'questions', 'answers' and 'feedback'
+                lists, or None if the session does not exist
+        """
+        session_future = _read_executor.submit(cls.get, session_id)
+        sub_futures = {
+            name: _read_executor.submit(cls._get_subcollection, session_id, name)
+            for name in cls.SUBCOLLECTIONS
+        }
+        
+        session = session_future.result()
+        if session is None:
+            for future in sub_futures.values():
+                future.cancel()
+            return None
+        
+        for name, future in sub_futures.items():
+            session[name] = future.result()
+        return session
+    
+    @classmethod
+    def add_to_session(cls, session_id, subcollection, data, uow=None):
+        """
+        Add a question, answer or feedback document to a session
+        
+        Args:
+            session_id (str): Session ID
+            subcollection (str): One of 'questions', 'answers', 'feedback'
+            data (dict): Document data
+            uow (UnitOfWork, optional): Stage the write instead of committing it
+            
+        Returns:
+            dict: Saved document data
+        """
+        if subcollection not in cls.SUBCOLLECTIONS:
+            raise ValueError(f"Unknown session subcollection: {subcollection}")
+        
+        doc_id = data.get('id') or str(uuid.uuid4())
+        data['id'] = doc_id
+        data.setdefault('created_at', int(time.time()))
+        
+        doc_ref = cls.collection().document(session_id).collection(subcollection).document(doc_id)
+        if uow is not None:
+            uow.set(doc_ref, data)
+        else:
+            doc_ref.set(data)
+        return data
@@ -0,0 +1,315 @@
+import time
+import threading
+from collections import OrderedDict, deque, defaultdict
+
+from app.utils.stats import percentile
+
+
+class FirestoreReadMetrics:
+    """Counts Firestore reads and cache hits and tracks read latency"""
+
+    def __init__(self, window=1000):
+        """
+        Initialize the metrics
+
+        Args:
+            window (int): Number of recent reads kept for latency percentiles
+        """
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        """Clear all counters"""
+        with self._lock:
+            self._latencies.clear()
+            self.reads = 0
+            self.documents_read = 0
+            self.cache_hits = 0
+            self.cache_misses = 0
+            self.snapshot_updates = 0
+            self.by_operation = defaultdict(lambda: {"reads": 0, "documents": 0, "seconds": 0.0})
+
+    def record_read(self, operation, documents, latency):
+        """
+        Record a Firestore read
+
+        Args:
+            operation (str): Client method that read (e.g. get_user_sessions)
+            documents (int): Documents returned (what Firestore bills)
+            latency (float): Seconds the read took
+        """
+        with self._lock:
+            self.reads += 1
+            self.documents_read += documents
+            self._latencies.append(latency)
+            stats = self.by_operation[operation]
+            stats["reads"] += 1
+            stats["documents"] += documents
+            stats["seconds"] += latency
+
+    def record_snapshot(self, documents):
+        """
+        Record a listener update
+
+        Args:
+            documents (int): Changed documents delivered (billed as reads)
+        """
+        with self._lock:
+            self.snapshot_updates += 1
+            self.documents_read += documents
+
+    def record_cache(self, hit):
+        """
+        Record a cache lookup
+
+        Args:
+            hit (bool): Whether the result was served from the cache
+        """
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def summary(self):
+        """
+        Summarize the collected metrics
+
+        Returns:
+            dict: Read counts, cache hit rate and latency percentiles
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                "reads": self.reads,
+                "documents_read": self.documents_read,
+                "snapshot_updates": self.snapshot_updates,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "cache_hit_rate": self.cache_hits / lookups if lookups else 0.0,
+                "latency_p50": percentile(latencies, 50),
+                "latency_p95": percentile(latencies, 95),
+                "latency_p99": percentile(latencies, 99),
+                "by_operation": {op: dict(stats) for op, stats in self.by_operation.items()}
+            }
+
+
+class CacheEntry:
+    """A cached query result, optionally kept current by a snapshot listener"""
+
+    def __init__(self, collection, value=None):
+        self.collection = collection
+        self.value = value
+        self.expires_at = None
+        self.watch = None
+        self.ready = threading.Event()
+        if value is not None:
+            self.ready.set()
+
+    def close(self):
+        """Stop the snapshot listener, if any"""
+        if self.watch is not None:
+            try:
+                self.watch.unsubscribe()
+            except Exception as e:
+                print(f"Error stopping Firestore listener: {e}")
+            self.watch = None
+
+
+class QueryCache:
+    """
+    Read-through cache of Firestore query results.
+
+    Plain entries expire ttl seconds after they were read, so writes from
+    other processes show up within ttl. Entries backed by an on_snapshot
+    listener are updated in place as documents change and expire after ttl
+    seconds without use; closing an entry stops its listener. The least
+    recently used entry is evicted beyond max_entries. Expired entries are
+    dropped by get() and put() and by a background sweeper, so an entry
+    nobody asks for again does not keep its listener open. Entries are invalidated per collection when this
+    process writes to it.
+    """
+
+    def __init__(self, ttl=30.0, max_entries=256, sweep_interval=None):
+        """
+        Initialize the cache
+
+        Args:
+            ttl (float): Seconds a plain entry stays cached, and seconds an
+                unused listener entry stays cached
+            max_entries (int): Maximum number of cached queries
+            sweep_interval (float, optional): Seconds between background
+                sweeps of expired entries (default: ttl)
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval or ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweeper = None
+        self._stop_sweeper = threading.Event()
+
+    def get(self, key):
+        """
+        Get a cached entry
+
+        Args:
+            key: Query key
+
+        Returns:
+            CacheEntry: Entry, or None if missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            expired = self._pop_expired(now)
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at is not None and entry.expires_at < now:
+                expired.append(self._entries.pop(key))
+                entry = None
+            if entry is not None:
+                if entry.watch is not None:
+                    # Listener entries are current; keep them while in use
+                    entry.expires_at = now + self.ttl
+                self._entries.move_to_end(key)
+
+        for old in expired:
+            old.close()
+        return entry
+
+    def put(self, key, entry):
+        """
+        Cache an entry, evicting the least recently used ones if full
+
+        Args:
+            key: Query key
+            entry (CacheEntry): Entry to cache
+        """
+        with self._lock:
+            evicted = self._pop_expired(time.time())
+            old = self._entries.pop(key, None)
+            if old is not None:
+                evicted.append(old)
+            entry.expires_at = time.time() + self.ttl
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[1])
+            if self._sweeper is None:
+                self._start_sweeper()
+
+        for old in evicted:
+            old.close()
+
+    def sweep(self):
+        """
+        Drop expired entries and stop their listeners
+
+        Returns:
+            int: Number of entries dropped
+        """
+        with self._lock:
+            expired = self._pop_expired(time.time(), scan=True)
+        for entry in expired:
+            entry.close()
+        return len(expired)
+
+    def invalidate(self, key):
+        """
+        Drop one entry
+
+        Args:
+            key: Query key
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.close()
+
+    def invalidate_collection(self, collection):
+        """
+        Drop every entry that reads from a collection
+
+        Entries backed by a listener are dropped too: the listener applies
+        the change only when its snapshot arrives, and a read right after
+        this process's own write must not see the state before it.
+
+        Args:
+            collection (str): Collection name
+        """
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry.collection == collection]
+            entries = [self._entries.pop(key) for key in keys]
+        for entry in entries:
+            entry.close()
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            entry.close()
+
+    def close(self):
+        """Stop the background sweeper and drop every entry"""
+        self._stop_sweeper.set()
+        with self._lock:
+            sweeper, self._sweeper = self._sweeper, None
+        if sweeper is not None and sweeper is not threading.current_thread():
+            sweeper.join(timeout=1.0)
+        self.clear()
+
+    def _pop_expired(self, now, scan=False):
+        """
+        Remove expired entries (caller holds the lock)
+
+        Entries are in least recently used order, so by default only the
+        expired entries at the front are removed; plain entries expire
+        regardless of use and may be anywhere, so the sweeper scans them all.
+
+        Args:
+            now (float): Current time
+            scan (bool): Check every entry instead of stopping at the first live one
+
+        Returns:
+            list: Removed entries, to be closed outside the lock
+        """
+        if scan:
+            keys = [key for key, entry in self._entries.items()
+                    if entry.expires_at is not None and entry.expires_at < now]
+            return [self._entries.pop(key) for key in keys]
+
+        expired = []
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if entry.expires_at is None or entry.expires_at >= now:
+                break
+            expired.append(self._entries.popitem(last=False)[1])
+        return expired
+
+    def _start_sweeper(self):
+        """Start the background sweeper thread (caller holds the lock)"""
+        def sweep():
+            while not self._stop_sweeper.wait(self.sweep_interval):
+                self.sweep()
+
+        self._stop_sweeper.clear()
+        self._sweeper = threading.Thread(target=sweep, name="query-cache-sweeper")
+        self._sweeper.daemon = True
+        self._sweeper.start()
+
+    def stats(self):
+        """
+        Get cache usage
+
+        Returns:
+            dict: Entry counts
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "live_entries": sum(1 for entry in self._entries.values() if entry.watch is not None),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl
+            }
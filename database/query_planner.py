@@ -0,0 +1,248 @@
+import os
+import json
+import base64
+import datetime
+import threading
+
+# Filter operators that make a field a range/inequality field in an index
+RANGE_OPERATORS = {'<', '<=', '>', '>=', '!=', 'not-in'}
+ARRAY_OPERATORS = {'array-contains', 'array-contains-any'}
+
+DOCUMENT_ID = '__name__'
+
+
+def normalize_order_by(order_by, direction='ASCENDING'):
+    """
+    Normalize the order_by forms used across the app
+
+    Args:
+        order_by: Field name, (field, direction) tuple, or a list of either
+        direction (str): Direction for bare field names
+
+    Returns:
+        list: (field, 'ASCENDING' | 'DESCENDING') pairs
+    """
+    if not order_by:
+        return []
+    if isinstance(order_by, (str, tuple)):
+        order_by = [order_by]
+
+    orders = []
+    for item in order_by:
+        field, field_direction = item if isinstance(item, tuple) else (item, direction)
+        orders.append((field, 'DESCENDING' if field_direction.upper() == 'DESCENDING' else 'ASCENDING'))
+    return orders
+
+
+def _field_value(data, field):
+    """Get a possibly nested (dotted) field from a document dict"""
+    for part in field.split('.'):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+
+def _encode_value(value):
+    """Make a cursor value JSON-safe"""
+    if isinstance(value, datetime.datetime):
+        return {'$datetime': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    """Reverse _encode_value"""
+    if isinstance(value, dict) and '$datetime' in value:
+        return datetime.datetime.fromisoformat(value['$datetime'])
+    return value
+
+
+def encode_cursor(doc, orders):
+    """
+    Build an opaque cursor pointing just after a document
+
+    Args:
+        doc (dict): Last document of a page (with 'id')
+        orders (list): (field, direction) pairs the page was ordered by
+
+    Returns:
+        str: URL-safe cursor
+    """
+    values = [_encode_value(_field_value(doc, field)) for field, _ in orders if field != DOCUMENT_ID]
+    payload = json.dumps({'v': values, 'id': doc['id']}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor built by encode_cursor
+
+    Args:
+        cursor (str): Cursor
+
+    Returns:
+        tuple: (order field values, document ID)
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return [_decode_value(value) for value in payload['v']], payload['id']
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid query cursor")
+
+
+class QueryPlanner:
+    """
+    Builds Firestore queries with projection and cursor paging, and records
+    the shape of every query it builds so the composite indexes they need
+    can be written out as a firestore.indexes.json manifest.
+    """
+
+    def __init__(self):
+        self._shapes = set()
+        self._lock = threading.Lock()
+
+    def build(self, collection_ref, collection_name, filters=None, order_by=None, select=None,
+              start_after=None, limit=None, paginate=False):
+        """
+        Build a query
+
+        Args:
+            collection_ref: Firestore collection reference
+            collection_name (str): Collection name (for the index manifest)
+            filters (list, optional): (field, op, value) tuples
+            order_by (list, optional): (field, direction) pairs from normalize_order_by
+            select (list, optional): Fields to return; order fields are added
+                so cursors can be built from projected documents
+            start_after (str, optional): Cursor from a previous page
+            limit (int, optional): Maximum number of documents
+            paginate (bool): Add a document ID tie-breaker so the results
+                can be continued with a cursor
+
+        Returns:
+            tuple: (Firestore query, (field, direction) pairs applied)
+        """
+        filters = filters or []
+        orders = list(order_by or [])
+        self.record(collection_name, filters, orders)
+
+        query = collection_ref
+        for field, op, value in filters:
+            query = query.where(field, op, value)
+
+        # Paging needs a total order: break ties on the document ID
+        if paginate or start_after:
+            if not orders or orders[-1][0] != DOCUMENT_ID:
+                last_direction = orders[-1][1] if orders else 'ASCENDING'
+                orders.append((DOCUMENT_ID, last_direction))
+
+        # Directions are Firestore's Query.ASCENDING / Query.DESCENDING values
+        for field, direction in orders:
+            query = query.order_by(field, direction=direction)
+
+        if select:
+            fields = list(dict.fromkeys(list(select) + [f for f, _ in orders if f != DOCUMENT_ID]))
+            query = query.select(fields)
+
+        if start_after:
+            values, doc_id = decode_cursor(start_after)
+            values = iter(values)
+            cursor = {}
+            for field, _ in orders:
+                cursor[field] = collection_ref.document(doc_id) if field == DOCUMENT_ID else next(values, None)
+            query = query.start_after(cursor)
+
+        if limit:
+            query = query.limit(limit)
+
+        return query, orders
+
+    def record(self, collection_name, filters, orders):
+        """
+        Record the shape of a query for the index manifest
+
+        Args:
+            collection_name (str): Collection name
+            filters (list): (field, op, value) tuples
+            orders (list): (field, direction) pairs
+        """
+        fields = []
+        seen = set()
+
+        # Equality and array filters come first, then the range field,
+        # then the sort order, which is how Firestore matches indexes
+        for field, op, _ in filters:
+            if op in ARRAY_OPERATORS and field not in seen:
+                fields.append((field, 'CONTAINS'))
+                seen.add(field)
+            elif op not in RANGE_OPERATORS and field not in seen:
+                fields.append((field, 'ASCENDING'))
+                seen.add(field)
+
+        range_fields = [field for field, op, _ in filters if op in RANGE_OPERATORS]
+        if range_fields and (not orders or orders[0][0] != range_fields[0]):
+            if range_fields[0] not in seen:
+                fields.append((range_fields[0], 'ASCENDING'))
+                seen.add(range_fields[0])
+
+        for field, direction in orders:
+            if field != DOCUMENT_ID and field not in seen:
+                fields.append((field, direction))
+                seen.add(field)
+
+        # Single-field queries are served by Firestore's automatic indexes
+        if len(fields) > 1:
+            with self._lock:
+                self._shapes.add((collection_name, tuple(fields)))
+
+    def index_manifest(self):
+        """
+        Get the composite indexes needed by the recorded queries
+
+        Returns:
+            dict: Manifest in firestore.indexes.json format
+        """
+        with self._lock:
+            shapes = sorted(self._shapes)
+
+        indexes = []
+        for collection_name, fields in shapes:
+            indexes.append({
+                'collectionGroup': collection_name,
+                'queryScope': 'COLLECTION',
+                'fields': [
+                    {'fieldPath': field, 'arrayConfig': 'CONTAINS'} if mode == 'CONTAINS'
+                    else {'fieldPath': field, 'order': mode}
+                    for field, mode in fields
+                ]
+            })
+        return {'indexes': indexes, 'fieldOverrides': []}
+
+    def write_index_manifest(self, path='firestore.indexes.json'):
+        """
+        Merge the recorded indexes into a firestore.indexes.json file
+
+        Args:
+            path (str): Manifest path (deploy with `firebase deploy --only firestore:indexes`)
+
+        Returns:
+            dict: Merged manifest
+        """
+        manifest = {'indexes': [], 'fieldOverrides': []}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                manifest = json.load(f)
+
+        existing = {json.dumps(index, sort_keys=True) for index in manifest.get('indexes', [])}
+        for index in self.index_manifest()['indexes']:
+            if json.dumps(index, sort_keys=True) not in existing:
+                manifest.setdefault('indexes', []).append(index)
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, path)
+        return manifest
+
+
+# Shared planner, so every query in the process feeds one manifest
+query_planner = QueryPlanner()
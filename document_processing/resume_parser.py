@@ -1,25 +1,23 @@
-import os
 import re
 import logging
 from pathlib import Path
 import docx2txt
 import PyPDF2
-import spacy
 from collections import defaultdict
+from app.services.model_registry import model_registry
 
 class ResumeParser:
     """
     Parser for extracting structured information from resumes
+    
+    Holds a reference to the shared spaCy model until close() is called;
+    use it as a context manager so the model can be evicted when idle.
     """
     
     def __init__(self):
         """Initialize the resume parser"""
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except:
-            logging.warning("Spacy model not found. Downloading...")
-            os.system("python -m spacy download en_core_web_sm")
-            self.nlp = spacy.load("en_core_web_sm")
+        # Shared across parsers; loaded (and downloaded if needed) once per process
+        self.nlp = model_registry.acquire("spacy", "en_core_web_sm")
         
         # Define sections to extract
         self.sections = [
@@ -48,6 +46,18 @@ class ResumeParser:
         # LinkedIn pattern
         self.linkedin_pattern = re.compile(r"linkedin\.com/in/[\w-]+")
     
+    def close(self):
+        """Release the spaCy model reference"""
+        if self.nlp is not None:
+            self.nlp = None
+            model_registry.release("spacy", "en_core_web_sm")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
     def extract_text_from_pdf(self, file_path):
         """Extract text from PDF file"""
         text = ""
@@ -0,0 +1,339 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import datetime
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.database.models import InterviewSession, get_client, set_client
+from app.database.document_store import create_client
+from app.interview.session_log import SessionLog
+from app.interview.session_recorder import InterviewSessionRecorder
+from app.utils.stats import percentile
+
+QUESTION_TYPES = ["technical", "technical", "behavioral", "situational"]
+
+
+def load_log_streams(log_dir):
+    """
+    Load the event streams recorded in session logs
+
+    Args:
+        log_dir (str): Directory holding one SessionLog per session
+            (see LocalSessionRecorder)
+
+    Returns:
+        list: One list of log records per session
+    """
+    streams = []
+    for name in sorted(os.listdir(log_dir)):
+        path = os.path.join(log_dir, name)
+        if not os.path.isdir(path):
+            continue
+        log = SessionLog(path)
+        try:
+            records = list(log.read_from(0))
+        finally:
+            log.close()
+        if records:
+            streams.append(records)
+    return streams
+
+
+def synthetic_stream(session_id, user_id=None, questions=10, seed=None):
+    """
+    Generate an interview event stream in the session log record format
+
+    Args:
+        session_id (str): Session ID
+        user_id (str, optional): User ID (default: derived from session_id)
+        questions (int): Number of questions, each answered and scored
+        seed (int, optional): Random seed
+
+    Returns:
+        list: Log records
+    """
+    rng = random.Random(seed)
+    clock = datetime.datetime(2024, 1, 1, 9, 0, 0)
+
+    def record(kind, path, data, merge=False):
+        return {"session_id": session_id, "kind": kind, "path": path, "data": data, "merge": merge}
+
+    records = [record("session", [], {
+        "user_id": user_id or f"user-{session_id}",
+        "job_id": f"job-{rng.randint(1, 50)}",
+        "job_title": "Software Engineer",
+        "start_time": clock,
+        "status": "active",
+        "resume_path": None,
+        "jd_path": None
+    })]
+
+    for idx in range(questions):
+        clock += datetime.timedelta(seconds=rng.uniform(2, 8))
+        question_type = rng.choice(QUESTION_TYPES)
+        records.append(record("questions", ["questions", str(idx)], {
+            "text": f"Question {idx + 1}: " + "describe your approach " * rng.randint(3, 12),
+            "type": question_type,
+            "difficulty": rng.randint(1, 5),
+            "timestamp": clock
+        }))
+
+        response_time = rng.uniform(10, 120)
+        clock += datetime.timedelta(seconds=response_time)
+        records.append(record("answers", ["answers", str(idx)], {
+            "question_idx": idx,
+            "text": "In my last project I " + "worked on the data pipeline and " * rng.randint(5, 40),
+            "response_time": response_time,
+            "timestamp": clock
+        }))
+
+        clock += datetime.timedelta(seconds=rng.uniform(1, 4))
+        records.append(record("feedback", ["feedback", str(idx)], {
+            "question_idx": idx,
+            "answer_idx": idx,
+            "text": "Clear structure; could go deeper on trade-offs.",
+            "score": round(rng.uniform(3, 10), 1),
+            "timestamp": clock
+        }))
+
+    clock += datetime.timedelta(seconds=5)
+    records.append(record("session", [], {"end_time": clock, "status": "completed"}, merge=True))
+    return records
+
+
+def _event_time(data):
+    """Time an event happened, for paced replay"""
+    for field in ("timestamp", "start_time", "end_time"):
+        value = data.get(field)
+        if isinstance(value, datetime.datetime):
+            return value.replace(tzinfo=None)
+    return None
+
+
+def replay_stream(records, session_id=None, speed=0.0, flush_size=20, flush_interval=2.0):
+    """
+    Replay one recorded session through InterviewSessionRecorder
+
+    Args:
+        records (list): Log records of the session, in order
+        session_id (str, optional): Session ID to record under (default: the recorded one)
+        speed (float): Replay speed relative to the recording (0 = as fast as possible)
+        flush_size (int): Recorder flush_size
+        flush_interval (float): Recorder flush_interval
+
+    Returns:
+        dict: Session ID, event count, elapsed seconds and per-operation latencies
+    """
+    session_id = session_id or records[0]["session_id"]
+    latencies = defaultdict(list)
+    recorder = None
+    events = 0
+    first_time = None
+    started = time.perf_counter()
+
+    def timed(operation, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        latencies[operation].append(time.perf_counter() - start)
+        return result
+
+    for record in records:
+        data = record["data"]
+
+        # Keep the recorded gaps between events, scaled by speed
+        event_time = _event_time(data)
+        if speed and event_time is not None:
+            if first_time is None:
+                first_time = event_time
+            delay = (event_time - first_time).total_seconds() / speed - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+        kind = record["kind"]
+        if kind == "session" and not record.get("merge"):
+            recorder = InterviewSessionRecorder(data.get("user_id"), data.get("job_id"),
+                                                flush_size=flush_size, flush_interval=flush_interval,
+                                                session_id=session_id)
+            timed("start_session", recorder.start_session, data.get("job_title"),
+                  data.get("resume_path"), data.get("jd_path"))
+        elif recorder is None:
+            continue
+        elif kind == "questions":
+            timed("record_question", recorder.record_question, data.get("text"),
+                  data.get("type", "technical"), data.get("difficulty", 1))
+        elif kind == "answers":
+            timed("record_answer", recorder.record_answer, data.get("question_idx"),
+                  data.get("text"), data.get("response_time"), data.get("audio_start"))
+        elif kind == "feedback":
+            timed("record_feedback", recorder.record_feedback, data.get("question_idx"),
+                  data.get("answer_idx"), data.get("text"), data.get("score"))
+        elif data.get("status") == "completed" and recorder.end_time is None:
+            timed("end_session", recorder.end_session)
+        else:
+            # Metadata and recording path merges have no recorder call
+            continue
+        events += 1
+
+    if recorder is not None and recorder.end_time is None:
+        timed("end_session", recorder.end_session)
+
+    return {
+        "session_id": session_id,
+        "events": events,
+        "seconds": time.perf_counter() - started,
+        "latencies": dict(latencies),
+        "questions": len(recorder.questions) if recorder else 0,
+        "answers": len(recorder.answers) if recorder else 0,
+        "feedback": len(recorder.feedback) if recorder else 0
+    }
+
+
+def verify_session(result):
+    """
+    Check that a replayed session was stored completely
+
+    Args:
+        result (dict): Result of replay_stream
+
+    Returns:
+        bool: True if the stored session has every record and is completed
+    """
+    session = InterviewSession.load_session(result["session_id"])
+    if session is None:
+        return False
+    return (session.get("status") == "completed" and
+            len(session["questions"]) == result["questions"] and
+            len(session["answers"]) == result["answers"] and
+            len(session["feedback"]) == result["feedback"])
+
+
+def run_load_test(streams, concurrency=8, repeat=1, speed=0.0, flush_size=20, flush_interval=2.0,
+                  verify=True, progress=False):
+    """
+    Replay event streams concurrently against the configured document store
+
+    Every stream is replayed repeat times, each under its own session ID,
+    with up to concurrency sessions in flight.
+
+    Args:
+        streams (list): Event streams (lists of log records)
+        concurrency (int): Sessions replayed at the same time
+        repeat (int): Replays of each stream
+        speed (float): Replay speed relative to the recording (0 = as fast as possible)
+        flush_size (int): Recorder flush_size
+        flush_interval (float): Recorder flush_interval
+        verify (bool): Read every session back and check it is complete
+        progress (bool): Print a line per finished session
+
+    Returns:
+        dict: Throughput, per-operation latency percentiles, failures and
+            store statistics (when the store keeps them)
+    """
+    jobs = [(stream, f"{stream[0]['session_id']}-r{run}")
+            for run in range(repeat) for stream in streams]
+    results = []
+    failures = []
+    verified = 0
+    started = time.perf_counter()
+
+    def replay(stream, session_id):
+        result = replay_stream(stream, session_id=session_id, speed=speed,
+                               flush_size=flush_size, flush_interval=flush_interval)
+        result["verified"] = verify_session(result) if verify else None
+        return result
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load-test") as executor:
+        futures = {executor.submit(replay, stream, session_id): session_id for stream, session_id in jobs}
+        for future in as_completed(futures):
+            session_id = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failures.append({"session_id": session_id, "error": str(e)})
+                print(f"Error replaying session {session_id}: {e}")
+                continue
+            results.append(result)
+            verified += 1 if result["verified"] else 0
+            if progress:
+                print(f"[{len(results) + len(failures)}/{len(jobs)}] {session_id}: "
+                      f"{result['events']} events in {result['seconds']:.2f}s")
+
+    elapsed = time.perf_counter() - started
+    by_operation = defaultdict(list)
+    for result in results:
+        for operation, values in result["latencies"].items():
+            by_operation[operation].extend(values)
+
+    operations = {}
+    for operation, values in sorted(by_operation.items()):
+        values.sort()
+        operations[operation] = {
+            "count": len(values),
+            "mean": sum(values) / len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": values[-1]
+        }
+
+    events = sum(result["events"] for result in results)
+    store = get_client()
+    return {
+        "sessions": len(results),
+        "failed": len(failures),
+        "verified": verified if verify else None,
+        "events": events,
+        "seconds": elapsed,
+        "events_per_second": events / elapsed if elapsed else 0.0,
+        "sessions_per_second": len(results) / elapsed if elapsed else 0.0,
+        "operations": operations,
+        "store": store.stats() if hasattr(store, "stats") else None,
+        "failures": failures
+    }
+
+
+def main(argv=None):
+    """Command line entry point for the persistence load test"""
+    parser = argparse.ArgumentParser(description="Replay interview event streams against a document store")
+    parser.add_argument("--store", default="memory",
+                        help="Document store: memory, sqlite:///path.db or firestore (default: memory)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Simulated seconds per store round trip (memory and sqlite only)")
+    parser.add_argument("--log-dir", help="Replay the sessions recorded in this session log directory")
+    parser.add_argument("--sessions", type=int, default=20, help="Synthetic sessions when no --log-dir")
+    parser.add_argument("--questions", type=int, default=10, help="Questions per synthetic session")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=1, help="Replays of each stream")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Replay speed relative to the recording (0 = as fast as possible)")
+    parser.add_argument("--flush-size", type=int, default=20)
+    parser.add_argument("--flush-interval", type=float, default=2.0)
+    parser.add_argument("--no-verify", action="store_true", help="Skip reading sessions back")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    store = create_client(args.store)
+    if args.latency and hasattr(store, "latency"):
+        store.latency = args.latency
+    set_client(store)
+
+    if args.log_dir:
+        streams = load_log_streams(args.log_dir)
+    else:
+        rng = random.Random(args.seed)
+        streams = [synthetic_stream(f"load-{i}", questions=args.questions, seed=rng.random())
+                   for i in range(args.sessions)]
+
+    summary = run_load_test(streams, concurrency=args.concurrency, repeat=args.repeat, speed=args.speed,
+                            flush_size=args.flush_size, flush_interval=args.flush_interval,
+                            verify=not args.no_verify, progress=True)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] or (summary["verified"] is not None and
+                                      summary["verified"] < summary["sessions"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
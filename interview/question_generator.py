@@ -457,10 +457,10 @@ def generate_situational_questions(self, resume_data: Dict[str, Any], jd_data: D
             Dictionary with match analysis and generated questions
         """
         # Parse resume and job description
-        resume_parser = ResumeParser()
         jd_parser = JobDescriptionParser()
         
-        resume_data = resume_parser.parse(resume_file_path)
+        with ResumeParser() as resume_parser:
+            resume_data = resume_parser.parse(resume_file_path)
         jd_data = jd_parser.parse(jd_file_path)
         
         # Generate questions
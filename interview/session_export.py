@@ -0,0 +1,470 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import datetime
+import textwrap
+import functools
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+EXPORT_FORMATS = {"jsonl": ".jsonl", "txt": ".txt", "pdf": ".pdf"}
+
+# PDF page layout (US Letter, points)
+PDF_PAGE_WIDTH = 612
+PDF_PAGE_HEIGHT = 792
+PDF_MARGIN = 50
+PDF_FONT_SIZE = 10
+PDF_LEADING = 14
+PDF_WRAP_WIDTH = 95
+
+
+def _format_time(value, fmt):
+    """Format a datetime or ISO string, passing other values through"""
+    if isinstance(value, str):
+        try:
+            value = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, datetime.datetime):
+        return value.strftime(fmt)
+    return str(value) if value is not None else ""
+
+
+def _sorted_by_index(items):
+    """Order subcollection documents by their numeric ID, when they have one"""
+    if all(item is not None and str(item.get("id", "")).isdigit() for item in items):
+        return sorted(items, key=lambda item: int(item["id"]))
+    return list(items)
+
+
+def iter_transcript(questions, answers, feedback):
+    """
+    Pair questions with their first answer and that answer's first feedback
+
+    Args:
+        questions (list): Question records in order
+        answers (list): Answer records in order
+        feedback (list): Feedback records in order
+
+    Yields:
+        dict: Transcript items with type, text and timestamp
+    """
+    answer_for_question = {}
+    for idx, answer in enumerate(answers):
+        if answer is not None:
+            answer_for_question.setdefault(answer.get("question_idx"), idx)
+    feedback_for_answer = {}
+    for idx, item in enumerate(feedback):
+        if item is not None:
+            feedback_for_answer.setdefault(item.get("answer_idx"), idx)
+
+    for i, question in enumerate(questions):
+        if question is None:
+            continue
+        yield {"type": "question", "text": question["text"], "timestamp": question["timestamp"]}
+
+        answer_idx = answer_for_question.get(i)
+        if answer_idx is None:
+            continue
+        answer = answers[answer_idx]
+        yield {"type": "answer", "text": answer["text"], "timestamp": answer["timestamp"]}
+
+        feedback_idx = feedback_for_answer.get(answer_idx)
+        if feedback_idx is not None:
+            item = feedback[feedback_idx]
+            yield {"type": "feedback", "text": item["text"], "timestamp": item["timestamp"]}
+
+
+class _HashingWriter:
+    """Binary stream wrapper that counts and hashes what is written"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes_written = 0
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.stream.write(data)
+        self.bytes_written += len(data)
+        self.sha256.update(data)
+
+    def tell(self):
+        return self.bytes_written
+
+
+class _PdfWriter:
+    """
+    Minimal streaming PDF writer for plain text.
+
+    Each page is written as soon as it is full, so only the current page and
+    the object offsets are kept in memory. Text uses the built-in Helvetica
+    font; characters outside Latin-1 are replaced.
+    """
+
+    def __init__(self, out):
+        self.out = out
+        self.offsets = {}
+        self.page_ids = []
+        self.lines = []
+        self.lines_per_page = (PDF_PAGE_HEIGHT - 2 * PDF_MARGIN) // PDF_LEADING
+        # Object 1 is the catalog, 2 the page tree, 3 the font
+        self.next_id = 4
+        self.out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._write_object(3, b"<< /Type /Font /Subtype /Type1 /Name /F1 "
+                              b"/BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    def add_text(self, text=""):
+        """Add a paragraph, wrapping long lines"""
+        for paragraph in str(text).split("\n"):
+            for line in textwrap.wrap(paragraph, PDF_WRAP_WIDTH) or [""]:
+                self.lines.append(line)
+                if len(self.lines) >= self.lines_per_page:
+                    self._write_page()
+
+    def close(self):
+        """Write the last page, the page tree and the cross-reference table"""
+        if self.lines or not self.page_ids:
+            self._write_page()
+
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode())
+        self._write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_offset = self.out.tell()
+        size = self.next_id
+        self.out.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+        for obj_id in range(1, size):
+            self.out.write(f"{self.offsets[obj_id]:010d} 00000 n \n".encode())
+        self.out.write(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+
+    def _write_page(self):
+        """Write the buffered lines as one page"""
+        commands = [f"BT /F1 {PDF_FONT_SIZE} Tf {PDF_LEADING} TL "
+                    f"{PDF_MARGIN} {PDF_PAGE_HEIGHT - PDF_MARGIN} Td"]
+        for line in self.lines:
+            commands.append(f"({self._escape(line)}) '")
+        commands.append("ET")
+        content = "\n".join(commands).encode("latin-1", errors="replace")
+        self.lines = []
+
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._write_object(content_id, b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        self._write_object(page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PDF_PAGE_WIDTH} {PDF_PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode())
+        self.page_ids.append(page_id)
+
+    def _write_object(self, obj_id, body):
+        """Write an indirect object and remember its offset"""
+        self.offsets[obj_id] = self.out.tell()
+        self.out.write(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+
+    @staticmethod
+    def _escape(text):
+        """Escape a string for a PDF text literal"""
+        text = text.encode("latin-1", errors="replace").decode("latin-1")
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+class SessionExporter:
+    """
+    Streams an interview session to JSON Lines, TXT or PDF.
+
+    Sections (session header, questions, answers, feedback, transcript,
+    metrics) are written one record at a time, so memory stays bounded by
+    the session itself rather than by extra copies of the export.
+    """
+
+    def __init__(self, format="jsonl"):
+        """
+        Initialize the exporter
+
+        Args:
+            format (str): Export format (jsonl, txt, pdf)
+        """
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {format}")
+        self.format = format
+
+    def export(self, session, output):
+        """
+        Export a session
+
+        Args:
+            session (dict): Session data with questions, answers, feedback
+                and metrics (as built by InterviewSessionRecorder or loaded
+                by InterviewSession.load_session)
+            output: File path or writable binary stream
+
+        Returns:
+            dict: Output path (None for streams), bytes written and SHA-256
+        """
+        if hasattr(output, "write"):
+            writer = _HashingWriter(output)
+            self._write(session, writer)
+            return {"path": None, "bytes": writer.bytes_written, "sha256": writer.sha256.hexdigest()}
+
+        # Write to a temporary file so a failed export never leaves a partial file
+        out_dir = os.path.dirname(output)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        temp_path = f"{output}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                writer = _HashingWriter(f)
+                self._write(session, writer)
+            os.replace(temp_path, output)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return {"path": output, "bytes": writer.bytes_written, "sha256": writer.sha256.hexdigest()}
+
+    def _write(self, session, out):
+        """Write a session in the configured format"""
+        if self.format == "jsonl":
+            self._write_jsonl(session, out)
+        elif self.format == "txt":
+            for line in self._iter_text_lines(session):
+                out.write((line + "\n").encode("utf-8"))
+        else:
+            pdf = _PdfWriter(out)
+            for line in self._iter_text_lines(session):
+                pdf.add_text(line)
+            pdf.close()
+
+    def _write_jsonl(self, session, out):
+        """Write one JSON record per line, section by section"""
+        def write(record):
+            out.write((json.dumps(record, default=str) + "\n").encode("utf-8"))
+
+        write({
+            "record": "session",
+            **{key: value for key, value in session.items()
+               if key not in ("questions", "answers", "feedback", "metrics", "transcript")}
+        })
+        for section, record_type in (("questions", "question"), ("answers", "answer"),
+                                     ("feedback", "feedback")):
+            for idx, item in enumerate(session.get(section) or []):
+                if item is not None:
+                    write({"record": record_type, "index": idx, **item})
+        for item in self._iter_transcript(session):
+            write({"record": "transcript", **item})
+        write({"record": "metrics", **(session.get("metrics") or {})})
+
+    def _iter_text_lines(self, session):
+        """Yield the text export line by line"""
+        start_time = session.get("start_time")
+        end_time = session.get("end_time")
+
+        yield f"Interview Session: {session.get('session_id') or session.get('id')}"
+        yield f"Date: {_format_time(start_time, '%Y-%m-%d')}"
+        duration = session.get("duration")
+        if duration is None and isinstance(start_time, datetime.datetime) \
+                and isinstance(end_time, datetime.datetime):
+            duration = (end_time - start_time).total_seconds()
+        if duration is not None:
+            yield f"Duration: {duration / 60:.2f} minutes"
+        yield ""
+
+        for item in self._iter_transcript(session):
+            timestamp = _format_time(item["timestamp"], "%H:%M:%S")
+            yield f"[{timestamp}] {item['type'].capitalize()}: {item['text']}"
+            yield ""
+
+        yield ""
+        yield "Metrics:"
+        for metric, value in (session.get("metrics") or {}).items():
+            yield f"{metric.replace('_', ' ').title()}: {value}"
+
+    @staticmethod
+    def _iter_transcript(session):
+        """Transcript items of a session"""
+        return iter_transcript(
+            _sorted_by_index(session.get("questions") or []),
+            _sorted_by_index(session.get("answers") or []),
+            _sorted_by_index(session.get("feedback") or [])
+        )
+
+
+def load_firestore_session(session_id):
+    """
+    Load a session and its subcollections from Firestore
+
+    Args:
+        session_id (str): Session ID
+
+    Returns:
+        dict: Session data, or None if it does not exist
+    """
+    from app.database.models import InterviewSession
+    session = InterviewSession.load_session(session_id)
+    if session is not None:
+        session.setdefault("session_id", session_id)
+    return session
+
+
+def load_log_session(session_id, log_dir="app_data/session_logs"):
+    """
+    Load a session from its local session log
+
+    Only use this for sessions that are not being recorded right now.
+
+    Args:
+        session_id (str): Session ID
+        log_dir (str): Directory holding one log per session
+
+    Returns:
+        dict: Session data, or None if there is no log for the session
+    """
+    from app.interview.session_log import SessionLog
+
+    path = os.path.join(log_dir, session_id)
+    if not os.path.isdir(path):
+        return None
+
+    session = {"session_id": session_id, "questions": [], "answers": [], "feedback": []}
+    log = SessionLog(path)
+    try:
+        for record in log.read_from(0):
+            if record["kind"] == "session":
+                session.update(record["data"])
+            else:
+                items = session[record["kind"]]
+                idx = int(record["path"][1])
+                items.extend([None] * (idx + 1 - len(items)))
+                items[idx] = record["data"]
+    finally:
+        log.close()
+    return session
+
+
+def _init_firebase_worker():
+    """Initialize Firebase in an export worker process"""
+    from app.database.firebase_client import initialize_firebase
+    initialize_firebase()
+
+
+def _export_one(session_id, output_path, format, loader):
+    """Load and export one session in a worker process"""
+    session = loader(session_id)
+    if session is None:
+        raise ValueError(f"Session not found: {session_id}")
+    return SessionExporter(format).export(session, output_path)
+
+
+def export_sessions(session_ids, output_dir, format="jsonl", loader=load_firestore_session,
+                    max_workers=None, initializer=_init_firebase_worker, progress=False):
+    """
+    Export many sessions to one file each, in parallel worker processes
+
+    A manifest (manifest.jsonl in output_dir) records the path, size and
+    SHA-256 of every exported file; sessions already in it are skipped, so
+    an interrupted export can be resumed by running it again.
+
+    Args:
+        session_ids (list): Session IDs to export
+        output_dir (str): Directory for the exported files
+        format (str): Export format (jsonl, txt, pdf)
+        loader (callable): Picklable function loading a session by ID
+        max_workers (int, optional): Number of worker processes
+        initializer (callable, optional): Run once in each worker process
+        progress (bool): Whether to print progress
+
+    Returns:
+        dict: Summary of the export run
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {format}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, "manifest.jsonl")
+    done = set()
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["session_id"])
+                except (ValueError, KeyError):
+                    continue
+
+    session_ids = list(dict.fromkeys(session_ids))
+    pending = iter([session_id for session_id in session_ids if session_id not in done])
+    max_workers = max_workers or os.cpu_count() or 1
+
+    summary = {"total": len(session_ids), "skipped": len(done.intersection(session_ids)),
+               "completed": 0, "failed": 0, "bytes": 0, "errors": {}}
+    start_time = time.time()
+
+    # Only this process writes the manifest, so it stays consistent
+    with open(manifest_path, "a") as manifest, \
+            ProcessPoolExecutor(max_workers=max_workers, initializer=initializer) as executor:
+        in_flight = {}
+
+        def submit_next():
+            session_id = next(pending, None)
+            if session_id is not None:
+                output_path = os.path.join(output_dir, f"{session_id}{EXPORT_FORMATS[format]}")
+                future = executor.submit(_export_one, session_id, output_path, format, loader)
+                in_flight[future] = session_id
+
+        # Keep a bounded number of sessions in flight
+        for _ in range(max_workers * 2):
+            submit_next()
+
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                session_id = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    summary["failed"] += 1
+                    summary["errors"][session_id] = str(e)
+                    print(f"Session export error for {session_id}: {e}", file=sys.stderr)
+                else:
+                    manifest.write(json.dumps({"session_id": session_id, "format": format,
+                                               **result}) + "\n")
+                    manifest.flush()
+                    summary["completed"] += 1
+                    summary["bytes"] += result["bytes"]
+                    if progress:
+                        print(f"[{summary['completed'] + summary['skipped']}/{summary['total']}] {session_id}")
+                submit_next()
+
+    summary["elapsed_seconds"] = time.time() - start_time
+    return summary
+
+
+def main(argv=None):
+    """Command line entry point for bulk session export"""
+    parser = argparse.ArgumentParser(description="Bulk export of interview sessions")
+    parser.add_argument("sessions", help="File with one session ID per line")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory for exported files")
+    parser.add_argument("--format", default="jsonl", choices=sorted(EXPORT_FORMATS))
+    parser.add_argument("--log-dir", help="Export from local session logs instead of Firestore")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    args = parser.parse_args(argv)
+
+    with open(args.sessions, "r") as f:
+        session_ids = [line.strip() for line in f if line.strip()]
+
+    if args.log_dir:
+        loader = functools.partial(load_log_session, log_dir=args.log_dir)
+        initializer = None
+    else:
+        loader = load_firestore_session
+        initializer = _init_firebase_worker
+
+    summary = export_sessions(session_ids, args.output_dir, format=args.format, loader=loader,
+                              max_workers=args.workers, initializer=initializer, progress=True)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
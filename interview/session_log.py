@@ -0,0 +1,659 @@
+import os
+import json
+import time
+import zlib
+import random
+import shutil
+import datetime
+import threading
+from app.database.models import UnitOfWork, get_client
+from app.services.sqlite_pool import SQLitePool
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".wal"
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+def _json_default(value):
+    """Encode datetimes so they round-trip through the log"""
+    if isinstance(value, datetime.datetime):
+        return {"$datetime": value.isoformat()}
+    return str(value)
+
+
+def _json_object_hook(obj):
+    """Decode datetimes written by _json_default"""
+    if len(obj) == 1 and "$datetime" in obj:
+        return datetime.datetime.fromisoformat(obj["$datetime"])
+    return obj
+
+
+def encode_record(record):
+    """
+    Frame a record as one log line: CRC32 of the JSON body, then the body
+
+    Args:
+        record (dict): Log record
+
+    Returns:
+        bytes: Encoded line
+    """
+    body = json.dumps(record, default=_json_default, separators=(",", ":")).encode("utf-8")
+    return b"%08x " % zlib.crc32(body) + body + b"\n"
+
+
+def decode_record(line):
+    """
+    Decode a log line written by encode_record
+
+    Args:
+        line (bytes): Encoded line
+
+    Returns:
+        dict: Log record, or None if the line is torn or corrupt
+    """
+    if not line.endswith(b"\n") or len(line) < 10:
+        return None
+    checksum, body = line[:8], line[9:-1]
+    try:
+        if int(checksum, 16) != zlib.crc32(body):
+            return None
+        return json.loads(body.decode("utf-8"), object_hook=_json_object_hook)
+    except ValueError:
+        return None
+
+
+class SessionLog:
+    """
+    Segmented, append-only write-ahead log of session events on local disk.
+
+    Every append is written and flushed to the OS immediately, so it survives
+    a process crash; fsyncs for power loss are batched on a background thread
+    (every fsync_interval seconds or fsync_batch appends) and sync() forces
+    one. Records carry a monotonically increasing seq; the highest seq pushed
+    to a remote store is kept in a checkpoint file. On open, a torn record at
+    the tail of the last segment (from a crash mid-write) is truncated away.
+    """
+
+    def __init__(self, path, segment_size=4 * 1024 * 1024, fsync_interval=0.05,
+                 fsync_batch=64, compact=False):
+        """
+        Open or create a session log
+
+        Args:
+            path (str): Directory holding the log segments
+            segment_size (int): Bytes after which a new segment is started
+            fsync_interval (float): Maximum seconds between fsyncs
+            fsync_batch (int): Appends that trigger an immediate fsync
+            compact (bool): Delete segments once every record in them is synced
+        """
+        self.path = path
+        self.segment_size = segment_size
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.compact = compact
+        os.makedirs(path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._fsync_cond = threading.Condition(self._lock)
+        self._unsynced_appends = 0
+        self._closed = False
+        self.fsyncs = 0
+        # (seq, segment, byte offset) just past the last record read, so the
+        # next read_from(seq) seeks there instead of scanning the segment
+        self._read_position = None
+
+        self.synced_seq = self._read_checkpoint()
+        self._segments = self._list_segments()
+        last_seq = self._recover_tail()
+        self.next_seq = max(last_seq, self.synced_seq) + 1
+
+        self._file = None
+        if self._segments and os.path.getsize(self._segment_path(self._segments[-1])) < segment_size:
+            self._file = open(self._segment_path(self._segments[-1]), "ab")
+        else:
+            self._start_segment()
+
+        self._fsync_thread = threading.Thread(target=self._fsync_loop, daemon=True)
+        self._fsync_thread.start()
+
+    def append(self, event):
+        """
+        Append an event to the log
+
+        Args:
+            event (dict): Event data (JSON-compatible, datetimes allowed)
+
+        Returns:
+            int: Sequence number of the record
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Session log is closed")
+
+            seq = self.next_seq
+            self.next_seq += 1
+            self._file.write(encode_record({"seq": seq, **event}))
+            self._file.flush()
+
+            self._unsynced_appends += 1
+            if self._file.tell() >= self.segment_size:
+                self._fsync_file(self._file)
+                self._file.close()
+                self._start_segment()
+            elif self._unsynced_appends >= self.fsync_batch:
+                self._fsync_cond.notify()
+
+            return seq
+
+    def sync(self):
+        """Fsync the active segment now"""
+        with self._lock:
+            if not self._closed:
+                self._fsync_file(self._file)
+
+    def read_from(self, after_seq, limit=None):
+        """
+        Read records in order, starting after a sequence number
+
+        Args:
+            after_seq (int): Only return records with a higher seq
+            limit (int, optional): Maximum number of records
+
+        Returns:
+            list: Log records
+        """
+        with self._lock:
+            segments = list(self._segments)
+            active_size = self._file.tell() if self._file and not self._closed else None
+            position = self._read_position
+
+        start_segment, start_offset = None, 0
+        if position and position[0] == after_seq and position[1] in segments:
+            start_segment, start_offset = position[1], position[2]
+
+        records = []
+        last_position = None
+        for i, first_seq in enumerate(segments):
+            if start_segment is not None:
+                if first_seq < start_segment:
+                    continue
+            elif i + 1 < len(segments) and segments[i + 1] <= after_seq + 1:
+                # Skip segments that end before the requested position
+                continue
+
+            offset = start_offset if first_seq == start_segment else 0
+            end = active_size if i == len(segments) - 1 else None
+            for record, record_end in self._read_segment(first_seq, offset, end):
+                if record["seq"] <= after_seq:
+                    continue
+                records.append(record)
+                last_position = (record["seq"], first_seq, record_end)
+                if limit and len(records) >= limit:
+                    break
+            if limit and len(records) >= limit:
+                break
+
+        if last_position:
+            with self._lock:
+                self._read_position = last_position
+        return records
+
+    def mark_synced(self, seq):
+        """
+        Record that every event up to seq has been pushed to the remote store
+
+        Args:
+            seq (int): Highest synced sequence number
+        """
+        with self._lock:
+            if seq <= self.synced_seq:
+                return
+            self.synced_seq = seq
+            self._write_checkpoint(seq)
+
+            if self.compact:
+                # Sealed segments whose successor starts at or before seq + 1
+                # contain only synced records
+                while len(self._segments) > 1 and self._segments[1] <= seq + 1:
+                    os.remove(self._segment_path(self._segments.pop(0)))
+
+    def pending(self):
+        """
+        Get the number of events not yet synced
+
+        Returns:
+            int: Unsynced event count
+        """
+        with self._lock:
+            return self.next_seq - 1 - self.synced_seq
+
+    def close(self):
+        """Fsync and close the log"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._fsync_file(self._file)
+            self._file.close()
+            self._fsync_cond.notify()
+        self._fsync_thread.join()
+
+    def destroy(self):
+        """
+        Close the log and delete it from disk
+
+        Raises:
+            RuntimeError: If events are still waiting to be synced
+        """
+        if self.pending():
+            raise RuntimeError(f"Session log has {self.pending()} unsynced events")
+        self.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def _segment_path(self, first_seq):
+        """Path of the segment whose first record is first_seq"""
+        return os.path.join(self.path, f"{SEGMENT_PREFIX}{first_seq:012d}{SEGMENT_SUFFIX}")
+
+    def _list_segments(self):
+        """First sequence numbers of the segments on disk, in order"""
+        segments = []
+        for name in os.listdir(self.path):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                segments.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+        return sorted(segments)
+
+    def _start_segment(self):
+        """Open a new segment starting at next_seq"""
+        self._segments.append(self.next_seq)
+        self._file = open(self._segment_path(self.next_seq), "ab")
+        self._fsync_dir()
+
+    def _read_segment(self, first_seq, offset=0, end=None):
+        """Yield the valid records of a segment from a byte offset, with the offset past each"""
+        try:
+            with open(self._segment_path(first_seq), "rb") as f:
+                f.seek(offset)
+                data = f.read(end - offset) if end is not None else f.read()
+        except FileNotFoundError:
+            return
+
+        for line in data.splitlines(keepends=True):
+            record = decode_record(line)
+            if record is None:
+                return
+            offset += len(line)
+            yield record, offset
+
+    def _recover_tail(self):
+        """
+        Truncate a torn record from the last segment
+
+        Returns:
+            int: Highest sequence number in the log (0 if empty)
+        """
+        while self._segments:
+            path = self._segment_path(self._segments[-1])
+            with open(path, "rb") as f:
+                data = f.read()
+
+            valid_bytes = 0
+            last_seq = 0
+            for line in data.splitlines(keepends=True):
+                record = decode_record(line)
+                if record is None:
+                    break
+                valid_bytes += len(line)
+                last_seq = record["seq"]
+
+            if valid_bytes < len(data):
+                print(f"Truncating {len(data) - valid_bytes} torn bytes from {path}")
+                with open(path, "r+b") as f:
+                    f.truncate(valid_bytes)
+                    os.fsync(f.fileno())
+
+            if last_seq:
+                return last_seq
+
+            # Empty segment: drop it and look at the previous one
+            os.remove(path)
+            self._segments.pop()
+
+        return 0
+
+    def _read_checkpoint(self):
+        """Read the highest synced sequence number"""
+        try:
+            with open(os.path.join(self.path, CHECKPOINT_FILE), "r") as f:
+                return int(json.load(f).get("synced_seq", 0))
+        except (OSError, ValueError):
+            return 0
+
+    def _write_checkpoint(self, seq):
+        """Atomically write the checkpoint file"""
+        checkpoint_path = os.path.join(self.path, CHECKPOINT_FILE)
+        temp_path = checkpoint_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"synced_seq": seq, "updated_at": time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, checkpoint_path)
+
+    def _fsync_file(self, f):
+        """Fsync an open segment (caller holds the lock)"""
+        os.fsync(f.fileno())
+        self._unsynced_appends = 0
+        self.fsyncs += 1
+
+    def _fsync_dir(self):
+        """Fsync the log directory so new segment files survive a crash"""
+        if hasattr(os, "O_DIRECTORY"):
+            fd = os.open(self.path, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _fsync_loop(self):
+        """Batch fsyncs of the active segment"""
+        while True:
+            with self._lock:
+                self._fsync_cond.wait_for(
+                    lambda: self._closed or self._unsynced_appends >= self.fsync_batch,
+                    timeout=self.fsync_interval
+                )
+                if self._closed:
+                    return
+                if not self._unsynced_appends:
+                    continue
+                # fsync a duplicate descriptor outside the lock so appends
+                # are not blocked while the disk flushes
+                fd = os.dup(self._file.fileno())
+                self._unsynced_appends = 0
+
+            try:
+                os.fsync(fd)
+                self.fsyncs += 1
+            finally:
+                os.close(fd)
+
+
+class SyncTarget:
+    """Remote store that session log records are pushed to"""
+
+    def apply(self, records):
+        """
+        Write a batch of log records
+
+        Implementations must be idempotent: the same records may be applied
+        again after a failure or a crash before the checkpoint was written.
+
+        Args:
+            records (list): Log records in sequence order
+        """
+        raise NotImplementedError
+
+
+class FirestoreSyncTarget(SyncTarget):
+    """Pushes session records to Firestore through batched writes"""
+
+    def __init__(self, db=None, collection="interview_sessions"):
+        """
+        Initialize the target
+
+        Args:
+            db: Firestore client (default: the shared client)
+            collection (str): Session collection name
+        """
+        self._db = db
+        self.collection = collection
+
+    def apply(self, records):
+        db = self._db or get_client()
+        with UnitOfWork(db) as uow:
+            for record in records:
+                doc_ref = db.collection(self.collection).document(record["session_id"])
+                path = record.get("path") or []
+                for i in range(0, len(path), 2):
+                    doc_ref = doc_ref.collection(path[i]).document(path[i + 1])
+                uow.set(doc_ref, record["data"], merge=record.get("merge", False))
+
+
+class SQLiteSyncTarget(SyncTarget):
+    """
+    Mirrors session records into SQLite, one row per document.
+
+    Each row remembers the seq of the last record applied to it, so
+    replayed records are ignored and merges are applied exactly once.
+    """
+
+    def __init__(self, db_path="app_data.db", pool=None):
+        """
+        Initialize the target
+
+        Args:
+            db_path (str): Path to the SQLite database
+            pool (SQLitePool, optional): Existing connection pool to share
+        """
+        self.pool = pool or SQLitePool(db_path)
+        with self.pool.transaction() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_documents (
+                session_id TEXT NOT NULL,
+                path TEXT NOT NULL,
+                data TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                PRIMARY KEY (session_id, path)
+            ) WITHOUT ROWID
+            """)
+
+    def apply(self, records):
+        with self.pool.transaction() as conn:
+            for record in records:
+                path = "/".join(record.get("path") or [])
+                row = conn.execute(
+                    "SELECT data, seq FROM session_documents WHERE session_id = ? AND path = ?",
+                    (record["session_id"], path)
+                ).fetchone()
+                if row and row["seq"] >= record["seq"]:
+                    continue
+
+                data = record["data"]
+                if row and record.get("merge"):
+                    data = {**json.loads(row["data"]), **data}
+                conn.execute(
+                    "INSERT OR REPLACE INTO session_documents (session_id, path, data, seq) "
+                    "VALUES (?, ?, ?, ?)",
+                    (record["session_id"], path, json.dumps(data, default=str), record["seq"])
+                )
+
+    def get_documents(self, session_id):
+        """
+        Get the mirrored documents of a session
+
+        Args:
+            session_id (str): Session ID
+
+        Returns:
+            dict: Document data keyed by path ("" for the session document)
+        """
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT path, data FROM session_documents WHERE session_id = ?", (session_id,)
+            ).fetchall()
+        return {row["path"]: json.loads(row["data"]) for row in rows}
+
+
+class SessionSyncer:
+    """
+    Background thread that pushes a session log to a SyncTarget.
+
+    Records are applied in batches and the log checkpoint only advances after
+    a batch succeeds; failures are retried with exponential backoff and
+    jitter, relying on the target being idempotent.
+    """
+
+    def __init__(self, log, target, batch_size=200, interval=1.0, max_backoff=30.0):
+        """
+        Initialize the syncer
+
+        Args:
+            log (SessionLog): Log to read from
+            target (SyncTarget): Store to push to
+            batch_size (int): Records applied per batch
+            interval (float): Seconds between polls when the log is drained
+            max_backoff (float): Maximum seconds between retries
+        """
+        self.log = log
+        self.target = target
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.synced_records = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start syncing in the background"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """Sync now instead of waiting for the next poll"""
+        self._wake.set()
+
+    def sync_once(self):
+        """
+        Push the next batch of unsynced records
+
+        Returns:
+            int: Number of records pushed
+        """
+        records = self.log.read_from(self.log.synced_seq, limit=self.batch_size)
+        if not records:
+            return 0
+        self.target.apply(records)
+        self.log.mark_synced(records[-1]["seq"])
+        self.synced_records += len(records)
+        return len(records)
+
+    def drain(self):
+        """
+        Push every unsynced record on the calling thread
+
+        Returns:
+            int: Number of records pushed
+        """
+        total = 0
+        while True:
+            synced = self.sync_once()
+            if not synced:
+                return total
+            total += synced
+
+    def stop(self, timeout=None):
+        """
+        Stop the background thread, trying to drain the log first
+
+        Args:
+            timeout (float, optional): Seconds to keep trying to drain
+
+        Returns:
+            bool: True if every record was synced
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        while self.log.pending() and (deadline is None or time.time() < deadline):
+            self.wake()
+            time.sleep(0.05)
+
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.log.pending() == 0
+
+    def stats(self):
+        """
+        Get sync progress
+
+        Returns:
+            dict: Pending and synced counts and failure information
+        """
+        return {
+            "pending": self.log.pending(),
+            "synced_seq": self.log.synced_seq,
+            "synced_records": self.synced_records,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error
+        }
+
+    def _run(self):
+        """Sync loop with backoff on failure"""
+        while not self._stop.is_set():
+            try:
+                synced = self.sync_once()
+                self.consecutive_failures = 0
+            except Exception as e:
+                self.failures += 1
+                self.consecutive_failures += 1
+                self.last_error = str(e)
+                backoff = min(self.max_backoff, 0.5 * 2 ** (self.consecutive_failures - 1))
+                print(f"Session sync failed (retrying in {backoff:.1f}s): {e}")
+                self._wake.clear()
+                self._stop.wait(backoff * random.uniform(0.5, 1.0))
+                continue
+
+            if synced < self.batch_size:
+                self._wake.wait(self.interval)
+                self._wake.clear()
+
+
+def recover_session_logs(log_dir, target):
+    """
+    Replay session logs left behind by a crash or an unreachable store
+
+    Every log under log_dir is pushed to the target. Logs of completed
+    sessions are deleted once fully synced; logs of sessions that never
+    ended are kept so their recorder can be resumed.
+
+    Args:
+        log_dir (str): Directory holding one log per session
+        target (SyncTarget): Store to push to
+
+    Returns:
+        dict: Records pushed per session ID
+    """
+    results = {}
+    if not os.path.isdir(log_dir):
+        return results
+
+    for session_id in sorted(os.listdir(log_dir)):
+        path = os.path.join(log_dir, session_id)
+        if not os.path.isdir(path):
+            continue
+
+        log = SessionLog(path)
+        try:
+            results[session_id] = SessionSyncer(log, target).drain()
+        except Exception as e:
+            print(f"Error replaying session log {session_id}: {e}")
+            log.close()
+            continue
+
+        completed = any(
+            r.get("kind") == "session" and r["data"].get("status") == "completed"
+            for r in log.read_from(0)
+        )
+        if completed:
+            log.destroy()
+        else:
+            log.close()
+
+    return results
@@ -0,0 +1,175 @@
+import math
+import bisect
+
+# Upper bounds (seconds) of the response time histogram buckets
+RESPONSE_TIME_BUCKETS = [5, 10, 20, 30, 60, 120, 300]
+
+# Weights of the overall score when both categories have scores
+TECHNICAL_WEIGHT = 0.7
+COMMUNICATION_WEIGHT = 0.3
+
+
+class RunningStats:
+    """
+    Running count, mean and variance of a stream of values (Welford's method).
+
+    Each add() is O(1) and numerically stable, so the statistics can be read
+    at any point without keeping or rescanning the values.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        """
+        Add a value
+
+        Args:
+            value (float): Value to add
+        """
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def variance(self):
+        """Sample variance (0 with fewer than two values)"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self):
+        """Sample standard deviation"""
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        """
+        Get the statistics as a dictionary
+
+        Returns:
+            dict: count, mean, variance, stdev, min and max
+        """
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "variance": self.variance,
+            "stdev": self.stdev,
+            "min": self.min,
+            "max": self.max
+        }
+
+
+class Histogram:
+    """Fixed-bucket histogram; the last bucket collects values above every bound"""
+
+    def __init__(self, bounds):
+        """
+        Initialize the histogram
+
+        Args:
+            bounds (list): Sorted upper bounds of the buckets
+        """
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+
+    def add(self, value):
+        """
+        Count a value in its bucket
+
+        Args:
+            value (float): Value to count
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+
+    def to_dict(self):
+        """
+        Get the bucket counts keyed by label
+
+        Returns:
+            dict: Counts keyed by "<=bound" and ">last bound"
+        """
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return dict(zip(labels, self.counts))
+
+
+class SessionMetrics:
+    """
+    Interview metrics maintained incrementally as records arrive.
+
+    snapshot() returns the same fields _calculate_metrics used to compute by
+    rescanning the session, plus per-category score statistics and a
+    response time histogram, in constant time.
+    """
+
+    def __init__(self):
+        self.questions = 0
+        self.answers = 0
+        self.response_times = RunningStats()
+        self.response_time_histogram = Histogram(RESPONSE_TIME_BUCKETS)
+        self.scores = {"technical": RunningStats(), "communication": RunningStats()}
+
+    def add_question(self):
+        """Count an asked question"""
+        self.questions += 1
+
+    def add_answer(self, response_time=None):
+        """
+        Count an answer
+
+        Args:
+            response_time (float, optional): Time taken to respond in seconds
+        """
+        self.answers += 1
+        if response_time:
+            self.response_times.add(response_time)
+            self.response_time_histogram.add(response_time)
+
+    def add_score(self, question_type, score):
+        """
+        Add a feedback score
+
+        Args:
+            question_type (str): Type of the question; anything other than
+                "technical" counts as communication
+            score (float): Score for the answer
+        """
+        category = "technical" if question_type == "technical" else "communication"
+        self.scores[category].add(score)
+
+    def snapshot(self):
+        """
+        Get the current metrics
+
+        Returns:
+            dict: Session metrics
+        """
+        technical = self.scores["technical"]
+        communication = self.scores["communication"]
+
+        technical_score = technical.mean if technical.count else 0
+        communication_score = communication.mean if communication.count else 0
+        if technical.count and communication.count:
+            overall_score = (TECHNICAL_WEIGHT * technical_score +
+                             COMMUNICATION_WEIGHT * communication_score)
+        elif technical.count:
+            overall_score = technical_score
+        else:
+            overall_score = communication_score
+
+        return {
+            "total_questions": self.questions,
+            "avg_response_time": self.response_times.mean if self.response_times.count else 0,
+            "completion_rate": self.answers / self.questions if self.questions else 0,
+            "technical_score": technical_score,
+            "communication_score": communication_score,
+            "overall_score": overall_score,
+            "score_stats": {name: stats.to_dict() for name, stats in self.scores.items()},
+            "response_time_stats": self.response_times.to_dict(),
+            "response_time_histogram": self.response_time_histogram.to_dict()
+        }
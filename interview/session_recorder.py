@@ -1,31 +1,52 @@
+import io
 import os
 import json
 import time
+import random
 import datetime
-from firebase_admin import firestore
+import threading
 from app.auth.models import User
+from app.database.models import UnitOfWork, get_client
+from app.interview.session_metrics import SessionMetrics
+from app.interview.session_export import SessionExporter
+from app.interview.session_log import SessionLog, SessionSyncer, FirestoreSyncTarget
 
 class InterviewSessionRecorder:
     """
     Records and manages interview sessions including questions, answers, and feedback.
+    
+    Question, answer and feedback writes go to a write-behind buffer that a
+    background thread commits in batches once flush_size records are waiting
+    or flush_interval seconds have passed, so the interview thread never
+    waits on Firestore. Failed commits are retried with exponential
+    backoff, and end_session() flushes everything before returning.
     """
     
-    def __init__(self, user_id, job_id=None):
+    def __init__(self, user_id, job_id=None, flush_size=20, flush_interval=2.0, session_id=None,
+                 transcript_index=None, flush_retries=5, max_flush_backoff=30.0):
         """
         Initialize the session recorder.
         
         Args:
             user_id (str): The ID of the user taking the interview
             job_id (str, optional): The ID of the job position
+            flush_size (int): Buffered records that trigger a batch commit
+            flush_interval (float): Maximum seconds a record stays buffered
+            session_id (str, optional): Session ID (default: derived from user and time)
+            transcript_index (TranscriptIndex, optional): Audio-aligned transcript
+                of the session; answers recorded with audio_start are marked in it
+            flush_retries (int): Retries of the final flush in end_session()
+            max_flush_backoff (float): Maximum seconds between flush retries
         """
         self.user_id = user_id
         self.job_id = job_id
-        self.session_id = f"{user_id}_{int(time.time())}"
+        self.session_id = session_id or f"{user_id}_{int(time.time())}"
         self.start_time = datetime.datetime.now()
         self.end_time = None
         self.questions = []
         self.answers = []
         self.feedback = []
+        self.transcript_index = transcript_index
         self.metrics = {
             "total_questions": 0,
             "avg_response_time": 0,
@@ -34,7 +55,29 @@ class InterviewSessionRecorder:
             "communication_score": 0,
             "overall_score": 0
         }
-        self.db = firestore.client()
+        
+        # Running metrics and first answer per question / feedback per answer
+        self._live_metrics = SessionMetrics()
+        self._answer_for_question = {}
+        self._feedback_for_answer = {}
+        
+        # Write-behind buffer of (document reference, data) pairs
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.flush_retries = flush_retries
+        self.max_flush_backoff = max_flush_backoff
+        self._pending = []
+        self._pending_cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self.flushed_writes = 0
+        self.flush_errors = 0
+        self._start_writer()
+    
+    @property
+    def db(self):
+        """Shared Firestore client"""
+        return get_client()
         
     def start_session(self, job_title=None, resume_path=None, jd_path=None):
         """
@@ -59,7 +102,7 @@ class InterviewSessionRecorder:
         }
         
         # Save session to database
-        self.db.collection('interview_sessions').document(self.session_id).set(session_data)
+        self._write_session(session_data)
         
         return self.session_id
     
@@ -74,7 +117,11 @@ class InterviewSessionRecorder:
             
         Returns:
             int: Question index
+            
+        Raises:
+            RuntimeError: If the session has ended
         """
+        self._check_writable()
         question_data = {
             "text": question,
             "type": question_type,
@@ -84,14 +131,14 @@ class InterviewSessionRecorder:
         
         self.questions.append(question_data)
         question_idx = len(self.questions) - 1
+        self._track('questions', question_idx, question_data)
         
-        # Update database
-        self.db.collection('interview_sessions').document(self.session_id).collection(
-            'questions').document(str(question_idx)).set(question_data)
+        # Queue database write
+        self._buffer_write('questions', question_idx, question_data)
         
         return question_idx
     
-    def record_answer(self, question_idx, answer, response_time=None):
+    def record_answer(self, question_idx, answer, response_time=None, audio_start=None):
         """
         Record the candidate's answer to a question
         
@@ -99,26 +146,52 @@ class InterviewSessionRecorder:
             question_idx (int): Index of the question being answered
             answer (str): The candidate's answer
             response_time (float, optional): Time taken to respond in seconds
+            audio_start (float, optional): Start of the answer on the session
+                audio clock (the audio_start of its first transcription result)
             
         Returns:
             int: Answer index
+            
+        Raises:
+            RuntimeError: If the session has ended
         """
+        self._check_writable()
         answer_data = {
             "question_idx": question_idx,
             "text": answer,
             "response_time": response_time,
             "timestamp": datetime.datetime.now()
         }
+        if audio_start is not None:
+            answer_data["audio_start"] = audio_start
         
         self.answers.append(answer_data)
         answer_idx = len(self.answers) - 1
+        if audio_start is not None and self.transcript_index is not None:
+            # Lets the review UI seek the recording to this answer
+            self.transcript_index.mark(f"answer-{answer_idx}", audio_start)
+        self._track('answers', answer_idx, answer_data)
         
-        # Update database
-        self.db.collection('interview_sessions').document(self.session_id).collection(
-            'answers').document(str(answer_idx)).set(answer_data)
+        # Queue database write
+        self._buffer_write('answers', answer_idx, answer_data)
         
         return answer_idx
     
+    def seek_answer(self, answer_idx):
+        """
+        Get the transcript segment where an answer starts
+        
+        Args:
+            answer_idx (int): Index of the answer
+            
+        Returns:
+            dict: Segment with its audio times, or None if the answer has no
+                audio position
+        """
+        if self.transcript_index is None:
+            return None
+        return self.transcript_index.seek_marker(f"answer-{answer_idx}")
+    
     def record_feedback(self, question_idx, answer_idx, feedback_text, score=None):
         """
         Record feedback for an answer
@@ -131,7 +204,11 @@ class InterviewSessionRecorder:
             
         Returns:
             int: Feedback index
+            
+        Raises:
+            RuntimeError: If the session has ended
         """
+        self._check_writable()
         feedback_data = {
             "question_idx": question_idx,
             "answer_idx": answer_idx,
@@ -142,10 +219,10 @@ class InterviewSessionRecorder:
         
         self.feedback.append(feedback_data)
         feedback_idx = len(self.feedback) - 1
+        self._track('feedback', feedback_idx, feedback_data)
         
-        # Update database
-        self.db.collection('interview_sessions').document(self.session_id).collection(
-            'feedback').document(str(feedback_idx)).set(feedback_data)
+        # Queue database write
+        self._buffer_write('feedback', feedback_idx, feedback_data)
         
         return feedback_idx
     
@@ -161,6 +238,9 @@ class InterviewSessionRecorder:
         """
         self.end_time = datetime.datetime.now()
         
+        # Commit everything still buffered
+        self._finish_writes()
+        
         if calculate_metrics:
             self._calculate_metrics()
         
@@ -177,64 +257,177 @@ class InterviewSessionRecorder:
         }
         
         # Update database
-        self.db.collection('interview_sessions').document(self.session_id).update({
+        self._write_session({
             "end_time": self.end_time,
             "duration": (self.end_time - self.start_time).total_seconds(),
             "metrics": self.metrics,
             "status": "completed"
-        })
+        }, merge=True)
         
         return session_summary
     
-    def _calculate_metrics(self):
-        """Calculate interview performance metrics based on answers and feedback"""
-        if not self.answers:
-            return
-        
-        # Calculate total questions and completion rate
-        self.metrics["total_questions"] = len(self.questions)
-        self.metrics["completion_rate"] = len(self.answers) / len(self.questions) if self.questions else 0
+    def flush(self):
+        """
+        Commit all buffered records in batches
         
-        # Calculate average response time
-        response_times = [a.get("response_time", 0) for a in self.answers if a.get("response_time")]
-        self.metrics["avg_response_time"] = sum(response_times) / len(response_times) if response_times else 0
+        Records are written with set() on fixed document IDs, so if a commit
+        fails they are put back in the buffer and can be retried safely.
         
-        # Calculate scores from feedback
-        if self.feedback:
-            technical_scores = []
-            communication_scores = []
-            
-            for f in self.feedback:
-                score = f.get("score")
-                if score is not None:
-                    q_idx = f.get("question_idx")
-                    if q_idx is not None and q_idx < len(self.questions):
-                        q_type = self.questions[q_idx].get("type")
-                        if q_type == "technical":
-                            technical_scores.append(score)
-                        else:
-                            communication_scores.append(score)
+        Returns:
+            int: Number of records committed
+        """
+        with self._flush_lock:
+            with self._pending_cond:
+                writes, self._pending = self._pending, []
+            if not writes:
+                return 0
             
-            if technical_scores:
-                self.metrics["technical_score"] = sum(technical_scores) / len(technical_scores)
+            try:
+                uow = UnitOfWork(self.db)
+                for doc_ref, data in writes:
+                    uow.set(doc_ref, data)
+                uow.commit()
+            except Exception:
+                with self._pending_cond:
+                    self._pending[:0] = writes
+                    self.flush_errors += 1
+                raise
             
-            if communication_scores:
-                self.metrics["communication_score"] = sum(communication_scores) / len(communication_scores)
+            self.flushed_writes += len(writes)
+            return len(writes)
+    
+    def pending_writes(self):
+        """
+        Get the number of buffered records not yet committed
+        
+        Returns:
+            int: Buffered record count
+        """
+        with self._pending_cond:
+            return len(self._pending)
+    
+    def _start_writer(self):
+        """Start the background flusher thread"""
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
+    
+    def _finish_writes(self):
+        """
+        Commit everything still buffered, then stop the background flusher
+        
+        Failed commits are retried with backoff. If they keep failing the
+        error is raised and the flusher keeps running, so the buffered
+        records are still retried and end_session() can be called again.
+        """
+        attempt = 0
+        while True:
+            try:
+                self.flush()
+            except Exception as e:
+                attempt += 1
+                if attempt > self.flush_retries:
+                    raise
+                print(f"Error flushing interview session records, retrying: {e}")
+                time.sleep(self._retry_delay(attempt))
+                continue
             
-            # Calculate overall score
-            if technical_scores or communication_scores:
-                tech_weight = 0.7  # Technical questions weighted more
-                comm_weight = 0.3
-                
-                if not technical_scores:
-                    self.metrics["overall_score"] = self.metrics["communication_score"]
-                elif not communication_scores:
-                    self.metrics["overall_score"] = self.metrics["technical_score"]
+            # Stop only once nothing is left, so no record outlives the flusher
+            with self._pending_cond:
+                if self._pending:
+                    continue
+                self._closed = True
+                self._pending_cond.notify()
+            break
+        
+        if self._flush_thread.is_alive() and self._flush_thread is not threading.current_thread():
+            self._flush_thread.join()
+    
+    def _retry_delay(self, attempt):
+        """Jittered exponential backoff before flush retry number attempt"""
+        delay = min(self.max_flush_backoff, self.flush_interval * 2 ** (attempt - 1))
+        return random.uniform(delay / 2, delay)
+    
+    def _write_session(self, data, merge=False):
+        """Write the session document (merge updates existing fields)"""
+        doc_ref = self.db.collection('interview_sessions').document(self.session_id)
+        if merge:
+            doc_ref.update(data)
+        else:
+            doc_ref.set(data)
+    
+    def _check_writable(self):
+        """Reject records once end_session() has stopped the flusher"""
+        if self._closed:
+            raise RuntimeError(f"Session {self.session_id} has ended; no more records can be written")
+    
+    def _buffer_write(self, subcollection, idx, data):
+        """
+        Queue a subcollection document write for the background flusher
+        
+        Raises:
+            RuntimeError: If the session has ended and the flusher is stopped
+        """
+        doc_ref = self.db.collection('interview_sessions').document(self.session_id).collection(
+            subcollection).document(str(idx))
+        
+        with self._pending_cond:
+            self._check_writable()
+            self._pending.append((doc_ref, data))
+            if len(self._pending) >= self.flush_size:
+                self._pending_cond.notify()
+    
+    def _flush_loop(self):
+        """Commit buffered records on the size or time trigger until stopped"""
+        failures = 0
+        while True:
+            with self._pending_cond:
+                if failures:
+                    # Back off instead of retrying at every size trigger
+                    self._pending_cond.wait_for(lambda: self._closed, timeout=self._retry_delay(failures))
                 else:
-                    self.metrics["overall_score"] = (
-                        tech_weight * self.metrics["technical_score"] + 
-                        comm_weight * self.metrics["communication_score"]
+                    self._pending_cond.wait_for(
+                        lambda: self._closed or len(self._pending) >= self.flush_size,
+                        timeout=self.flush_interval
                     )
+                if self._closed:
+                    return
+            
+            try:
+                self.flush()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                print(f"Error flushing interview session records: {e}")
+    
+    def _calculate_metrics(self):
+        """Copy the running metrics into the session metrics"""
+        if not self.answers:
+            return
+        
+        self.metrics.update(self._live_metrics.snapshot())
+    
+    def get_live_metrics(self):
+        """
+        Get the interview metrics so far, without rescanning the session
+        
+        Returns:
+            dict: Current metrics, including per-category score statistics
+                and a response time histogram
+        """
+        return self._live_metrics.snapshot()
+    
+    def _track(self, kind, idx, data):
+        """Update the running metrics and the question/answer/feedback index"""
+        if kind == "questions":
+            self._live_metrics.add_question()
+        elif kind == "answers":
+            self._live_metrics.add_answer(data.get("response_time"))
+            self._answer_for_question.setdefault(data.get("question_idx"), idx)
+        elif kind == "feedback":
+            self._feedback_for_answer.setdefault(data.get("answer_idx"), idx)
+            q_idx = data.get("question_idx")
+            if data.get("score") is not None and q_idx is not None and q_idx < len(self.questions):
+                self._live_metrics.add_score(self.questions[q_idx].get("type"), data["score"])
     
     def get_session_transcript(self):
         """
@@ -254,8 +447,9 @@ class InterviewSessionRecorder:
             transcript.append(q_entry)
             
             # Find corresponding answer
-            answer = next((a for a in self.answers if a["question_idx"] == i), None)
-            if answer:
+            answer_idx = self._answer_for_question.get(i)
+            if answer_idx is not None:
+                answer = self.answers[answer_idx]
                 a_entry = {
                     "type": "answer",
                     "text": answer["text"],
@@ -264,8 +458,9 @@ class InterviewSessionRecorder:
                 transcript.append(a_entry)
                 
                 # Find corresponding feedback
-                feedback = next((f for f in self.feedback if f["answer_idx"] == i), None)
-                if feedback:
+                feedback_idx = self._feedback_for_answer.get(answer_idx)
+                if feedback_idx is not None:
+                    feedback = self.feedback[feedback_idx]
                     f_entry = {
                         "type": "feedback",
                         "text": feedback["text"],
@@ -279,27 +474,33 @@ class InterviewSessionRecorder:
         """
         Export the interview session data
         
+        jsonl, txt and pdf exports are streamed section by section through
+        SessionExporter; json builds a single document in memory.
+        
         Args:
-            format (str): Export format (json, pdf, txt)
-            output_path (str, optional): Path to save the export
+            format (str): Export format (json, jsonl, txt, pdf)
+            output_path (str or file, optional): Path or binary stream to save the export
             
         Returns:
-            str: Path to the exported file or the data string
+            str: Path to the exported file or the data string (bytes for pdf)
         """
         session_data = {
             "session_id": self.session_id,
             "user_id": self.user_id,
             "job_id": self.job_id,
-            "start_time": str(self.start_time),
-            "end_time": str(self.end_time) if self.end_time else None,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
             "questions": self.questions,
             "answers": self.answers,
             "feedback": self.feedback,
-            "metrics": self.metrics,
-            "transcript": self.get_session_transcript()
+            "metrics": self.metrics
         }
         
         if format == "json":
+            session_data["start_time"] = str(self.start_time)
+            session_data["end_time"] = str(self.end_time) if self.end_time else None
+            session_data["transcript"] = self.get_session_transcript()
+            
             # Convert datetime objects to strings
             export_data = json.dumps(session_data, default=str, indent=2)
             
@@ -310,28 +511,177 @@ class InterviewSessionRecorder:
             else:
                 return export_data
         
-        elif format == "txt":
-            # Generate plain text format
-            transcript = self.get_session_transcript()
-            text_output = f"Interview Session: {self.session_id}\n"
-            text_output += f"Date: {self.start_time.strftime('%Y-%m-%d')}\n"
-            text_output += f"Duration: {(self.end_time - self.start_time).total_seconds() / 60:.2f} minutes\n\n"
-            
-            for item in transcript:
-                item_type = item["type"].capitalize()
-                timestamp = item["timestamp"].strftime('%H:%M:%S')
-                text_output += f"[{timestamp}] {item_type}: {item['text']}\n\n"
-            
-            text_output += f"\nMetrics:\n"
-            for metric, value in self.metrics.items():
-                text_output += f"{metric.replace('_', ' ').title()}: {value}\n"
+        exporter = SessionExporter(format)
+        if output_path:
+            exporter.export(session_data, output_path)
+            return output_path
+        
+        buffer = io.BytesIO()
+        exporter.export(session_data, buffer)
+        return buffer.getvalue() if format == "pdf" else buffer.getvalue().decode("utf-8")
+
+
+class LocalSessionRecorder(InterviewSessionRecorder):
+    """
+    Interview session recorder that writes to a local write-ahead log first.
+    
+    Every event is appended to a per-session SessionLog on disk and pushed
+    to a SyncTarget (Firestore by default, or SQLite) by a background
+    SessionSyncer that retries idempotently, so recording never blocks on
+    or loses data to the network. After a crash, recover() rebuilds the
+    recorder from its log and resumes syncing; recover_session_logs()
+    replays every leftover log at startup.
+    """
+    
+    def __init__(self, user_id, job_id=None, session_id=None, log_dir="app_data/session_logs",
+                 target=None, sync_interval=1.0):
+        """
+        Initialize the session recorder.
+        
+        Args:
+            user_id (str): The ID of the user taking the interview
+            job_id (str, optional): The ID of the job position
+            session_id (str, optional): Session ID (default: derived from user and time)
+            log_dir (str): Directory holding one log per session
+            target (SyncTarget, optional): Store to sync to (default: Firestore)
+            sync_interval (float): Seconds between sync polls when idle
+        """
+        self.log_dir = log_dir
+        self.target = target or FirestoreSyncTarget()
+        self.sync_interval = sync_interval
+        super().__init__(user_id, job_id, session_id=session_id)
+    
+    @classmethod
+    def recover(cls, session_id, log_dir="app_data/session_logs", target=None):
+        """
+        Rebuild a recorder from the log of an interrupted session
+        
+        Args:
+            session_id (str): Session ID
+            log_dir (str): Directory holding one log per session
+            target (SyncTarget, optional): Store to sync to (default: Firestore)
             
-            if output_path:
-                with open(output_path, 'w') as f:
-                    f.write(text_output)
-                return output_path
+        Returns:
+            LocalSessionRecorder: Recorder with its questions, answers and
+                feedback restored, or None if there is no log for the session
+        """
+        if not os.path.isdir(os.path.join(log_dir, session_id)):
+            return None
+        
+        recorder = cls(None, session_id=session_id, log_dir=log_dir, target=target)
+        for record in recorder.log.read_from(0):
+            data = record["data"]
+            if record["kind"] == "session":
+                recorder.user_id = data.get("user_id", recorder.user_id)
+                recorder.job_id = data.get("job_id", recorder.job_id)
+                recorder.start_time = data.get("start_time", recorder.start_time)
+                recorder.end_time = data.get("end_time", recorder.end_time)
+                recorder.metrics = data.get("metrics", recorder.metrics)
             else:
-                return text_output
-                
+                items = getattr(recorder, record["kind"])
+                idx = int(record["path"][1])
+                items.extend([None] * (idx + 1 - len(items)))
+                items[idx] = data
+                recorder._track(record["kind"], idx, data)
+        return recorder
+    
+    def flush(self):
+        """
+        Make every recorded event durable on local disk and trigger a sync
+        
+        Returns:
+            int: Number of events still waiting to be synced
+        """
+        self.log.sync()
+        self.syncer.wake()
+        return self.log.pending()
+    
+    def pending_writes(self):
+        """
+        Get the number of events not yet synced to the remote store
+        
+        Returns:
+            int: Unsynced event count
+        """
+        return self.log.pending()
+    
+    def set_metadata(self, metadata):
+        """
+        Record session metadata
+        
+        Args:
+            metadata (dict): Metadata merged into the session document
+        """
+        self._write_session({"metadata": metadata}, merge=True)
+    
+    def set_recording_path(self, path):
+        """
+        Record the path of the recorded interview video
+        
+        Args:
+            path (str): Recording path
+        """
+        self._write_session({"recording_path": path}, merge=True)
+    
+    def close(self, timeout=10.0):
+        """
+        Stop syncing, waiting up to timeout for the log to drain
+        
+        The log is deleted only once the session has ended and every event
+        is synced; otherwise it stays on disk for recovery.
+        
+        Args:
+            timeout (float): Seconds to wait for pending events to sync
+            
+        Returns:
+            bool: True if every event was synced
+        """
+        synced = self.syncer.stop(timeout=timeout)
+        if synced and self.end_time:
+            self.log.destroy()
         else:
-            raise ValueError(f"Unsupported export format: {format}")
\ No newline at end of file
+            self.log.close()
+        return synced
+    
+    def _start_writer(self):
+        """Open the session log and start the background syncer"""
+        self.log = SessionLog(os.path.join(self.log_dir, self.session_id))
+        self.syncer = SessionSyncer(self.log, self.target, interval=self.sync_interval)
+        self.syncer.start()
+    
+    def end_session(self, calculate_metrics=True):
+        """
+        End the interview session and make the completed session durable
+        
+        Args:
+            calculate_metrics (bool): Whether to calculate final metrics
+            
+        Returns:
+            dict: Session summary with metrics
+        """
+        summary = super().end_session(calculate_metrics)
+        # The completed session record is appended after _finish_writes()
+        self.flush()
+        return summary
+    
+    def _finish_writes(self):
+        """Make the log durable; syncing continues in the background"""
+        self.flush()
+    
+    def _write_session(self, data, merge=False):
+        """Append a session document write to the log"""
+        self._append("session", [], data, merge)
+    
+    def _buffer_write(self, subcollection, idx, data):
+        """Append a subcollection document write to the log"""
+        self._append(subcollection, [subcollection, str(idx)], data)
+    
+    def _append(self, kind, path, data, merge=False):
+        """Append an event for this session to the log"""
+        self.log.append({
+            "session_id": self.session_id,
+            "kind": kind,
+            "path": path,
+            "data": data,
+            "merge": merge
+        })
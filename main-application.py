@@ -18,10 +18,12 @@ from app.ui.interview_room import display_interview_room
 
 # Import backend services
 from app.services.livekit_service import LiveKitService
+from app.services.room_pool import RoomPool
 from app.services.transcription_service import TranscriptionService
 from app.services.ai_service import AIService
 from app.services.user_service import UserService
 from app.services.storage_service import StorageService
+from app.services.model_registry import model_registry
 
 # Import utilities
 from app.utils.resume_parser import ResumeParser
@@ -40,18 +42,29 @@ st.set_page_config(
 # Initialize services
 @st.cache_resource
 def initialize_services():
+    # Whisper runs in the transcription worker processes, which load their
+    # own copy; models the app process loads on demand are evicted when idle
+    model_registry.start_idle_eviction()
+    
     livekit_service = LiveKitService(
         api_key=os.getenv("LIVEKIT_API_KEY"),
         api_secret=os.getenv("LIVEKIT_API_SECRET"),
         ws_url=os.getenv("LIVEKIT_WS_URL")
     )
-    transcription_service = TranscriptionService()
+    # Keep interview rooms created ahead of time so starting one is instant
+    room_pool = RoomPool(
+        livekit_service,
+        target_size=int(os.getenv("LIVEKIT_ROOM_POOL_SIZE", "5")),
+        max_idle=float(os.getenv("LIVEKIT_ROOM_POOL_MAX_IDLE", "240"))
+    ).start()
+    transcription_service = TranscriptionService(model_name=os.getenv("WHISPER_MODEL", "base"))
     ai_service = AIService(api_key=os.getenv("OPENAI_API_KEY"))
     user_service = UserService()
     storage_service = StorageService()
     
     return {
         "livekit": livekit_service,
+        "rooms": room_pool,
         "transcription": transcription_service,
         "ai": ai_service,
         "user": user_service,
@@ -100,17 +113,6 @@ def start_interview(job_description, resume_data, interview_type):
     """Set up and start a new interview session"""
     services = initialize_services()
     
-    # Create a new interview session
-    interview_id = str(uuid.uuid4())
-    room_name = f"interview-{interview_id}"
-    
-    # Generate token for the user
-    token = services["livekit"].create_token(
-        room_name=room_name,
-        participant_name=st.session_state.user_id,
-        participant_identity=st.session_state.user_id
-    )
-    
     # Parse resume and analyze job description
     resume_parser = ResumeParser(services["ai"])
     job_analyzer = JobDescriptionAnalyzer(services["ai"])
@@ -129,8 +131,15 @@ def start_interview(job_description, resume_data, interview_type):
             interview_type
         )
     
+    # Take a pre-created room from the pool and a token for the user; done
+    # after the analysis so a failure there does not leave a room taken
+    room = services["rooms"].acquire(st.session_state.user_id)
+    interview_id = room["interview_id"]
+    room_name = room["room_name"]
+    token = room["token"]
+    
     # Set up interview data
-    st.session_state.interview_data = {
+    interview_data = {
         "id": interview_id,
         "start_time": datetime.now().isoformat(),
         "end_time": None,
@@ -142,14 +151,19 @@ def start_interview(job_description, resume_data, interview_type):
         "feedback": None
     }
     
-    # Store token and room name
+    # Save interview data; hand the room back if that fails
+    try:
+        services["storage"].save_interview_data(st.session_state.user_id, interview_id, interview_data)
+    except Exception:
+        services["rooms"].release(room_name)
+        raise
+    
+    # Store interview data, token and room name
+    st.session_state.interview_data = interview_data
     st.session_state.room_name = room_name
     st.session_state.token = token
     st.session_state.interview_active = True
     
-    # Save interview data
-    services["storage"].save_interview_data(st.session_state.user_id, interview_id, st.session_state.interview_data)
-    
     # Navigate to interview room
     navigate_to("interview")
 
@@ -164,6 +178,10 @@ def end_interview():
     st.session_state.interview_data["end_time"] = datetime.now().isoformat()
     st.session_state.interview_active = False
     
+    # Hand the room back to the pool for deletion
+    if st.session_state.room_name:
+        services["rooms"].release(st.session_state.room_name)
+    
     # Generate feedback
     feedback_engine = FeedbackEngine(services["ai"])
     
@@ -197,11 +215,10 @@ def save_transcript_update(transcript_entry):
     # Add transcript entry
     st.session_state.interview_data["transcript"].append(transcript_entry)
     
-    # Save updated interview data
-    services["storage"].save_interview_data(
-        st.session_state.user_id, 
+    # Append just this entry; the full document is only rebuilt on read
+    services["storage"].append_transcript_entry(
         st.session_state.interview_data["id"], 
-        st.session_state.interview_data
+        transcript_entry
     )
 
 def main():
@@ -217,8 +234,8 @@ def main():
         display_landing_page(navigate_to)
         
     elif st.session_state.current_page == "dashboard":
-        # Get user's interview history
-        interview_history = services["storage"].get_user_interviews(st.session_state.user_id)
+        # Get a page of the user's interview history; full data is loaded when an interview is opened
+        interview_history = services["storage"].get_user_interview_summaries(st.session_state.user_id)["items"]
         display_dashboard(interview_history, navigate_to, start_interview)
         
     elif st.session_state.current_page == "upload":
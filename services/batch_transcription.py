@@ -0,0 +1,288 @@
+# app/services/batch_transcription.py
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Iterator, Optional
+import numpy as np
+from app.services.model_registry import model_registry
+from app.services.transcript_index import align_segments
+
+SAMPLE_RATE = 16000  # Hz, Whisper's native rate
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a", ".ogg", ".webm", ".flac", ".mp4"}
+
+
+def split_windows(num_samples: int, window_seconds: float, overlap_seconds: float,
+                  sample_rate: int = SAMPLE_RATE) -> List[Dict[str, float]]:
+    """
+    Split an audio timeline into overlapping windows
+
+    Each window also records the region it "owns": the part of the window
+    outside the half-overlaps shared with its neighbours. Segments are kept
+    only by the window that owns their midpoint, so overlap text is not
+    duplicated.
+
+    Args:
+        num_samples: Total number of audio samples
+        window_seconds: Window length in seconds
+        overlap_seconds: Overlap between consecutive windows in seconds
+        sample_rate: Audio sample rate
+
+    Returns:
+        List of windows with start/end and owned region in seconds
+    """
+    duration = num_samples / sample_rate
+    if window_seconds <= overlap_seconds:
+        raise ValueError("Window length must be greater than the overlap")
+
+    windows = []
+    step = window_seconds - overlap_seconds
+    start = 0.0
+    while True:
+        end = min(start + window_seconds, duration)
+        windows.append({"start": start, "end": end})
+        if end >= duration:
+            break
+        start += step
+
+    for i, window in enumerate(windows):
+        window["own_start"] = window["start"] + overlap_seconds / 2 if i > 0 else 0.0
+        window["own_end"] = window["end"] - overlap_seconds / 2 if i < len(windows) - 1 else duration
+
+    return windows
+
+
+def transcribe_recording(path: str, model_name: str = "base", window_seconds: float = 600.0,
+                         overlap_seconds: float = 5.0, language: str = "en") -> Dict[str, Any]:
+    """
+    Transcribe a single recording window by window (runs inside a worker process)
+
+    Args:
+        path: Path to the audio file
+        model_name: Whisper model name
+        window_seconds: Window length in seconds
+        overlap_seconds: Overlap between windows in seconds
+        language: Spoken language
+
+    Returns:
+        Dictionary with the file path, duration and audio-aligned segments
+    """
+    import whisper
+
+    start_time = time.time()
+    model = model_registry.acquire("whisper", model_name)
+    audio = whisper.load_audio(path)
+
+    segments = []
+    for window_idx, window in enumerate(split_windows(len(audio), window_seconds, overlap_seconds)):
+        chunk = audio[int(window["start"] * SAMPLE_RATE):int(window["end"] * SAMPLE_RATE)]
+        result = model.transcribe(chunk.astype(np.float32), language=language, fp16=False,
+                                  word_timestamps=True)
+
+        raw_segments = result.get("segments", [])
+        for raw, segment in zip(raw_segments, align_segments(raw_segments, window["start"])):
+            midpoint = (segment["start"] + segment["end"]) / 2
+            if not (window["own_start"] <= midpoint < window["own_end"]):
+                continue
+            segment["window"] = window_idx
+            segment["avg_logprob"] = raw.get("avg_logprob")
+            segment["no_speech_prob"] = raw.get("no_speech_prob")
+            segments.append(segment)
+
+    return {
+        "file": path,
+        "duration": len(audio) / SAMPLE_RATE,
+        "segments": segments,
+        "model": model_name,
+        "processing_time": time.time() - start_time
+    }
+
+
+class BatchTranscriber:
+    """Batch offline transcription of recorded interviews"""
+
+    def __init__(self, output_path: str, checkpoint_path: Optional[str] = None,
+                 model_name: str = "base", num_workers: Optional[int] = None,
+                 window_seconds: float = 600.0, overlap_seconds: float = 5.0):
+        """
+        Initialize the batch transcriber
+
+        Args:
+            output_path: Path of the segment-level JSONL output file
+            checkpoint_path: Path of the checkpoint file (default: output path + ".checkpoint")
+            model_name: Whisper model name to use
+            num_workers: Number of worker processes (default: CPU count)
+            window_seconds: Window length for splitting long files
+            overlap_seconds: Overlap between consecutive windows
+        """
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+        self.model_name = model_name
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.window_seconds = window_seconds
+        self.overlap_seconds = overlap_seconds
+
+    @staticmethod
+    def collect_files(source: str) -> List[str]:
+        """
+        Collect audio files from a directory or a manifest
+
+        A manifest is a text file with one path per line, or a JSONL file
+        whose lines have a "path" field. Relative paths are resolved against
+        the manifest's directory.
+
+        Args:
+            source: Directory or manifest path
+
+        Returns:
+            List of audio file paths
+        """
+        if os.path.isdir(source):
+            files = []
+            for root, _, names in os.walk(source):
+                for name in names:
+                    if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                        files.append(os.path.join(root, name))
+            return sorted(files)
+
+        base_dir = os.path.dirname(os.path.abspath(source))
+        files = []
+        with open(source, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                path = json.loads(line)["path"] if line.startswith("{") else line
+                files.append(path if os.path.isabs(path) else os.path.join(base_dir, path))
+        return files
+
+    def load_checkpoint(self) -> set:
+        """
+        Load the set of files that were already transcribed
+
+        Returns:
+            Set of completed file paths
+        """
+        if not os.path.exists(self.checkpoint_path):
+            return set()
+        with open(self.checkpoint_path, "r") as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def run(self, source: str, progress: bool = True) -> Dict[str, Any]:
+        """
+        Transcribe every file in a directory or manifest, resuming from the checkpoint
+
+        Args:
+            source: Directory or manifest path
+            progress: Whether to print progress
+
+        Returns:
+            Summary of the batch run
+        """
+        files = self.collect_files(source)
+        done = self.load_checkpoint()
+        remaining = [path for path in files if path not in done]
+        pending = iter(remaining)
+
+        summary = {"total": len(files), "skipped": len(files) - len(remaining),
+                   "completed": 0, "failed": 0, "audio_seconds": 0.0, "errors": {}}
+        start_time = time.time()
+
+        out_dir = os.path.dirname(self.output_path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+
+        # Results are written by this process only, so output and checkpoint stay consistent
+        with open(self.output_path, "a") as out, open(self.checkpoint_path, "a") as checkpoint, \
+                ProcessPoolExecutor(max_workers=self.num_workers) as executor:
+            in_flight = {}
+
+            def submit_next():
+                path = next(pending, None)
+                if path is not None:
+                    future = executor.submit(transcribe_recording, path, self.model_name,
+                                             self.window_seconds, self.overlap_seconds)
+                    in_flight[future] = path
+
+            # Keep a bounded number of files in flight
+            for _ in range(self.num_workers * 2):
+                submit_next()
+
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    path = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        summary["failed"] += 1
+                        summary["errors"][path] = str(e)
+                        print(f"Batch transcription error for {path}: {e}", file=sys.stderr)
+                    else:
+                        for segment in self._iter_records(result):
+                            out.write(json.dumps(segment) + "\n")
+                        out.flush()
+                        os.fsync(out.fileno())
+
+                        checkpoint.write(path + "\n")
+                        checkpoint.flush()
+
+                        summary["completed"] += 1
+                        summary["audio_seconds"] += result["duration"]
+                        if progress:
+                            print(f"[{summary['completed'] + summary['skipped']}/{summary['total']}] {path}")
+                    submit_next()
+
+        summary["elapsed_seconds"] = time.time() - start_time
+        return summary
+
+    def _iter_records(self, result: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Turn a file result into segment-level output records
+
+        Args:
+            result: Result from transcribe_recording
+
+        Yields:
+            One record per segment
+        """
+        recording_id = os.path.splitext(os.path.basename(result["file"]))[0]
+        for idx, segment in enumerate(result["segments"]):
+            yield {
+                "recording_id": recording_id,
+                "file": result["file"],
+                "segment": idx,
+                "model": result["model"],
+                **segment
+            }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point for batch transcription"""
+    parser = argparse.ArgumentParser(description="Batch transcription of recorded interviews")
+    parser.add_argument("source", help="Directory of recordings or manifest file")
+    parser.add_argument("-o", "--output", required=True, help="Segment-level JSONL output file")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--model", default="base", help="Whisper model name")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--window", type=float, default=600.0, help="Window length in seconds")
+    parser.add_argument("--overlap", type=float, default=5.0, help="Window overlap in seconds")
+    args = parser.parse_args(argv)
+
+    transcriber = BatchTranscriber(
+        output_path=args.output,
+        checkpoint_path=args.checkpoint,
+        model_name=args.model,
+        num_workers=args.workers,
+        window_seconds=args.window,
+        overlap_seconds=args.overlap
+    )
+    summary = transcriber.run(args.source)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
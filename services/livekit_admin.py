@@ -0,0 +1,303 @@
+# app/services/livekit_admin.py
+import json
+import time
+import random
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable, Iterable, List, Union
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# HTTP statuses and Twirp error codes worth retrying
+RETRY_STATUSES = {429, 502, 503, 504}
+RETRY_TWIRP_CODES = {"unavailable", "resource_exhausted", "deadline_exceeded", "internal"}
+
+
+class LiveKitAPIError(Exception):
+    """A LiveKit API request failed"""
+
+    def __init__(self, message: str, status: Optional[int] = None, code: Optional[str] = None,
+                 sent: bool = True):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        # False only when the request certainly never reached the server
+        self.sent = sent
+
+    @property
+    def not_found(self) -> bool:
+        return self.status == 404 or self.code == "not_found"
+
+
+class LiveKitAdminClient:
+    """
+    LiveKit server API client on a pooled HTTP session.
+
+    Requests reuse keep-alive connections from one requests.Session whose
+    connection pool matches the worker count, carry connect and read
+    timeouts, and are retried with jittered exponential backoff on
+    connection errors, timeouts and transient server errors. Calls that are
+    not idempotent, such as starting an egress, pass idempotent=False and
+    are only retried when the server cannot have acted on them. request() is
+    blocking; the async methods run requests on the client's bounded
+    executor, so at most pool_size requests are in flight and bulk
+    operations fan out concurrently.
+    """
+
+    def __init__(self, api_url: str, token_provider: Callable[[], str], pool_size: int = 10,
+                 connect_timeout: float = 3.05, read_timeout: float = 10.0, retries: int = 3,
+                 backoff: float = 0.2, max_backoff: float = 5.0):
+        """
+        Initialize the client
+
+        Args:
+            api_url: LiveKit server HTTP(S) URL
+            token_provider: Returns an admin token for each request (should be cached)
+            pool_size: Pooled connections and maximum concurrent requests
+            connect_timeout: Seconds to wait for a connection
+            read_timeout: Seconds to wait for a response
+            retries: Retries after the first attempt
+            backoff: Base delay before the first retry in seconds
+            max_backoff: Maximum delay between retries in seconds
+        """
+        self.api_url = api_url.rstrip("/")
+        self.token_provider = token_provider
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Content-Type"] = "application/json"
+
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="livekit-api")
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "seconds": 0.0}
+
+    # Blocking API
+
+    def request(self, path: str, payload: Dict[str, Any], token: Optional[str] = None,
+                idempotent: bool = True) -> Dict[str, Any]:
+        """
+        Call a Twirp method, retrying transient failures
+
+        Args:
+            path: Service and method, e.g. "livekit.RoomService/CreateRoom"
+            payload: JSON request body
+            token: Token to use instead of the token provider's
+            idempotent: Whether repeating the call is safe; if not, only
+                failed connects and 429 responses are retried
+
+        Returns:
+            JSON response
+
+        Raises:
+            LiveKitAPIError: If the request fails or retries run out
+        """
+        attempt = 0
+        while True:
+            try:
+                return self._send(path, payload, token)
+            except LiveKitAPIError as e:
+                if not self._should_retry(e, attempt, idempotent):
+                    raise
+            attempt += 1
+            time.sleep(self._delay(attempt))
+
+    # Async API
+
+    async def arequest(self, path: str, payload: Dict[str, Any], token: Optional[str] = None,
+                       idempotent: bool = True) -> Dict[str, Any]:
+        """Async request(); backoff waits do not hold a worker"""
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            try:
+                return await loop.run_in_executor(self._executor, self._send, path, payload, token)
+            except LiveKitAPIError as e:
+                if not self._should_retry(e, attempt, idempotent):
+                    raise
+            attempt += 1
+            await asyncio.sleep(self._delay(attempt))
+
+    async def create_room(self, name: str, empty_timeout: int = 300, max_participants: Optional[int] = None,
+                          metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Create a room (LiveKit returns the existing room if it already exists)
+
+        Args:
+            name: Room name
+            empty_timeout: Seconds before an empty room is closed
+            max_participants: Participant limit
+            metadata: Room metadata
+
+        Returns:
+            Room information
+        """
+        payload = {
+            "name": name,
+            "empty_timeout": empty_timeout,
+            "metadata": json.dumps(metadata if metadata is not None else {"created_at": int(time.time())})
+        }
+        if max_participants:
+            payload["max_participants"] = max_participants
+        return await self.arequest("livekit.RoomService/CreateRoom", payload)
+
+    async def delete_room(self, name: str) -> Dict[str, Any]:
+        """Delete a room"""
+        return await self.arequest("livekit.RoomService/DeleteRoom", {"room": name})
+
+    async def list_rooms(self, names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        List active rooms
+
+        Args:
+            names: Only these rooms (default: all)
+
+        Returns:
+            Room information
+        """
+        response = await self.arequest("livekit.RoomService/ListRooms", {"names": names or []})
+        return response.get("rooms", [])
+
+    async def list_participants(self, room: str) -> Dict[str, Any]:
+        """List the participants of a room"""
+        return await self.arequest("livekit.RoomService/ListParticipants", {"room": room})
+
+    async def create_rooms(self, names: Iterable[str], **kwargs) -> Dict[str, Union[Dict[str, Any], Exception]]:
+        """
+        Create several rooms concurrently
+
+        Args:
+            names: Room names
+            **kwargs: create_room() options
+
+        Returns:
+            Room information, or the exception raised, keyed by room name
+        """
+        names = list(names)
+        results = await asyncio.gather(*(self.create_room(name, **kwargs) for name in names),
+                                       return_exceptions=True)
+        return dict(zip(names, results))
+
+    async def delete_rooms(self, names: Iterable[str]) -> Dict[str, Union[bool, Exception]]:
+        """
+        Delete several rooms concurrently; rooms that are already gone count as deleted
+
+        Args:
+            names: Room names
+
+        Returns:
+            True, or the exception raised, keyed by room name
+        """
+        async def delete(name):
+            try:
+                await self.delete_room(name)
+            except LiveKitAPIError as e:
+                if not e.not_found:
+                    raise
+            return True
+
+        names = list(names)
+        results = await asyncio.gather(*(delete(name) for name in names), return_exceptions=True)
+        return dict(zip(names, results))
+
+    async def sweep_expired_rooms(self, max_age: float, prefix: str = "", only_empty: bool = True) -> List[str]:
+        """
+        Delete rooms older than max_age seconds
+
+        Args:
+            max_age: Age in seconds after which a room is deleted
+            prefix: Only rooms whose name starts with this
+            only_empty: Skip rooms that still have participants
+
+        Returns:
+            Names of the deleted rooms
+        """
+        cutoff = time.time() - max_age
+        expired = [
+            room["name"] for room in await self.list_rooms()
+            if room.get("name", "").startswith(prefix)
+            and int(room.get("creation_time") or 0) < cutoff
+            and not (only_empty and room.get("num_participants"))
+        ]
+        results = await self.delete_rooms(expired)
+        return [name for name, result in results.items() if result is True]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get request counts
+
+        Returns:
+            Requests sent, retries, failed requests and mean latency
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["mean_latency"] = stats["seconds"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+    def close(self):
+        """Stop the workers and close pooled connections"""
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    # Internals
+
+    def _send(self, path: str, payload: Dict[str, Any], token: Optional[str]) -> Dict[str, Any]:
+        """Send one request"""
+        start = time.perf_counter()
+        try:
+            response = self.session.post(
+                f"{self.api_url}/twirp/{path}",
+                json=payload,
+                headers={"Authorization": f"Bearer {token or self.token_provider()}"},
+                timeout=self.timeout
+            )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self._record(start, failed=True)
+            # Connect timeouts and refused connections never reach the server
+            sent = not (isinstance(e, requests.ConnectTimeout)
+                        or isinstance(getattr(e.args[0] if e.args else None, "reason", None), NewConnectionError))
+            raise LiveKitAPIError(f"{path}: {e}", code="unavailable", sent=sent) from e
+
+        if response.status_code != 200:
+            self._record(start, failed=True)
+            try:
+                error = response.json()
+            except ValueError:
+                error = {}
+            raise LiveKitAPIError(f"{path}: {error.get('msg') or response.text}",
+                                  status=response.status_code, code=error.get("code"))
+
+        self._record(start)
+        return response.json() if response.content else {}
+
+    def _should_retry(self, error: LiveKitAPIError, attempt: int, idempotent: bool = True) -> bool:
+        if attempt >= self.retries:
+            return False
+        if idempotent:
+            retry = error.status in RETRY_STATUSES or error.code in RETRY_TWIRP_CODES
+        else:
+            # The server may have acted on anything else, e.g. a read timeout
+            retry = not error.sent or error.status == 429
+        if retry:
+            with self._stats_lock:
+                self._stats["retries"] += 1
+        return retry
+
+    def _delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+    def _record(self, start: float, failed: bool = False):
+        with self._stats_lock:
+            self._stats["requests"] += 1
+            self._stats["seconds"] += time.perf_counter() - start
+            if failed:
+                self._stats["failures"] += 1
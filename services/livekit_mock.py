@@ -0,0 +1,169 @@
+# app/services/livekit_mock.py
+import json
+import time
+import uuid
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+
+import jwt
+
+
+class MockLiveKitServer:
+    """
+    Local stand-in for the LiveKit server API, for offline tests and load tests.
+
+    Serves the Twirp JSON endpoints the app uses (RoomService CreateRoom,
+    DeleteRoom, ListRooms and ListParticipants, and Egress
+    StartRoomCompositeEgress) from in-memory state, checks bearer tokens
+    when api_secret is set, and can inject latency and transient 503
+    failures. Use as a context manager or call start() and stop().
+
+        with MockLiveKitServer(api_secret="secret") as server:
+            service = LiveKitService("key", "secret", server.url)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, api_secret: Optional[str] = None,
+                 latency: float = 0.0, failure_rate: float = 0.0):
+        """
+        Initialize the server
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free one)
+            api_secret: Verify HS256 bearer tokens with this secret (None accepts any)
+            latency: Seconds added to every response
+            failure_rate: Share of requests answered with a retryable 503
+        """
+        self.api_secret = api_secret
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rooms: Dict[str, Dict[str, Any]] = {}
+        self.participants: Dict[str, list] = {}
+        self.requests = 0
+        self.failures_injected = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """HTTP URL of the server"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLiveKitServer":
+        """Start serving on a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockLiveKitServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def add_participant(self, room: str, identity: str):
+        """Simulate a participant joining a room"""
+        with self._lock:
+            self.participants.setdefault(room, []).append({"identity": identity, "state": "ACTIVE"})
+            if room in self.rooms:
+                self.rooms[room]["num_participants"] = len(self.participants[room])
+
+    def _handle(self, path: str, headers, body: Dict[str, Any]):
+        """
+        Answer one request
+
+        Returns:
+            HTTP status and JSON response
+        """
+        with self._lock:
+            self.requests += 1
+            if self.failure_rate and random.random() < self.failure_rate:
+                self.failures_injected += 1
+                return 503, {"code": "unavailable", "msg": "injected failure"}
+
+        if self.api_secret is not None:
+            auth = headers.get("Authorization", "")
+            try:
+                jwt.decode(auth[len("Bearer "):], self.api_secret, algorithms=["HS256"],
+                           options={"verify_aud": False})
+            except Exception:
+                return 401, {"code": "unauthenticated", "msg": "invalid token"}
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        method = path.rsplit("/", 1)[-1]
+        with self._lock:
+            if method == "CreateRoom":
+                name = body.get("name")
+                if not name:
+                    return 400, {"code": "invalid_argument", "msg": "name is required"}
+                room = self.rooms.get(name)
+                if room is None:
+                    room = {
+                        "sid": f"RM_{uuid.uuid4().hex[:12]}",
+                        "name": name,
+                        "empty_timeout": body.get("empty_timeout", 300),
+                        "max_participants": body.get("max_participants", 0),
+                        "creation_time": int(time.time()),
+                        "metadata": body.get("metadata", ""),
+                        "num_participants": 0
+                    }
+                    self.rooms[name] = room
+                return 200, dict(room)
+            if method == "DeleteRoom":
+                name = body.get("room")
+                if name not in self.rooms:
+                    return 404, {"code": "not_found", "msg": "room not found"}
+                del self.rooms[name]
+                self.participants.pop(name, None)
+                return 200, {}
+            if method == "ListRooms":
+                names = body.get("names") or list(self.rooms)
+                return 200, {"rooms": [dict(self.rooms[name]) for name in names if name in self.rooms]}
+            if method == "ListParticipants":
+                return 200, {"participants": list(self.participants.get(body.get("room"), []))}
+            if method == "StartRoomCompositeEgress":
+                return 200, {"egress_id": f"EG_{uuid.uuid4().hex[:12]}",
+                             "room_name": body.get("room_name"), "status": "EGRESS_STARTING"}
+        return 404, {"code": "bad_route", "msg": f"no handler for {path}"}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    body = None
+                if body is None:
+                    status, response = 400, {"code": "malformed", "msg": "invalid JSON"}
+                else:
+                    status, response = server._handle(self.path, self.headers, body)
+
+                data = json.dumps(response).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
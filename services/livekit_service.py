@@ -1,13 +1,148 @@
 # app/services/livekit_service.py
 import jwt
+import json
 import time
-from typing import Dict, Any, Optional
-import requests
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Hashable, Tuple
+
+from app.services.livekit_admin import LiveKitAdminClient, LiveKitAPIError
+
+# Grants of participant tokens unless the caller passes its own
+DEFAULT_PARTICIPANT_GRANTS = {
+    "roomJoin": True,
+    "canPublish": True,
+    "canSubscribe": True,
+    "canPublishData": True,
+}
+
+ADMIN_GRANTS = {
+    "roomCreate": True,
+    "roomList": True,
+    "roomRecord": True,
+    "roomAdmin": True
+}
+
+
+class TokenCache:
+    """
+    Cache of signed access tokens.
+
+    A cached token is returned as is until its refresh time, after which a
+    new one is signed. Callers that only need a token to still be valid
+    (the admin token) pass stale_while_refresh=True: between the refresh
+    time and expiry (less a safety margin) the cached token is returned
+    while a replacement is signed on a background thread. The cache is a
+    bounded LRU.
+    """
+
+    def __init__(self, max_entries: int = 1024, expiry_margin: float = 30.0):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of cached tokens (0 disables caching)
+            expiry_margin: Seconds before expiry after which a token is never handed out
+        """
+        self.max_entries = max_entries
+        self.expiry_margin = expiry_margin
+        self._entries: "OrderedDict[Hashable, Tuple[str, float, float]]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def get(self, key: Hashable, mint: Callable[[], Tuple[str, float, float]],
+            stale_while_refresh: bool = False) -> str:
+        """
+        Get a token, signing one if needed
+
+        Args:
+            key: Cache key covering everything that goes into the token
+            mint: Signs a new token and returns (token, refresh_at, expires_at)
+            stale_while_refresh: Return a token past its refresh time while
+                a replacement is signed in the background
+
+        Returns:
+            Token string
+        """
+        if not self.max_entries:
+            return mint()[0]
+
+        now = time.time()
+        refresh = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                usable_until = entry[2] - self.expiry_margin if stale_while_refresh else entry[1]
+            if entry is not None and now < usable_until:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                if now >= entry[1] and key not in self._refreshing:
+                    self._refreshing.add(key)
+                    refresh = True
+                token = entry[0]
+            else:
+                self.misses += 1
+                token = None
+
+        if token is None:
+            entry = mint()
+            self._put(key, entry)
+            return entry[0]
+
+        if refresh:
+            threading.Thread(target=self._refresh, args=(key, mint), daemon=True).start()
+        return token
+
+    def clear(self):
+        """Drop every cached token"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache usage
+
+        Returns:
+            Entry count, hits, misses and background refreshes
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes
+            }
+
+    def _put(self, key: Hashable, entry: Tuple[str, float, float]):
+        """Store a token, evicting the least recently used ones if full"""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _refresh(self, key: Hashable, mint: Callable[[], Tuple[str, float, float]]):
+        """Replace a token that reached its refresh time"""
+        try:
+            self._put(key, mint())
+            with self._lock:
+                self.refreshes += 1
+        except Exception as e:
+            print(f"Error refreshing LiveKit token: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
 
 class LiveKitService:
     """Service for managing LiveKit room and token creation"""
     
-    def __init__(self, api_key: str, api_secret: str, ws_url: str):
+    def __init__(self, api_key: str, api_secret: str, ws_url: str, token_cache_size: int = 1024,
+                 token_reuse_fraction: float = 0.5, admin_token_ttl: int = 600,
+                 http_pool_size: int = 10, http_timeout: float = 10.0, http_retries: int = 3):
         """
         Initialize LiveKit service
         
@@ -15,50 +150,76 @@ class LiveKitService:
             api_key: LiveKit API key
             api_secret: LiveKit API secret
             ws_url: LiveKit websocket URL
+            token_cache_size: Participant and admin tokens kept for reuse (0 disables reuse)
+            token_reuse_fraction: Share of a participant token's TTL during
+                which it is reused as is, so every token handed out keeps
+                most of its requested lifetime
+            admin_token_ttl: Lifetime of admin tokens in seconds; they are
+                reused until shortly before expiry
+            http_pool_size: Pooled keep-alive connections to the server API
+            http_timeout: Seconds to wait for a server API response
+            http_retries: Retries of transient server API failures
         """
         self.api_key = api_key
         self.api_secret = api_secret
         self.ws_url = ws_url
+        self.token_reuse_fraction = token_reuse_fraction
+        self.admin_token_ttl = admin_token_ttl
+        self.token_cache = TokenCache(max_entries=token_cache_size)
         # Extract host from ws URL for REST API calls
         self.api_url = ws_url.replace("ws://", "http://").replace("wss://", "https://")
         if self.api_url.endswith("/ws"):
             self.api_url = self.api_url[:-3]
+        
+        # Pooled server API client; its async methods serve bulk operations
+        self.admin_client = LiveKitAdminClient(
+            self.api_url,
+            token_provider=self._create_admin_token,
+            pool_size=http_pool_size,
+            read_timeout=http_timeout,
+            retries=http_retries
+        )
             
     def create_token(self, room_name: str, participant_name: str, participant_identity: str, 
-                    ttl: int = 86400, metadata: Optional[Dict[str, Any]] = None) -> str:
+                    ttl: int = 86400, metadata: Optional[Dict[str, Any]] = None,
+                    grants: Optional[Dict[str, Any]] = None) -> str:
         """
         Create a JWT token for LiveKit room access
         
+        Tokens are cached per identity, room, grants, name, metadata and
+        TTL, and reused until token_reuse_fraction of their TTL has passed.
+        
         Args:
             room_name: Name of the room to join
             participant_name: Display name of the participant
             participant_identity: Unique identifier for the participant
             ttl: Time to live in seconds (default: 24 hours)
             metadata: Additional metadata to include in the token
+            grants: Video grants (default: join, publish and subscribe)
             
         Returns:
             JWT token string
         """
-        now = int(time.time())
+        grants = {**(grants or DEFAULT_PARTICIPANT_GRANTS), "room": room_name}
+        key = (
+            participant_identity,
+            room_name,
+            json.dumps(grants, sort_keys=True),
+            participant_name,
+            json.dumps(metadata or {}, sort_keys=True, default=str),
+            ttl
+        )
         
-        payload = {
-            "exp": now + ttl,
-            "iss": self.api_key,
-            "nbf": now - 60,  # Valid from 1 minute ago
-            "video": {
-                "room": room_name,
-                "roomJoin": True,
-                "canPublish": True,
-                "canSubscribe": True,
-                "canPublishData": True,
-            },
-            "metadata": metadata or {},
-            "name": participant_name,
-            "sub": participant_identity
-        }
+        def mint():
+            token, issued_at = self._sign({
+                "video": grants,
+                "metadata": metadata or {},
+                "name": participant_name,
+                "sub": participant_identity
+            }, ttl)
+            return token, issued_at + ttl * self.token_reuse_fraction, issued_at + ttl
         
-        token = jwt.encode(payload, self.api_secret, algorithm="HS256")
-        return token
+        return self.token_cache.get(key, mint)
     
     def create_room(self, room_name: str, empty_timeout: int = 300) -> Dict[str, Any]:
         """
@@ -71,27 +232,14 @@ class LiveKitService:
         Returns:
             Room information
         """
-        # Create authorization token for API request
-        at = self._create_admin_token()
-        
-        # Create room
-        response = requests.post(
-            f"{self.api_url}/twirp/livekit.RoomService/CreateRoom",
-            json={
+        try:
+            return self.admin_client.request("livekit.RoomService/CreateRoom", {
                 "name": room_name,
                 "empty_timeout": empty_timeout,
                 "metadata": json.dumps({"created_at": int(time.time())})
-            },
-            headers={
-                "Authorization": f"Bearer {at}",
-                "Content-Type": "application/json"
-            }
-        )
-        
-        if response.status_code != 200:
-            raise Exception(f"Failed to create room: {response.text}")
-            
-        return response.json()
+            })
+        except LiveKitAPIError as e:
+            raise Exception(f"Failed to create room: {e}") from e
     
     def delete_room(self, room_name: str) -> Dict[str, Any]:
         """
@@ -103,23 +251,10 @@ class LiveKitService:
         Returns:
             Response information
         """
-        # Create authorization token for API request
-        at = self._create_admin_token()
-        
-        # Delete room
-        response = requests.post(
-            f"{self.api_url}/twirp/livekit.RoomService/DeleteRoom",
-            json={"name": room_name},
-            headers={
-                "Authorization": f"Bearer {at}",
-                "Content-Type": "application/json"
-            }
-        )
-        
-        if response.status_code != 200:
-            raise Exception(f"Failed to delete room: {response.text}")
-            
-        return response.json()
+        try:
+            return self.admin_client.request("livekit.RoomService/DeleteRoom", {"room": room_name})
+        except LiveKitAPIError as e:
+            raise Exception(f"Failed to delete room: {e}") from e
     
     def list_participants(self, room_name: str) -> Dict[str, Any]:
         """
@@ -131,44 +266,52 @@ class LiveKitService:
         Returns:
             List of participants
         """
-        # Create authorization token for API request
-        at = self._create_admin_token()
-        
-        # List participants
-        response = requests.post(
-            f"{self.api_url}/twirp/livekit.RoomService/ListParticipants",
-            json={"room": room_name},
-            headers={
-                "Authorization": f"Bearer {at}",
-                "Content-Type": "application/json"
-            }
-        )
-        
-        if response.status_code != 200:
-            raise Exception(f"Failed to list participants: {response.text}")
-            
-        return response.json()
+        try:
+            return self.admin_client.request("livekit.RoomService/ListParticipants", {"room": room_name})
+        except LiveKitAPIError as e:
+            raise Exception(f"Failed to list participants: {e}") from e
+    
+    def close(self):
+        """Close pooled server API connections"""
+        self.admin_client.close()
     
     def _create_admin_token(self) -> str:
         """
-        Create an admin token for LiveKit API access
+        Get an admin token for LiveKit API access
+        
+        One admin token is shared by every API request for its whole
+        validity window and re-signed in the background before it expires.
         
         Returns:
             JWT token string
         """
+        def mint():
+            token, issued_at = self._sign({"video": dict(ADMIN_GRANTS)}, self.admin_token_ttl)
+            expires_at = issued_at + self.admin_token_ttl
+            # Refresh one minute before the cache's expiry margin cuts in
+            return token, expires_at - self.token_cache.expiry_margin - 60, expires_at
+        
+        return self.token_cache.get(("__admin__",), mint, stale_while_refresh=True)
+    
+    def _sign(self, claims: Dict[str, Any], ttl: int) -> Tuple[str, int]:
+        """
+        Sign a token
+        
+        Args:
+            claims: Claims besides exp, iss and nbf
+            ttl: Time to live in seconds
+            
+        Returns:
+            Token string and the time it was issued
+        """
         now = int(time.time())
         
         payload = {
-            "exp": now + 600,  # 10 minutes
+            "exp": now + ttl,
             "iss": self.api_key,
             "nbf": now - 60,  # Valid from 1 minute ago
-            "video": {
-                "roomCreate": True,
-                "roomList": True,
-                "roomRecord": True,
-                "roomAdmin": True
-            }
+            **claims
         }
         
         token = jwt.encode(payload, self.api_secret, algorithm="HS256")
-        return token
\ No newline at end of file
+        return token, now
@@ -0,0 +1,222 @@
+# app/services/model_registry.py
+import os
+import time
+import logging
+import threading
+from typing import Dict, Any, Callable, Iterable, List, Optional, Set, Tuple
+
+
+def _load_whisper_model(name: str):
+    """Load a local Whisper model"""
+    import whisper
+    return whisper.load_model(name)
+
+
+def _load_spacy_model(name: str):
+    """Load a spaCy pipeline, downloading it once if it is missing"""
+    import spacy
+    try:
+        return spacy.load(name)
+    except OSError:
+        logging.warning(f"Spacy model {name} not found. Downloading...")
+        os.system(f"python -m spacy download {name}")
+        return spacy.load(name)
+
+
+class _ModelEntry:
+    """A loaded model with its reference count"""
+
+    def __init__(self):
+        self.model = None
+        self.ref_count = 0
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of heavy ML models (Whisper, spaCy).
+
+    Models are loaded lazily on first use, shared by every caller in the
+    process and reference counted, so each worker pays a model load only once.
+    Unreferenced models can optionally be evicted after an idle timeout.
+    """
+
+    def __init__(self, idle_timeout: Optional[float] = None):
+        """
+        Initialize the model registry
+
+        Args:
+            idle_timeout: Seconds an unreferenced model may stay loaded
+                before eviction (None keeps models loaded forever)
+        """
+        self.idle_timeout = idle_timeout
+        self._loaders: Dict[str, Callable[[str], Any]] = {
+            "whisper": _load_whisper_model,
+            "spacy": _load_spacy_model
+        }
+        self._entries: Dict[Tuple[str, str], _ModelEntry] = {}
+        self._warmed: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+        self._eviction_thread = None
+        self._stop_eviction = threading.Event()
+
+    def register_loader(self, kind: str, loader: Callable[[str], Any]):
+        """
+        Register a loader function for a model kind
+
+        Args:
+            kind: Model kind (e.g. "whisper")
+            loader: Function that loads a model given its name
+        """
+        self._loaders[kind] = loader
+
+    def acquire(self, kind: str, name: str) -> Any:
+        """
+        Get a model, loading it on first use, and take a reference to it
+
+        Args:
+            kind: Model kind (whisper, spacy)
+            name: Model name
+
+        Returns:
+            Loaded model
+        """
+        if kind not in self._loaders:
+            raise ValueError(f"Unknown model kind: {kind}")
+
+        with self._lock:
+            entry = self._entries.setdefault((kind, name), _ModelEntry())
+            entry.ref_count += 1
+            entry.last_used = time.time()
+
+        # Load outside the registry lock so other models are not blocked
+        with entry.lock:
+            if entry.model is None:
+                try:
+                    start = time.time()
+                    entry.model = self._loaders[kind](name)
+                    logging.info(f"Loaded {kind} model {name} in {time.time() - start:.2f}s")
+                except Exception:
+                    with self._lock:
+                        entry.ref_count -= 1
+                    raise
+
+        return entry.model
+
+    def release(self, kind: str, name: str):
+        """
+        Drop a reference to a model
+
+        Args:
+            kind: Model kind
+            name: Model name
+        """
+        with self._lock:
+            entry = self._entries.get((kind, name))
+            if entry and entry.ref_count > 0:
+                entry.ref_count -= 1
+                entry.last_used = time.time()
+
+    def warm_up(self, models: Iterable[Tuple[str, str]]):
+        """
+        Load models ahead of time, e.g. at boot
+
+        Each warmed model keeps one boot reference, so idle eviction never
+        unloads it; call cool_down() to drop those references.
+
+        Args:
+            models: (kind, name) pairs to load
+        """
+        for kind, name in models:
+            if (kind, name) in self._warmed:
+                continue
+            try:
+                self.acquire(kind, name)
+            except Exception as e:
+                logging.error(f"Error warming up {kind} model {name}: {e}")
+                continue
+            self._warmed.add((kind, name))
+
+    def cool_down(self):
+        """Drop the boot references taken by warm_up()"""
+        warmed, self._warmed = self._warmed, set()
+        for kind, name in warmed:
+            self.release(kind, name)
+
+    def evict_idle(self, max_idle: Optional[float] = None) -> List[Tuple[str, str]]:
+        """
+        Unload models that have no references and have been idle too long
+
+        Args:
+            max_idle: Idle time in seconds (default: the registry idle timeout)
+
+        Returns:
+            List of evicted (kind, name) pairs
+        """
+        max_idle = self.idle_timeout if max_idle is None else max_idle
+        if max_idle is None:
+            return []
+
+        now = time.time()
+        evicted = []
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.ref_count == 0 and now - entry.last_used >= max_idle:
+                    del self._entries[key]
+                    evicted.append(key)
+
+        for kind, name in evicted:
+            logging.info(f"Evicted idle {kind} model {name}")
+        return evicted
+
+    def start_idle_eviction(self, interval: float = 60.0):
+        """
+        Start a background thread that periodically evicts idle models
+
+        Args:
+            interval: Seconds between eviction sweeps
+        """
+        if self.idle_timeout is None or self._eviction_thread:
+            return
+
+        def sweep():
+            while not self._stop_eviction.wait(interval):
+                self.evict_idle()
+
+        self._stop_eviction.clear()
+        self._eviction_thread = threading.Thread(target=sweep)
+        self._eviction_thread.daemon = True
+        self._eviction_thread.start()
+
+    def stop_idle_eviction(self):
+        """Stop the background eviction thread"""
+        self._stop_eviction.set()
+        if self._eviction_thread:
+            self._eviction_thread.join(timeout=1.0)
+            self._eviction_thread = None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Get the loaded models and their reference counts
+
+        Returns:
+            List of model stats
+        """
+        with self._lock:
+            return [
+                {
+                    "kind": kind,
+                    "name": name,
+                    "loaded": entry.model is not None,
+                    "ref_count": entry.ref_count,
+                    "idle_seconds": time.time() - entry.last_used
+                }
+                for (kind, name), entry in self._entries.items()
+            ]
+
+
+# Shared registry for the whole process
+model_registry = ModelRegistry(
+    idle_timeout=float(os.getenv("MODEL_IDLE_TIMEOUT")) if os.getenv("MODEL_IDLE_TIMEOUT") else None
+)
@@ -0,0 +1,332 @@
+# app/services/password_hasher.py
+import os
+import hmac
+import time
+import string
+import hashlib
+import logging
+import secrets
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from app.utils.stats import percentile
+
+# Optional argon2 support (argon2-cffi)
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+# Optional fallback for hashes produced by other Werkzeug methods
+try:
+    from werkzeug.security import check_password_hash as _werkzeug_check
+except ImportError:
+    _werkzeug_check = None
+
+KDF_ALGORITHMS = ["scrypt", "pbkdf2", "argon2"]
+
+# Hashes written by UserService before encoded hashes were introduced:
+# hex PBKDF2-SHA256 with the salt stored in a separate field
+LEGACY_PBKDF2_ITERATIONS = 100000
+
+_SALT_CHARS = string.ascii_letters + string.digits
+
+
+class PasswordHasher:
+    """
+    Password hashing on a bounded worker pool.
+
+    Hashes are encoded as "method$salt$hash" in the same format Werkzeug's
+    generate_password_hash uses (e.g. "scrypt:32768:8:1$salt$hex"), or the
+    standard "$argon2id$..." string when argon2 is selected, so existing
+    hashes keep verifying and hashes written by older settings are upgraded
+    on the next successful login via verify_and_update().
+
+    At most max_workers hashes run at once and at most max_pending wait
+    behind them; callers beyond that wait up to acquire_timeout for a slot
+    and then get a TimeoutError instead of piling more work onto the CPU.
+    """
+
+    def __init__(self, algorithm: str = "scrypt", scrypt_n: int = 2 ** 15, scrypt_r: int = 8,
+                 scrypt_p: int = 1, pbkdf2_iterations: int = 600000, argon2_time_cost: int = 3,
+                 argon2_memory_cost: int = 65536, argon2_parallelism: int = 4,
+                 max_workers: Optional[int] = None, max_pending: int = 64,
+                 acquire_timeout: float = 10.0, window: int = 1000):
+        """
+        Initialize the password hasher
+
+        Args:
+            algorithm: KDF for new hashes (scrypt, pbkdf2, argon2)
+            scrypt_n: scrypt CPU/memory cost
+            scrypt_r: scrypt block size
+            scrypt_p: scrypt parallelism
+            pbkdf2_iterations: PBKDF2-SHA256 iterations
+            argon2_time_cost: argon2 iterations
+            argon2_memory_cost: argon2 memory in KiB
+            argon2_parallelism: argon2 lanes
+            max_workers: Hashes computed concurrently (default: CPU count)
+            max_pending: Hashes allowed to wait for a worker
+            acquire_timeout: Seconds to wait for a queue slot before failing
+            window: Number of recent operations kept for percentiles
+        """
+        if algorithm not in KDF_ALGORITHMS:
+            raise ValueError(f"Unknown password KDF: {algorithm}")
+        if algorithm == "argon2" and argon2 is None:
+            raise ValueError("argon2-cffi is required for the argon2 KDF")
+
+        self.algorithm = algorithm
+        self.scrypt_n = scrypt_n
+        self.scrypt_r = scrypt_r
+        self.scrypt_p = scrypt_p
+        self.pbkdf2_iterations = pbkdf2_iterations
+        self._argon2 = None
+        if argon2 is not None:
+            self._argon2 = argon2.PasswordHasher(
+                time_cost=argon2_time_cost,
+                memory_cost=argon2_memory_cost,
+                parallelism=argon2_parallelism
+            )
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.acquire_timeout = acquire_timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(self.max_workers + max_pending)
+
+        # Queueing metrics
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.in_flight = 0
+        self.running = 0
+        self.max_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+
+    @property
+    def method(self) -> str:
+        """Method prefix written for new hashes"""
+        if self.algorithm == "scrypt":
+            return f"scrypt:{self.scrypt_n}:{self.scrypt_r}:{self.scrypt_p}"
+        if self.algorithm == "pbkdf2":
+            return f"pbkdf2:sha256:{self.pbkdf2_iterations}"
+        return "argon2"
+
+    def hash(self, password: str) -> str:
+        """
+        Hash a password with the configured KDF
+
+        Args:
+            password: Password to hash
+
+        Returns:
+            Encoded hash
+        """
+        return self._submit(self._hash, password).result()
+
+    def verify(self, password: str, encoded: str, salt: Optional[str] = None) -> bool:
+        """
+        Check a password against a stored hash
+
+        Args:
+            password: Password to check
+            encoded: Stored hash
+            salt: Separate salt of a legacy UserService hash
+
+        Returns:
+            True if the password matches
+        """
+        return self._submit(self._verify, password, encoded, salt).result()
+
+    def verify_and_update(self, password: str, encoded: str,
+                          salt: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password and rehash it if the stored hash is outdated
+
+        Args:
+            password: Password to check
+            encoded: Stored hash
+            salt: Separate salt of a legacy UserService hash
+
+        Returns:
+            Tuple of (matches, new hash to store or None)
+        """
+        return self._submit(self._verify_and_update, password, encoded, salt).result()
+
+    def needs_rehash(self, encoded: str, salt: Optional[str] = None) -> bool:
+        """
+        Check whether a stored hash was written with different settings
+
+        Args:
+            encoded: Stored hash
+            salt: Separate salt of a legacy UserService hash
+
+        Returns:
+            True if the hash should be replaced on the next login
+        """
+        if salt is not None or not encoded:
+            return True
+        if encoded.startswith("$argon2"):
+            return self.algorithm != "argon2" or self._argon2.check_needs_rehash(encoded)
+        return self.algorithm == "argon2" or encoded.split("$", 1)[0] != self.method
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queueing metrics
+
+        Returns:
+            Queue depth, rejections and wait/run time percentiles
+        """
+        with self._lock:
+            waits = sorted(wait for wait, _ in self._recent)
+            runs = sorted(run for _, run in self._recent)
+            return {
+                "algorithm": self.method,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "running": self.running,
+                "queued": self.in_flight - self.running,
+                "max_in_flight": self.max_in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "rehashed": self.rehashed,
+                "wait_p50": percentile(waits, 50),
+                "wait_p95": percentile(waits, 95),
+                "wait_p99": percentile(waits, 99),
+                "run_p50": percentile(runs, 50),
+                "run_p95": percentile(runs, 95),
+                "run_p99": percentile(runs, 99)
+            }
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the worker pool
+
+        Args:
+            wait: Wait for queued hashes to finish
+        """
+        self._executor.shutdown(wait=wait)
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        """Run a hashing function on the pool, waiting for a queue slot"""
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise TimeoutError(f"Password hashing queue full after {self.acquire_timeout}s")
+
+        submitted = time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self.running += 1
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.running -= 1
+                    self.in_flight -= 1
+                    self.completed += 1
+                    self._recent.append((started - submitted, finished - started))
+                self._slots.release()
+
+        try:
+            return self._executor.submit(task)
+        except Exception:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+            raise
+
+    def _hash(self, password: str) -> str:
+        """Hash a password on the calling thread"""
+        if self.algorithm == "argon2":
+            return self._argon2.hash(password)
+        salt = "".join(secrets.choice(_SALT_CHARS) for _ in range(16))
+        return f"{self.method}${salt}${self._derive(self.method, password, salt)}"
+
+    def _verify(self, password: str, encoded: str, salt: Optional[str] = None) -> bool:
+        """Check a password on the calling thread"""
+        if not encoded:
+            return False
+
+        if salt is not None:
+            expected = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"),
+                                           LEGACY_PBKDF2_ITERATIONS).hex()
+            return hmac.compare_digest(expected, encoded)
+
+        if encoded.startswith("$argon2"):
+            if argon2 is None:
+                logging.error("argon2-cffi is required to verify argon2 password hashes")
+                return False
+            try:
+                return self._argon2.verify(encoded, password)
+            except (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError):
+                return False
+
+        if encoded.count("$") < 2:
+            return False
+        method, hash_salt, hashval = encoded.split("$", 2)
+        try:
+            return hmac.compare_digest(self._derive(method, password, hash_salt), hashval)
+        except ValueError:
+            if _werkzeug_check is not None:
+                return _werkzeug_check(encoded, password)
+            logging.error(f"Unsupported password hash method: {method}")
+            return False
+
+    def _verify_and_update(self, password: str, encoded: str,
+                           salt: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """Check a password and rehash it if needed, on the calling thread"""
+        if not self._verify(password, encoded, salt):
+            return False, None
+        if not self.needs_rehash(encoded, salt):
+            return True, None
+        with self._lock:
+            self.rehashed += 1
+        return True, self._hash(password)
+
+    @staticmethod
+    def _derive(method: str, password: str, salt: str) -> str:
+        """
+        Derive a hex digest for a Werkzeug-style method string
+
+        Args:
+            method: Method such as "scrypt:32768:8:1" or "pbkdf2:sha256:600000"
+            password: Password
+            salt: Salt
+
+        Returns:
+            Hex digest
+        """
+        name, *args = method.split(":")
+        password_bytes = password.encode("utf-8")
+        salt_bytes = salt.encode("utf-8")
+
+        if name == "scrypt":
+            n, r, p = (int(a) for a in args) if args else (2 ** 15, 8, 1)
+            return hashlib.scrypt(password_bytes, salt=salt_bytes, n=n, r=r, p=p,
+                                  maxmem=132 * n * r * p).hex()
+        if name == "pbkdf2":
+            hash_name = args[0] if args else "sha256"
+            iterations = int(args[1]) if len(args) > 1 else 600000
+            return hashlib.pbkdf2_hmac(hash_name, password_bytes, salt_bytes, iterations).hex()
+
+        raise ValueError(f"Unsupported password hash method: {method}")
+
+
+# Shared hasher for the process, configured from the environment
+password_hasher = PasswordHasher(
+    algorithm=os.getenv("PASSWORD_KDF", "scrypt"),
+    scrypt_n=int(os.getenv("PASSWORD_SCRYPT_N", 2 ** 15)),
+    pbkdf2_iterations=int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", 600000)),
+    max_workers=int(os.getenv("PASSWORD_HASH_WORKERS", 0)) or None,
+    max_pending=int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+)
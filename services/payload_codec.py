@@ -0,0 +1,343 @@
+# app/services/payload_codec.py
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+from typing import List, Dict, Any, Optional, Union
+
+# Optional fast serializers and compressors
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Encoded payloads start with MAGIC, a format version, a serializer id and a
+# compressor id. Anything without the header is a legacy JSON text payload.
+MAGIC = b"AIP"
+FORMAT_VERSION = 1
+
+SERIALIZERS = {"json": 1, "orjson": 2, "msgpack": 3}
+COMPRESSORS = {"none": 0, "zlib": 1, "zstd": 2}
+_SERIALIZER_NAMES = {v: k for k, v in SERIALIZERS.items()}
+_COMPRESSOR_NAMES = {v: k for k, v in COMPRESSORS.items()}
+
+
+def available_serializers() -> List[str]:
+    """Get the serializers usable in this environment"""
+    return [name for name in SERIALIZERS
+            if (name != "orjson" or orjson) and (name != "msgpack" or msgpack)]
+
+
+def available_compressors() -> List[str]:
+    """Get the compressors usable in this environment"""
+    return [name for name in COMPRESSORS if name != "zstd" or zstandard]
+
+
+class PayloadCodec:
+    """
+    Encodes stored payloads (interview data, transcript entries) as compact,
+    optionally compressed bytes with a version header.
+
+    Decoding accepts any header version/serializer/compressor that is
+    available, plus legacy plain JSON text, so existing rows keep working
+    and can be re-encoded lazily. A codec may be shared between threads;
+    zstd contexts are not thread-safe, so each thread gets its own.
+    """
+
+    def __init__(self, serializer: str = "auto", compressor: str = "auto",
+                 level: Optional[int] = None, min_compress_size: int = 256):
+        """
+        Initialize the codec
+
+        Args:
+            serializer: json, orjson, msgpack or auto (fastest available)
+            compressor: none, zlib, zstd or auto (zstd if available, else zlib)
+            level: Compression level (default: 3)
+            min_compress_size: Payloads smaller than this are stored uncompressed
+        """
+        if serializer == "auto":
+            serializer = "orjson" if orjson else "json"
+        if compressor == "auto":
+            compressor = "zstd" if zstandard else "zlib"
+        if serializer not in available_serializers():
+            raise ValueError(f"Serializer not available: {serializer}")
+        if compressor not in available_compressors():
+            raise ValueError(f"Compressor not available: {compressor}")
+
+        self.serializer = serializer
+        self.compressor = compressor
+        self.level = level if level is not None else 3
+        self.min_compress_size = min_compress_size
+        self._local = threading.local()
+
+    @property
+    def name(self) -> str:
+        """Short description of the codec"""
+        return f"{self.serializer}+{self.compressor}"
+
+    def encode(self, obj: Any) -> bytes:
+        """
+        Encode an object
+
+        Args:
+            obj: JSON-compatible object
+
+        Returns:
+            Header-prefixed payload bytes
+        """
+        body = self._serialize(obj, self.serializer)
+        compressor = self.compressor
+        if compressor != "none" and len(body) < self.min_compress_size:
+            compressor = "none"
+
+        if compressor == "zlib":
+            body = zlib.compress(body, self.level)
+        elif compressor == "zstd":
+            body = self._zstd_compressor().compress(body)
+
+        header = MAGIC + bytes([FORMAT_VERSION, SERIALIZERS[self.serializer], COMPRESSORS[compressor]])
+        return header + body
+
+    def decode(self, payload: Union[bytes, str, None]) -> Any:
+        """
+        Decode a payload written by any codec version, or legacy JSON text
+
+        Args:
+            payload: Stored payload
+
+        Returns:
+            Decoded object
+        """
+        if payload is None:
+            return None
+        if isinstance(payload, str):
+            return json.loads(payload)
+
+        payload = bytes(payload)
+        if not self.is_encoded(payload):
+            return json.loads(payload.decode("utf-8"))
+
+        version, serializer_id, compressor_id = payload[3], payload[4], payload[5]
+        if version > FORMAT_VERSION:
+            raise ValueError(f"Unsupported payload format version: {version}")
+
+        body = payload[6:]
+        compressor = _COMPRESSOR_NAMES.get(compressor_id)
+        if compressor == "zlib":
+            body = zlib.decompress(body)
+        elif compressor == "zstd":
+            if not zstandard:
+                raise ValueError("zstandard is required to decode this payload")
+            body = self._zstd_decompressor().decompress(body)
+        elif compressor != "none":
+            raise ValueError(f"Unknown payload compressor id: {compressor_id}")
+
+        serializer = _SERIALIZER_NAMES.get(serializer_id)
+        if serializer is None:
+            raise ValueError(f"Unknown payload serializer id: {serializer_id}")
+        return self._deserialize(body, serializer)
+
+    @staticmethod
+    def is_encoded(payload: Union[bytes, str, None]) -> bool:
+        """
+        Check whether a payload carries the codec header
+
+        Args:
+            payload: Stored payload
+
+        Returns:
+            True for codec payloads, False for legacy JSON text
+        """
+        return isinstance(payload, (bytes, bytearray, memoryview)) and bytes(payload[:3]) == MAGIC
+
+    def needs_migration(self, payload: Union[bytes, str, None]) -> bool:
+        """
+        Check whether a payload was written by a different codec configuration
+
+        Args:
+            payload: Stored payload
+
+        Returns:
+            True if re-encoding would change the stored format
+        """
+        if payload is None:
+            return False
+        if not self.is_encoded(payload):
+            return True
+        payload = bytes(payload)
+        if payload[3] != FORMAT_VERSION or payload[4] != SERIALIZERS[self.serializer]:
+            return True
+
+        compressor_id = payload[5]
+        if compressor_id == COMPRESSORS["none"]:
+            # Small bodies are stored uncompressed on purpose
+            return self.compressor != "none" and len(payload) - 6 >= self.min_compress_size
+        return compressor_id != COMPRESSORS[self.compressor]
+
+    def _zstd_compressor(self) -> "zstandard.ZstdCompressor":
+        """zstd compressor of the calling thread"""
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+        return compressor
+
+    def _zstd_decompressor(self) -> "zstandard.ZstdDecompressor":
+        """zstd decompressor of the calling thread"""
+        decompressor = getattr(self._local, "decompressor", None)
+        if decompressor is None:
+            decompressor = self._local.decompressor = zstandard.ZstdDecompressor()
+        return decompressor
+
+    def _serialize(self, obj: Any, serializer: str) -> bytes:
+        """Serialize an object to bytes"""
+        if serializer == "orjson":
+            return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+        if serializer == "msgpack":
+            return msgpack.packb(obj, default=str, use_bin_type=True)
+        return json.dumps(obj, default=str, separators=(",", ":")).encode("utf-8")
+
+    def _deserialize(self, body: bytes, serializer: str) -> Any:
+        """Deserialize bytes to an object"""
+        if serializer == "orjson":
+            if orjson:
+                return orjson.loads(body)
+            return json.loads(body.decode("utf-8"))
+        if serializer == "msgpack":
+            if not msgpack:
+                raise ValueError("msgpack is required to decode this payload")
+            return msgpack.unpackb(body, raw=False)
+        return json.loads(body.decode("utf-8"))
+
+
+def sample_interview_payload(num_turns: int = 40, seed: int = 0) -> Dict[str, Any]:
+    """
+    Build a realistic interview document for benchmarking
+
+    Args:
+        num_turns: Number of question/answer turns
+        seed: Random seed
+
+    Returns:
+        Interview data shaped like the documents saved by the app
+    """
+    rng = random.Random(seed)
+    words = ("the system design scale database latency cache team project python api "
+             "service deploy test customer requirement tradeoff performance queue "
+             "experience problem solution approach data model feature users").split()
+
+    def sentence(n):
+        return " ".join(rng.choice(words) for _ in range(n)).capitalize() + "."
+
+    transcript = []
+    t = 1700000000.0
+    for i in range(num_turns):
+        t += rng.uniform(5, 20)
+        transcript.append({"speaker": "interviewer", "text": sentence(rng.randint(12, 30)),
+                           "timestamp": t, "question_idx": i})
+        t += rng.uniform(20, 120)
+        transcript.append({
+            "speaker": "candidate", "text": " ".join(sentence(rng.randint(10, 25)) for _ in range(rng.randint(3, 8))),
+            "timestamp": t, "question_idx": i, "confidence": rng.random(),
+            "segments": [{"start": round(rng.uniform(0, 60), 2), "end": round(rng.uniform(60, 120), 2),
+                          "text": sentence(8)} for _ in range(rng.randint(2, 6))]
+        })
+
+    return {
+        "id": f"interview-{seed}",
+        "start_time": "2024-01-01T10:00:00",
+        "end_time": "2024-01-01T10:45:00",
+        "interview_type": "technical",
+        "job_description": " ".join(sentence(20) for _ in range(15)),
+        "resume_data": {"skills": rng.sample(words, 12), "summary": sentence(60)},
+        "questions": [{"text": sentence(20), "type": rng.choice(["technical", "behavioral"])}
+                      for _ in range(num_turns)],
+        "transcript": transcript,
+        "feedback": {
+            "overall_score": round(rng.uniform(4, 9), 1),
+            "strengths": [sentence(15) for _ in range(5)],
+            "improvements": [sentence(15) for _ in range(5)],
+            "per_question": [{"question_idx": i, "score": rng.randint(1, 10), "comment": sentence(25)}
+                             for i in range(num_turns)]
+        }
+    }
+
+
+def benchmark_codecs(payloads: Optional[List[Dict[str, Any]]] = None, repeat: int = 20) -> List[Dict[str, Any]]:
+    """
+    Measure size and speed of every available codec on interview payloads
+
+    Args:
+        payloads: Payloads to encode (default: synthetic interviews)
+        repeat: Number of timed rounds
+
+    Returns:
+        One result per codec, with the pretty JSON baseline the app used before
+    """
+    payloads = payloads or [sample_interview_payload(turns, seed)
+                            for seed, turns in enumerate((10, 25, 40, 60))]
+
+    baseline_text = [json.dumps(p, indent=2).encode("utf-8") for p in payloads]
+    baseline_size = sum(len(b) for b in baseline_text)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for b in baseline_text:
+            json.loads(b)
+    baseline_decode = (time.perf_counter() - start) / repeat
+
+    results = [{
+        "codec": "json-indent2 (legacy)",
+        "bytes": baseline_size,
+        "ratio": 1.0,
+        "encode_ms": None,
+        "decode_ms": baseline_decode * 1000
+    }]
+
+    for serializer in available_serializers():
+        for compressor in available_compressors():
+            codec = PayloadCodec(serializer=serializer, compressor=compressor, min_compress_size=0)
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                encoded = [codec.encode(p) for p in payloads]
+            encode_time = (time.perf_counter() - start) / repeat
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for e in encoded:
+                    codec.decode(e)
+            decode_time = (time.perf_counter() - start) / repeat
+
+            size = sum(len(e) for e in encoded)
+            results.append({
+                "codec": codec.name,
+                "bytes": size,
+                "ratio": baseline_size / size,
+                "encode_ms": encode_time * 1000,
+                "decode_ms": decode_time * 1000
+            })
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark interview payload codecs")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of timed rounds")
+    args = parser.parse_args()
+
+    print(f"{'codec':<24}{'bytes':>10}{'ratio':>8}{'encode ms':>12}{'decode ms':>12}")
+    for row in benchmark_codecs(repeat=args.repeat):
+        encode_ms = f"{row['encode_ms']:.2f}" if row["encode_ms"] is not None else "-"
+        print(f"{row['codec']:<24}{row['bytes']:>10}{row['ratio']:>8.2f}{encode_ms:>12}{row['decode_ms']:>12.2f}")
@@ -0,0 +1,268 @@
+# app/services/room_pool.py
+import time
+import uuid
+import asyncio
+import threading
+from collections import deque
+from typing import Dict, Any, Optional, List
+
+from app.services.livekit_service import LiveKitService, DEFAULT_PARTICIPANT_GRANTS
+
+# Grants of the interviewer participant that drives a pooled room
+INTERVIEWER_GRANTS = {**DEFAULT_PARTICIPANT_GRANTS, "roomAdmin": True}
+
+
+class RoomPool:
+    """
+    Pool of pre-created interview rooms.
+
+    A background thread keeps target_size rooms created on the LiveKit
+    server, configured for interviews and with an interviewer token
+    already signed. acquire() pops a ready room and signs the candidate's
+    token locally, so starting an interview needs no server API call.
+    Rooms left idle for max_idle seconds, which must be shorter than the
+    server's empty_timeout, and rooms released after an interview are
+    deleted in bulk by the same thread. When the pool runs dry, acquire()
+    creates a room inline.
+
+        pool = RoomPool(livekit_service, target_size=5).start()
+        room = pool.acquire(user_id)
+        ...
+        pool.release(room["room_name"])
+    """
+
+    def __init__(self, livekit: LiveKitService, target_size: int = 5, max_idle: float = 240.0,
+                 empty_timeout: int = 300, max_participants: int = 2, room_prefix: str = "interview-",
+                 interviewer_identity: str = "ai-interviewer", token_ttl: int = 86400,
+                 refill_interval: float = 5.0):
+        """
+        Initialize the pool
+
+        Args:
+            livekit: LiveKit service creating rooms and tokens
+            target_size: Ready rooms to keep (0 creates every room on demand)
+            max_idle: Seconds a ready room is kept before it is replaced
+            empty_timeout: Seconds before the server closes an empty room
+            max_participants: Participant limit of each room
+            room_prefix: Prefix of room names; the rest is the interview ID
+            interviewer_identity: Identity of the interviewer participant
+            token_ttl: Lifetime of the tokens handed out in seconds
+            refill_interval: Maximum seconds between background refills
+
+        Raises:
+            ValueError: If max_idle is not shorter than empty_timeout
+        """
+        if max_idle >= empty_timeout:
+            raise ValueError("max_idle must be shorter than empty_timeout")
+
+        self.livekit = livekit
+        self.target_size = target_size
+        self.max_idle = max_idle
+        self.empty_timeout = empty_timeout
+        self.max_participants = max_participants
+        self.room_prefix = room_prefix
+        self.interviewer_identity = interviewer_identity
+        self.token_ttl = token_ttl
+        self.refill_interval = refill_interval
+
+        self._ready: "deque[Dict[str, Any]]" = deque()
+        self._released: List[str] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {"warm": 0, "cold": 0, "created": 0, "reclaimed": 0, "released": 0, "failures": 0}
+
+    def start(self) -> "RoomPool":
+        """Start the background thread that fills and reclaims the pool"""
+        if self._thread:
+            return self
+
+        def run():
+            while not self._stop.is_set():
+                try:
+                    self.replenish()
+                except Exception as e:
+                    print(f"Error replenishing room pool: {e}")
+                self._wake.wait(self.refill_interval)
+                self._wake.clear()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="room-pool", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, drain: bool = True):
+        """
+        Stop the background thread
+
+        Args:
+            drain: Delete the ready and released rooms
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=self.livekit.admin_client.timeout[1] * 2)
+            self._thread = None
+
+        if drain:
+            with self._lock:
+                names = [room["room_name"] for room in self._ready] + self._released
+                self._ready.clear()
+                self._released = []
+            self._delete(names)
+
+    def acquire(self, participant_identity: str, participant_name: Optional[str] = None,
+                metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Assign a room to a new interview
+
+        Args:
+            participant_identity: Identity of the candidate
+            participant_name: Display name of the candidate (default: identity)
+            metadata: Metadata to include in the candidate's token
+
+        Returns:
+            Interview ID, room name, candidate token, interviewer token and
+            whether the room came from the pool
+        """
+        now = time.time()
+        room = None
+        with self._lock:
+            while self._ready:
+                candidate = self._ready.popleft()
+                if now - candidate["created_at"] < self.max_idle:
+                    room = candidate
+                    break
+                # Too close to the server closing it; the thread deletes it
+                self._released.append(candidate["room_name"])
+            self._stats["warm" if room else "cold"] += 1
+        self._wake.set()
+
+        if room is None:
+            room = self._create_inline()
+
+        token = self.livekit.create_token(
+            room_name=room["room_name"],
+            participant_name=participant_name or participant_identity,
+            participant_identity=participant_identity,
+            ttl=self.token_ttl,
+            metadata=metadata
+        )
+        return {
+            "interview_id": room["interview_id"],
+            "room_name": room["room_name"],
+            "token": token,
+            "interviewer_token": room["interviewer_token"],
+            "warm": room["warm"]
+        }
+
+    def release(self, room_name: str):
+        """
+        Hand back the room of a finished interview for deletion
+
+        Args:
+            room_name: Name of the room
+        """
+        with self._lock:
+            self._released.append(room_name)
+            self._stats["released"] += 1
+        self._wake.set()
+
+    def replenish(self):
+        """Delete released and idle rooms, then create rooms up to target_size"""
+        cutoff = time.time() - self.max_idle
+        with self._lock:
+            expired = []
+            # Rooms are appended as they are created, so the oldest come first
+            while self._ready and self._ready[0]["created_at"] <= cutoff:
+                expired.append(self._ready.popleft()["room_name"])
+            released, self._released = self._released, []
+            self._stats["reclaimed"] += len(expired)
+            missing = self.target_size - len(self._ready)
+
+        self._delete(expired + released)
+        if missing > 0 and not self._stop.is_set():
+            self._create(missing)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics
+
+        Returns:
+            Ready rooms, warm and cold assignments, rooms created,
+            reclaimed and released, and failed server API calls
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["ready"] = len(self._ready)
+        return stats
+
+    # Internals
+
+    def _new_room(self) -> Dict[str, Any]:
+        interview_id = str(uuid.uuid4())
+        return {"interview_id": interview_id, "room_name": f"{self.room_prefix}{interview_id}"}
+
+    def _room_options(self) -> Dict[str, Any]:
+        return {
+            "empty_timeout": self.empty_timeout,
+            "max_participants": self.max_participants,
+            "metadata": {"created_at": int(time.time()), "pooled": True}
+        }
+
+    def _prepare(self, room: Dict[str, Any], warm: bool) -> Dict[str, Any]:
+        """Sign the interviewer token of a created room"""
+        room["interviewer_token"] = self.livekit.create_token(
+            room_name=room["room_name"],
+            participant_name="AI Interviewer",
+            participant_identity=self.interviewer_identity,
+            ttl=self.token_ttl,
+            grants=INTERVIEWER_GRANTS
+        )
+        room["created_at"] = time.time()
+        room["warm"] = warm
+        return room
+
+    def _create(self, count: int):
+        """Create rooms concurrently and add them to the pool"""
+        rooms = {room["room_name"]: room for room in (self._new_room() for _ in range(count))}
+        results = asyncio.run(self.livekit.admin_client.create_rooms(rooms, **self._room_options()))
+
+        created = []
+        for name, result in results.items():
+            if isinstance(result, Exception):
+                print(f"Error creating pooled room {name}: {result}")
+                continue
+            created.append(self._prepare(rooms[name], warm=True))
+
+        with self._lock:
+            self._ready.extend(created)
+            self._stats["created"] += len(created)
+            self._stats["failures"] += len(results) - len(created)
+
+    def _create_inline(self) -> Dict[str, Any]:
+        """Create a room for an interview that found the pool empty"""
+        room = self._new_room()
+        options = self._room_options()
+        try:
+            asyncio.run(self.livekit.admin_client.create_room(room["room_name"], **options))
+        except Exception as e:
+            # The server still creates the room when the first participant joins
+            print(f"Error creating room {room['room_name']}: {e}")
+            with self._lock:
+                self._stats["failures"] += 1
+        return self._prepare(room, warm=False)
+
+    def _delete(self, names: List[str]):
+        """Delete rooms concurrently, keeping failures for the next pass"""
+        if not names:
+            return
+        results = asyncio.run(self.livekit.admin_client.delete_rooms(names))
+        failed = [name for name, result in results.items() if result is not True]
+        for name in failed:
+            print(f"Error deleting room {name}: {results[name]}")
+        with self._lock:
+            self._stats["failures"] += len(failed)
+            if not self._stop.is_set():
+                self._released.extend(failed)
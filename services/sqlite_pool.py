@@ -0,0 +1,157 @@
+# app/services/sqlite_pool.py
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+
+# Pragmas applied to every pooled connection
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",       # readers never block the writer
+    "synchronous": "NORMAL",     # safe with WAL, avoids an fsync per commit
+    "busy_timeout": 5000,        # wait for the write lock instead of failing
+    "temp_store": "MEMORY",
+    "cache_size": -16000,        # 16MB page cache per connection
+    "mmap_size": 134217728       # 128MB memory-mapped I/O
+}
+
+
+class SQLitePool:
+    """
+    Thread-safe pool of SQLite connections in WAL mode.
+
+    Connections are opened once with tuned pragmas and reused, so each
+    connection keeps its prepared statement cache. Writes go through
+    transaction(), which takes the write lock up front (BEGIN IMMEDIATE) so
+    concurrent writers queue on busy_timeout instead of failing with
+    "database is locked" when upgrading a read lock.
+    """
+
+    def __init__(self, db_path: str, pool_size: int = 5, timeout: float = 30.0,
+                 pragmas: Optional[Dict[str, Any]] = None, cached_statements: int = 256):
+        """
+        Initialize the connection pool
+
+        Args:
+            db_path: Path to the SQLite database file
+            pool_size: Maximum number of open connections
+            timeout: Seconds to wait for a free connection or the write lock
+            pragmas: Pragma overrides merged over DEFAULT_PRAGMAS
+            cached_statements: Prepared statements cached per connection
+        """
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        """Open and configure a new connection"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            isolation_level=None,  # transactions are managed explicitly
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        """Get an idle connection, opening one if the pool is not full"""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._opened < self.pool_size:
+                self._opened += 1
+                try:
+                    return self._open()
+                except Exception:
+                    self._opened -= 1
+                    raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No SQLite connection available after {self.timeout}s")
+
+    def _release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool"""
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        self._idle.put_nowait(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a connection for reads (autocommit)
+
+        Yields:
+            Pooled SQLite connection
+        """
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self, immediate: bool = True) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a connection inside a transaction that commits on success
+        and rolls back on error
+
+        Args:
+            immediate: Take the write lock at BEGIN (use for writes)
+
+        Yields:
+            Pooled SQLite connection
+        """
+        conn = self._acquire()
+        try:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+        finally:
+            self._release(conn)
+
+    def close(self):
+        """Close all idle connections; busy ones are closed when returned"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool usage
+
+        Returns:
+            Open and idle connection counts
+        """
+        return {
+            "pool_size": self.pool_size,
+            "open_connections": self._opened,
+            "idle_connections": self._idle.qsize()
+        }
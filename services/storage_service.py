@@ -1,29 +1,124 @@
 # app/services/storage_service.py
 import os
 import json
+import base64
 import sqlite3
-from typing import List, Dict, Any, Optional
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional
 import uuid
 from datetime import datetime
+from app.services.sqlite_pool import SQLitePool
+from app.services.payload_codec import PayloadCodec
+
+# Statements are kept as constants so each pooled connection reuses its
+# prepared statement from the sqlite3 statement cache
+SQL_UPSERT_USER = '''
+INSERT OR REPLACE INTO users (id, username, email, created_at, last_login)
+VALUES (?, ?, ?, ?, ?)
+'''
+SQL_GET_USER = 'SELECT * FROM users WHERE id = ?'
+SQL_UPSERT_INTERVIEW = '''
+INSERT OR REPLACE INTO interviews (id, user_id, start_time, end_time, interview_type, score, data)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+SQL_GET_INTERVIEW = 'SELECT * FROM interviews WHERE id = ?'
+SQL_GET_INTERVIEW_DATA = 'SELECT data FROM interviews WHERE id = ?'
+SQL_UPDATE_INTERVIEW_DATA = 'UPDATE interviews SET data = ? WHERE id = ?'
+SQL_GET_USER_INTERVIEWS = '''
+SELECT * FROM interviews 
+WHERE user_id = ? 
+ORDER BY COALESCE(start_time, '') DESC, id DESC
+LIMIT ?
+'''
+# Summary projection: served from idx_interviews_user_start without touching the data blob.
+# Rows without a start time sort last (as '') so keyset paging still reaches them.
+SUMMARY_COLUMNS = 'id, user_id, start_time, end_time, interview_type, score'
+SQL_GET_INTERVIEW_SUMMARIES = f'''
+SELECT {SUMMARY_COLUMNS} FROM interviews
+WHERE user_id = ?
+ORDER BY COALESCE(start_time, '') DESC, id DESC
+LIMIT ?
+'''
+SQL_GET_INTERVIEW_SUMMARIES_AFTER = f'''
+SELECT {SUMMARY_COLUMNS} FROM interviews
+WHERE user_id = ? AND COALESCE(start_time, '') <= ?
+  AND (COALESCE(start_time, '') < ? OR id < ?)
+ORDER BY COALESCE(start_time, '') DESC, id DESC
+LIMIT ?
+'''
+SQL_DELETE_INTERVIEW = 'DELETE FROM interviews WHERE id = ?'
+SQL_INSERT_TRANSCRIPT_ENTRY = '''
+INSERT INTO transcript_entries (interview_id, seq, entry_time, data)
+VALUES (?, ?, ?, ?)
+'''
+SQL_GET_TRANSCRIPT = 'SELECT data FROM transcript_entries WHERE interview_id = ? ORDER BY seq'
+SQL_NEXT_TRANSCRIPT_SEQ = 'SELECT COALESCE(MAX(seq) + 1, 0) FROM transcript_entries WHERE interview_id = ?'
+SQL_DELETE_TRANSCRIPT = 'DELETE FROM transcript_entries WHERE interview_id = ?'
 
 class StorageService:
     """Service for data storage and retrieval"""
     
-    def __init__(self, db_path: str = "app_data.db"):
+    def __init__(self, db_path: str = "app_data.db", pool_size: int = 5,
+                 transcript_flush_size: int = 20, transcript_flush_interval: float = 1.0,
+                 transcript_max_delay: float = 5.0, codec: Optional[PayloadCodec] = None):
         """
         Initialize storage service
         
         Args:
             db_path: Path to the SQLite database file
+            pool_size: Maximum number of pooled database connections
+            transcript_flush_size: Buffered transcript entries that trigger a flush
+            transcript_flush_interval: Quiet period in seconds before buffered
+                transcript entries are flushed
+            transcript_max_delay: Maximum seconds an entry may stay buffered
+            codec: Codec for stored payloads (default: compressed orjson/JSON)
         """
         self.db_path = db_path
+        self.pool = SQLitePool(db_path, pool_size=pool_size)
+        self.codec = codec or PayloadCodec()
+        
+        # Write-behind buffer for transcript entries
+        self.transcript_flush_size = transcript_flush_size
+        self.transcript_flush_interval = transcript_flush_interval
+        self.transcript_max_delay = transcript_max_delay
+        self._transcript_lock = threading.Lock()
+        self._pending_entries = []
+        self._first_pending_at = None
+        self._flush_timer = None
+        
         self._init_db()
     
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run several statements atomically on one pooled connection
+        
+        Yields:
+            SQLite connection inside a write transaction
+        """
+        with self.pool.transaction() as conn:
+            yield conn
+    
+    def close(self):
+        """Flush buffered writes and close pooled database connections"""
+        self.flush_transcript_entries()
+        self.pool.close()
+    
     def _init_db(self):
         """Initialize database tables if they don't exist"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.transaction() as conn:
+            self._create_tables(conn.cursor())
+    
+    def _create_tables(self, cursor: sqlite3.Cursor):
+        """
+        Create database tables
         
+        Args:
+            cursor: Cursor inside the schema transaction
+        """
         # Create users table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -43,13 +138,81 @@ class StorageService:
             start_time TEXT,
             end_time TEXT,
             interview_type TEXT,
+            score REAL,
             data TEXT,
             FOREIGN KEY (user_id) REFERENCES users (id)
         )
         ''')
         
-        conn.commit()
-        conn.close()
+        # Summary columns added after the first release
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(interviews)")}
+        if "score" not in columns:
+            cursor.execute("ALTER TABLE interviews ADD COLUMN score REAL")
+            self._backfill_scores(cursor)
+        
+        # History listings filter by user and sort by start time (missing
+        # start times as ''); the trailing summary columns make the index
+        # covering for the summary projection. Replaces the first version,
+        # which sorted on the raw column.
+        index_sql = cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = 'idx_interviews_user_start'"
+        ).fetchone()
+        if index_sql and "COALESCE" not in index_sql[0]:
+            cursor.execute("DROP INDEX idx_interviews_user_start")
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_interviews_user_start
+        ON interviews (user_id, COALESCE(start_time, '') DESC, id DESC,
+                       start_time, end_time, interview_type, score)
+        ''')
+        
+        # Create transcript entries table (append-only, one row per entry)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transcript_entries (
+            interview_id TEXT,
+            seq INTEGER,
+            entry_time TEXT,
+            data TEXT,
+            PRIMARY KEY (interview_id, seq),
+            FOREIGN KEY (interview_id) REFERENCES interviews (id)
+        ) WITHOUT ROWID
+        ''')
+    
+    def _backfill_scores(self, cursor: sqlite3.Cursor):
+        """
+        Populate the score column for rows stored before it existed
+        
+        Args:
+            cursor: Cursor inside the schema transaction
+        """
+        rows = cursor.execute("SELECT id, data FROM interviews").fetchall()
+        updates = []
+        for interview_id, data in rows:
+            try:
+                score = self._extract_score(self.codec.decode(data) or {})
+            except (TypeError, ValueError):
+                continue
+            if score is not None:
+                updates.append((score, interview_id))
+        cursor.executemany("UPDATE interviews SET score = ? WHERE id = ?", updates)
+    
+    def _extract_score(self, interview_data: Dict[str, Any]) -> Optional[float]:
+        """
+        Get the overall score of an interview for the summary column
+        
+        Args:
+            interview_data: Interview data
+            
+        Returns:
+            Overall score or None if the interview has not been scored
+        """
+        feedback = interview_data.get("feedback")
+        candidates = [interview_data.get("score")]
+        if isinstance(feedback, dict):
+            candidates += [feedback.get("overall_score"), feedback.get("score")]
+        for value in candidates:
+            if isinstance(value, (int, float)):
+                return float(value)
+        return None
     
     def save_user(self, user_data: Dict[str, Any]) -> str:
         """
@@ -62,22 +225,15 @@ class StorageService:
             User ID
         """
         user_id = user_data.get("id") or str(uuid.uuid4())
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
         
-        cursor.execute('''
-        INSERT OR REPLACE INTO users (id, username, email, created_at, last_login)
-        VALUES (?, ?, ?, ?, ?)
-        ''', (
-            user_id,
-            user_data.get("username", ""),
-            user_data.get("email", ""),
-            user_data.get("created_at", datetime.now().isoformat()),
-            datetime.now().isoformat()
-        ))
-        
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            conn.execute(SQL_UPSERT_USER, (
+                user_id,
+                user_data.get("username", ""),
+                user_data.get("email", ""),
+                user_data.get("created_at", datetime.now().isoformat()),
+                datetime.now().isoformat()
+            ))
         
         return user_id
     
@@ -91,14 +247,8 @@ class StorageService:
         Returns:
             User data or None if not found
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-        row = cursor.fetchone()
-        
-        conn.close()
+        with self.pool.connection() as conn:
+            row = conn.execute(SQL_GET_USER, (user_id,)).fetchone()
         
         if row:
             return dict(row)
@@ -117,26 +267,202 @@ class StorageService:
         Returns:
             Interview ID
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        INSERT OR REPLACE INTO interviews (id, user_id, start_time, end_time, interview_type, data)
-        VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            interview_id,
-            user_id,
-            interview_data.get("start_time", datetime.now().isoformat()),
-            interview_data.get("end_time", None),
-            interview_data.get("interview_type", "general"),
-            json.dumps(interview_data)
-        ))
-        
-        conn.commit()
-        conn.close()
+        # The transcript lives in transcript_entries; keep it out of the blob
+        transcript = interview_data.get("transcript")
+        if isinstance(transcript, list):
+            interview_data = {k: v for k, v in interview_data.items() if k != "transcript"}
+        else:
+            transcript = None
+        
+        # Serialize before taking the write lock
+        payload = self.codec.encode(interview_data)
+        
+        self.flush_transcript_entries()
+        
+        with self.transaction() as conn:
+            conn.execute(SQL_UPSERT_INTERVIEW, (
+                interview_id,
+                user_id,
+                interview_data.get("start_time", datetime.now().isoformat()),
+                interview_data.get("end_time", None),
+                interview_data.get("interview_type", "general"),
+                self._extract_score(interview_data),
+                payload
+            ))
+            
+            if transcript:
+                # Only entries not stored yet are appended
+                stored = conn.execute(SQL_NEXT_TRANSCRIPT_SEQ, (interview_id,)).fetchone()[0]
+                conn.executemany(SQL_INSERT_TRANSCRIPT_ENTRY, [
+                    (interview_id, seq) + self._transcript_row(transcript[seq])
+                    for seq in range(stored, len(transcript))
+                ])
         
         return interview_id
     
+    def append_transcript_entry(self, interview_id: str, entry: Dict[str, Any]):
+        """
+        Append a transcript entry to an interview
+        
+        Entries are buffered and written in batches, either when the buffer
+        fills up or after a short quiet period, so adding an entry does not
+        rewrite the interview document. Sequence numbers are assigned in the
+        write transaction, so several processes can append to one interview.
+        
+        Args:
+            interview_id: Interview ID
+            entry: Transcript entry
+        """
+        flush_now = False
+        row = self._transcript_row(entry)
+        
+        with self._transcript_lock:
+            self._pending_entries.append((interview_id,) + row)
+            now = time.time()
+            if self._first_pending_at is None:
+                self._first_pending_at = now
+            
+            if len(self._pending_entries) >= self.transcript_flush_size:
+                flush_now = True
+            elif now - self._first_pending_at < self.transcript_max_delay:
+                # Debounce: push the flush back while entries keep arriving
+                self._schedule_flush()
+            elif self._flush_timer is None:
+                self._schedule_flush()
+        
+        if flush_now:
+            self.flush_transcript_entries()
+    
+    def _next_transcript_seq(self, conn: sqlite3.Connection, interview_id: str) -> int:
+        """
+        Get the next transcript sequence number inside a write transaction
+        
+        Rows saved before transcript_entries existed keep their transcript in
+        the data blob; it is moved into transcript_entries before the first
+        append so the appended entries follow it instead of replacing it on read.
+        
+        Args:
+            conn: Connection inside a write transaction
+            interview_id: Interview ID
+            
+        Returns:
+            Next transcript sequence number of the interview
+        """
+        next_seq = conn.execute(SQL_NEXT_TRANSCRIPT_SEQ, (interview_id,)).fetchone()[0]
+        if next_seq:
+            return next_seq
+        
+        row = conn.execute(SQL_GET_INTERVIEW_DATA, (interview_id,)).fetchone()
+        data = self.codec.decode(row["data"]) if row else None
+        inline = data.get("transcript") if isinstance(data, dict) else None
+        if not isinstance(inline, list) or not inline:
+            return 0
+        
+        conn.executemany(SQL_INSERT_TRANSCRIPT_ENTRY, [
+            (interview_id, seq) + self._transcript_row(entry) for seq, entry in enumerate(inline)
+        ])
+        data = {k: v for k, v in data.items() if k != "transcript"}
+        conn.execute(SQL_UPDATE_INTERVIEW_DATA, (self.codec.encode(data), interview_id))
+        return len(inline)
+    
+    def flush_transcript_entries(self):
+        """Write all buffered transcript entries in one transaction"""
+        with self._transcript_lock:
+            batch = self._pending_entries
+            self._pending_entries = []
+            self._first_pending_at = None
+            if self._flush_timer:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        
+        if not batch:
+            return
+        
+        try:
+            with self.transaction() as conn:
+                next_seqs: Dict[str, int] = {}
+                rows = []
+                for interview_id, entry_time, payload in batch:
+                    if interview_id not in next_seqs:
+                        next_seqs[interview_id] = self._next_transcript_seq(conn, interview_id)
+                    rows.append((interview_id, next_seqs[interview_id], entry_time, payload))
+                    next_seqs[interview_id] += 1
+                conn.executemany(SQL_INSERT_TRANSCRIPT_ENTRY, rows)
+        except Exception:
+            # Keep the entries and retry them after the flush interval
+            with self._transcript_lock:
+                self._pending_entries = batch + self._pending_entries
+                self._first_pending_at = self._first_pending_at or time.time()
+                self._schedule_flush()
+            raise
+    
+    def get_transcript(self, interview_id: str) -> List[Dict[str, Any]]:
+        """
+        Get the transcript entries of an interview in order
+        
+        Args:
+            interview_id: Interview ID
+            
+        Returns:
+            List of transcript entries
+        """
+        self.flush_transcript_entries()
+        with self.pool.connection() as conn:
+            rows = conn.execute(SQL_GET_TRANSCRIPT, (interview_id,)).fetchall()
+        return [self.codec.decode(row["data"]) for row in rows]
+    
+    def _schedule_flush(self):
+        """(Re)arm the flush timer (caller holds the transcript lock)"""
+        if self._flush_timer:
+            self._flush_timer.cancel()
+        self._flush_timer = threading.Timer(self.transcript_flush_interval, self._timed_flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+    
+    def _timed_flush(self):
+        """Flush from the timer thread"""
+        try:
+            self.flush_transcript_entries()
+        except Exception as e:
+            print(f"Error flushing transcript entries: {e}")
+    
+    def _transcript_row(self, entry: Dict[str, Any]) -> tuple:
+        """Build the entry_time and data columns of a transcript_entries row"""
+        entry_time = entry.get("timestamp") if isinstance(entry, dict) else None
+        return (str(entry_time) if entry_time is not None else None, self.codec.encode(entry))
+    
+    def _materialize_transcripts(self, conn: sqlite3.Connection, interviews: List[Dict[str, Any]]):
+        """
+        Attach stored transcript entries to interview documents
+        
+        Args:
+            conn: Pooled connection
+            interviews: Interview rows with decoded data
+        """
+        if not interviews:
+            return
+        
+        by_id = {interview["id"]: interview for interview in interviews}
+        placeholders = ",".join("?" * len(by_id))
+        rows = conn.execute(
+            f"SELECT interview_id, data FROM transcript_entries "
+            f"WHERE interview_id IN ({placeholders}) ORDER BY interview_id, seq",
+            list(by_id)
+        ).fetchall()
+        
+        transcripts: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            transcripts.setdefault(row["interview_id"], []).append(self.codec.decode(row["data"]))
+        
+        for interview_id, interview in by_id.items():
+            data = interview["data"]
+            if interview_id in transcripts:
+                data["transcript"] = transcripts[interview_id]
+            elif not isinstance(data.get("transcript"), list):
+                # Rows written before transcript_entries keep their inline
+                # transcript until the first append moves it
+                data["transcript"] = []
+    
     def get_interview_data(self, interview_id: str) -> Optional[Dict[str, Any]]:
         """
         Get interview data from the database
@@ -147,20 +473,18 @@ class StorageService:
         Returns:
             Interview data or None if not found
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM interviews WHERE id = ?', (interview_id,))
-        row = cursor.fetchone()
+        self.flush_transcript_entries()
         
-        conn.close()
-        
-        if row:
+        with self.pool.connection() as conn:
+            row = conn.execute(SQL_GET_INTERVIEW, (interview_id,)).fetchone()
+            if not row:
+                return None
+            
             result = dict(row)
-            result["data"] = json.loads(result["data"])
-            return result
-        return None
+            result["data"] = self.codec.decode(result["data"])
+            self._materialize_transcripts(conn, [result])
+        
+        return result
     
     def get_user_interviews(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """
@@ -173,27 +497,66 @@ class StorageService:
         Returns:
             List of interview data
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        self.flush_transcript_entries()
         
-        cursor.execute('''
-        SELECT * FROM interviews 
-        WHERE user_id = ? 
-        ORDER BY start_time DESC
-        LIMIT ?
-        ''', (user_id, limit))
+        with self.pool.connection() as conn:
+            rows = conn.execute(SQL_GET_USER_INTERVIEWS, (user_id, limit)).fetchall()
+            
+            results = []
+            for row in rows:
+                interview = dict(row)
+                interview["data"] = self.codec.decode(interview["data"])
+                results.append(interview)
+            
+            self._materialize_transcripts(conn, results)
+            
+        return results
+    
+    def get_user_interview_summaries(self, user_id: str, limit: int = 20,
+                                     cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get one page of a user's interview history without loading interview data
         
-        rows = cursor.fetchall()
-        conn.close()
+        Uses keyset pagination on (start_time, id), so every page is an
+        index range scan regardless of how deep the user pages.
         
-        results = []
-        for row in rows:
-            interview = dict(row)
-            interview["data"] = json.loads(interview["data"])
-            results.append(interview)
+        Args:
+            user_id: User ID
+            limit: Page size
+            cursor: Cursor returned with the previous page
             
-        return results
+        Returns:
+            Dictionary with the page items and the cursor for the next page
+            (None on the last page)
+        """
+        with self.pool.connection() as conn:
+            if cursor:
+                start_time, last_id = self._decode_cursor(cursor)
+                rows = conn.execute(SQL_GET_INTERVIEW_SUMMARIES_AFTER,
+                                    (user_id, start_time, start_time, last_id, limit + 1)).fetchall()
+            else:
+                rows = conn.execute(SQL_GET_INTERVIEW_SUMMARIES, (user_id, limit + 1)).fetchall()
+        
+        items = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = self._encode_cursor(last["start_time"] or "", last["id"])
+        
+        return {"items": items, "next_cursor": next_cursor}
+    
+    def _encode_cursor(self, start_time: Optional[str], interview_id: str) -> str:
+        """Encode a pagination cursor"""
+        raw = json.dumps([start_time, interview_id]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+    
+    def _decode_cursor(self, cursor: str) -> tuple:
+        """Decode a pagination cursor"""
+        try:
+            start_time, interview_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        except (ValueError, TypeError):
+            raise ValueError("Invalid pagination cursor")
+        return start_time or "", interview_id
     
     def delete_interview(self, interview_id: str) -> bool:
         """
@@ -205,14 +568,12 @@ class StorageService:
         Returns:
             True if successful, False otherwise
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM interviews WHERE id = ?', (interview_id,))
-        success = cursor.rowcount > 0
+        self.flush_transcript_entries()
         
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            conn.execute(SQL_DELETE_TRANSCRIPT, (interview_id,))
+            cursor = conn.execute(SQL_DELETE_INTERVIEW, (interview_id,))
+            success = cursor.rowcount > 0
         
         return success
     
@@ -235,21 +596,235 @@ class StorageService:
             "export_date": datetime.now().isoformat()
         }
     
-    def save_to_file(self, data: Dict[str, Any], filename: str) -> str:
+    def iter_user_interviews(self, user_id: str, after: Optional[str] = None,
+                             page_size: int = 50) -> Iterator[tuple]:
+        """
+        Iterate over a user's full interviews one at a time, newest first
+        
+        Only one page of summaries and one decoded interview are held in
+        memory at any point.
+        
+        Args:
+            user_id: User ID
+            after: Resume after this position (a cursor from a previous iteration)
+            page_size: Summaries fetched per query
+            
+        Yields:
+            (position cursor, interview) tuples
+        """
+        cursor = after
+        while True:
+            page = self.get_user_interview_summaries(user_id, limit=page_size, cursor=cursor)
+            for summary in page["items"]:
+                interview = self.get_interview_data(summary["id"])
+                if interview is not None:
+                    yield self._encode_cursor(summary["start_time"], summary["id"]), interview
+            if not page["next_cursor"]:
+                break
+            cursor = page["next_cursor"]
+    
+    def iter_user_export(self, user_id: str, page_size: int = 50) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a user's data export as records
+        
+        Args:
+            user_id: User ID
+            page_size: Interviews fetched per query
+            
+        Yields:
+            A user record, one record per interview, then a completion record
+        """
+        yield {"type": "user", "user": self.get_user(user_id), "export_date": datetime.now().isoformat()}
+        
+        count = 0
+        for _, interview in self.iter_user_interviews(user_id, page_size=page_size):
+            count += 1
+            yield {"type": "interview", "interview": interview}
+        
+        yield {"type": "export_complete", "interviews": count}
+    
+    def export_user_data_to_path(self, user_id: str, output_path: str, format: str = "ndjson",
+                                 resume: bool = True, page_size: int = 50) -> Dict[str, Any]:
+        """
+        Stream a user's data export to a local file with bounded memory
+        
+        Progress is checkpointed to "<output_path>.progress" after every
+        interview, so an interrupted export continues where it stopped.
+        
+        Args:
+            user_id: User ID
+            output_path: Destination file (.ndjson or .zip)
+            format: "ndjson" (one JSON record per line) or "zip" (one file per interview)
+            resume: Continue an interrupted export instead of starting over
+            page_size: Interviews fetched per query
+            
+        Returns:
+            Export summary with the output path and interview count
+        """
+        if format not in ("ndjson", "zip"):
+            raise ValueError(f"Unsupported export format: {format}")
+        
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        progress_path = f"{output_path}.progress"
+        progress = self._load_export_progress(progress_path) if resume else None
+        if progress and (progress.get("user_id") != user_id or progress.get("format") != format):
+            progress = None
+        if not progress or not os.path.exists(output_path):
+            progress = {"user_id": user_id, "format": format, "cursor": None, "count": 0, "offset": 0}
+        
+        if format == "ndjson":
+            self._export_ndjson(user_id, output_path, progress, progress_path, page_size)
+        else:
+            self._export_zip(user_id, output_path, progress, progress_path, page_size)
+        
+        if os.path.exists(progress_path):
+            os.remove(progress_path)
+        
+        return {
+            "path": os.path.abspath(output_path),
+            "format": format,
+            "interviews": progress["count"],
+            "export_date": datetime.now().isoformat()
+        }
+    
+    def _export_ndjson(self, user_id: str, output_path: str, progress: Dict[str, Any],
+                       progress_path: str, page_size: int):
+        """Write an NDJSON export, resuming from the progress checkpoint"""
+        with open(output_path, "r+b" if progress["cursor"] or progress["offset"] else "wb") as f:
+            # Drop any partial record written after the last checkpoint
+            f.seek(progress["offset"])
+            f.truncate()
+            
+            if not progress["offset"]:
+                self._write_json_record(f, {
+                    "type": "user",
+                    "user": self.get_user(user_id),
+                    "export_date": datetime.now().isoformat()
+                })
+                progress["offset"] = f.tell()
+                self._save_export_progress(progress_path, progress)
+            
+            for position, interview in self.iter_user_interviews(user_id, progress["cursor"], page_size):
+                self._write_json_record(f, {"type": "interview", "interview": interview})
+                progress.update(cursor=position, count=progress["count"] + 1, offset=f.tell())
+                self._save_export_progress(progress_path, progress)
+            
+            self._write_json_record(f, {"type": "export_complete", "interviews": progress["count"]})
+    
+    def _export_zip(self, user_id: str, output_path: str, progress: Dict[str, Any],
+                    progress_path: str, page_size: int):
+        """Write a zip export with one JSON file per interview, resuming from the checkpoint"""
+        mode = "w"
+        if progress["cursor"] or progress["count"]:
+            try:
+                with zipfile.ZipFile(output_path, "r"):
+                    mode = "a"
+            except zipfile.BadZipFile:
+                # Interrupted before the archive was finalized; start over
+                progress.update(cursor=None, count=0)
+        
+        with zipfile.ZipFile(output_path, mode, compression=zipfile.ZIP_DEFLATED) as zf:
+            existing = set(zf.namelist())
+            if "user.json" not in existing:
+                with zf.open("user.json", "w") as f:
+                    self._write_json_record(f, {
+                        "user": self.get_user(user_id),
+                        "export_date": datetime.now().isoformat()
+                    })
+            
+            for position, interview in self.iter_user_interviews(user_id, progress["cursor"], page_size):
+                name = f"interviews/{interview['id']}.json"
+                if name not in existing:
+                    with zf.open(name, "w") as f:
+                        self._write_json_record(f, interview)
+                progress.update(cursor=position, count=progress["count"] + 1)
+                self._save_export_progress(progress_path, progress)
+    
+    def _write_json_record(self, f, record: Dict[str, Any]):
+        """Write one JSON record followed by a newline, chunk by chunk"""
+        for chunk in json.JSONEncoder(default=str, separators=(",", ":")).iterencode(record):
+            f.write(chunk.encode("utf-8"))
+        f.write(b"\n")
+    
+    def _load_export_progress(self, progress_path: str) -> Optional[Dict[str, Any]]:
+        """Load an export checkpoint if one exists"""
+        if not os.path.exists(progress_path):
+            return None
+        try:
+            with open(progress_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _save_export_progress(self, progress_path: str, progress: Dict[str, Any]):
+        """Atomically replace the export checkpoint"""
+        temp_path = f"{progress_path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(progress, f)
+        os.replace(temp_path, progress_path)
+    
+    def migrate_payloads(self, batch_size: int = 200) -> int:
+        """
+        Re-encode rows stored as legacy JSON text (or by an older codec)
+        
+        Reads keep working without this; it only reclaims space and parse
+        time for old rows. Runs in small batches so writers are not blocked.
+        
+        Args:
+            batch_size: Rows re-encoded per transaction
+            
+        Returns:
+            Number of rows migrated
+        """
+        migrated = 0
+        for table, key_columns in (("interviews", ("id",)),
+                                   ("transcript_entries", ("interview_id", "seq"))):
+            keys = ", ".join(key_columns)
+            where = " AND ".join(f"{column} = ?" for column in key_columns)
+            last_key = None
+            
+            while True:
+                with self.pool.connection() as conn:
+                    if last_key is None:
+                        rows = conn.execute(
+                            f"SELECT {keys}, data FROM {table} ORDER BY {keys} LIMIT ?",
+                            (batch_size,)).fetchall()
+                    else:
+                        rows = conn.execute(
+                            f"SELECT {keys}, data FROM {table} WHERE ({keys}) > ({', '.join('?' * len(key_columns))}) "
+                            f"ORDER BY {keys} LIMIT ?",
+                            (*last_key, batch_size)).fetchall()
+                if not rows:
+                    break
+                last_key = tuple(rows[-1][column] for column in key_columns)
+                
+                updates = [
+                    (self.codec.encode(self.codec.decode(row["data"])), *(row[c] for c in key_columns))
+                    for row in rows if self.codec.needs_migration(row["data"])
+                ]
+                if updates:
+                    with self.transaction() as conn:
+                        conn.executemany(f"UPDATE {table} SET data = ? WHERE {where}", updates)
+                    migrated += len(updates)
+        
+        return migrated
+    
+    def save_to_file(self, data: Dict[str, Any], filename: str, indent: Optional[int] = None) -> str:
         """
         Save data to a JSON file
         
         Args:
             data: Data to save
             filename: Filename to save to
+            indent: Indentation for human-readable output (default: compact)
             
         Returns:
             Full path to the saved file
         """
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
         
         with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
+            json.dump(data, f, indent=indent, separators=None if indent else (",", ":"))
             
         return os.path.abspath(filename)
     
@@ -0,0 +1,218 @@
+# app/services/transcript_index.py
+import bisect
+import threading
+from array import array
+from typing import List, Dict, Any, Optional
+
+
+def align_segments(raw_segments: List[Dict[str, Any]], audio_offset: float) -> List[Dict[str, Any]]:
+    """
+    Shift Whisper segments (and their words) onto the session audio clock
+
+    Args:
+        raw_segments: Segments as returned by Whisper, relative to the audio passed in
+        audio_offset: Position of that audio on the session clock, in seconds
+
+    Returns:
+        Segments with absolute start/end times and word timings where available
+    """
+    aligned = []
+    for segment in raw_segments or []:
+        words = []
+        for word in segment.get("words") or []:
+            words.append({
+                "word": word.get("word", "").strip(),
+                "start": round(audio_offset + float(word["start"]), 3),
+                "end": round(audio_offset + float(word["end"]), 3),
+                "probability": word.get("probability")
+            })
+        aligned.append({
+            "start": round(audio_offset + float(segment["start"]), 3),
+            "end": round(audio_offset + float(segment["end"]), 3),
+            "text": segment.get("text", "").strip(),
+            "words": words
+        })
+    return aligned
+
+
+class TranscriptIndex:
+    """
+    Compact, array-backed index of transcript segments and words for one session.
+
+    Segment and word times are kept in parallel arrays sorted by start time,
+    so seeking to a point in the audio is a binary search rather than a scan
+    over the transcript. The index is filled by the delivery thread while
+    the UI reads it, so every access holds the index lock.
+    """
+
+    def __init__(self):
+        """Initialize an empty index"""
+        self._seg_starts = array("d")
+        self._seg_ends = array("d")
+        self._seg_texts: List[str] = []
+        self._word_starts = array("d")
+        self._word_ends = array("d")
+        self._word_segments = array("l")
+        self._word_texts: List[str] = []
+        self._markers: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._seg_starts)
+
+    def add_segments(self, segments: List[Dict[str, Any]]):
+        """
+        Add audio-aligned segments to the index
+
+        Args:
+            segments: Segments with absolute start/end times (see align_segments)
+        """
+        with self._lock:
+            for segment in segments:
+                self._add_segment(segment)
+
+    def _add_segment(self, segment: Dict[str, Any]):
+        """Insert a single segment, keeping the arrays sorted by start time"""
+        start = float(segment["start"])
+        if self._seg_starts and start < self._seg_starts[-1]:
+            # Out-of-order insert; rare because results are delivered in capture order
+            idx = bisect.bisect_right(self._seg_starts, start)
+            self._seg_starts.insert(idx, start)
+            self._seg_ends.insert(idx, float(segment["end"]))
+            self._seg_texts.insert(idx, segment.get("text", ""))
+            for i, seg_idx in enumerate(self._word_segments):
+                if seg_idx >= idx:
+                    self._word_segments[i] = seg_idx + 1
+        else:
+            idx = len(self._seg_starts)
+            self._seg_starts.append(start)
+            self._seg_ends.append(float(segment["end"]))
+            self._seg_texts.append(segment.get("text", ""))
+
+        for word in segment.get("words") or []:
+            word_start = float(word["start"])
+            word_idx = bisect.bisect_right(self._word_starts, word_start)
+            self._word_starts.insert(word_idx, word_start)
+            self._word_ends.insert(word_idx, float(word["end"]))
+            self._word_segments.insert(word_idx, idx)
+            self._word_texts.insert(word_idx, word.get("word", ""))
+
+    def mark(self, label: str, audio_time: float):
+        """
+        Label a point on the audio clock, e.g. where an answer starts
+
+        Args:
+            label: Marker label (e.g. "answer-3")
+            audio_time: Position in seconds
+        """
+        with self._lock:
+            self._markers[label] = audio_time
+
+    def seek_marker(self, label: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the segment at a labelled marker
+
+        Args:
+            label: Marker label
+
+        Returns:
+            Segment at the marker or None if unknown
+        """
+        with self._lock:
+            if label not in self._markers:
+                return None
+            return self.segment_at(self._markers[label], nearest=True)
+
+    def segment_index_at(self, audio_time: float) -> int:
+        """
+        Get the index of the last segment starting at or before a time
+
+        Args:
+            audio_time: Position in seconds
+
+        Returns:
+            Segment index, or -1 if the time is before the first segment
+        """
+        with self._lock:
+            return bisect.bisect_right(self._seg_starts, audio_time) - 1
+
+    def segment_at(self, audio_time: float, nearest: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Get the segment covering a point in the audio
+
+        Args:
+            audio_time: Position in seconds
+            nearest: Return the next segment when the time falls in a gap
+
+        Returns:
+            Segment or None if no segment covers the time
+        """
+        with self._lock:
+            idx = self.segment_index_at(audio_time)
+            if idx >= 0 and audio_time < self._seg_ends[idx]:
+                return self._segment(idx)
+            if nearest and idx + 1 < len(self._seg_starts):
+                return self._segment(idx + 1)
+            return None
+
+    def segments_between(self, start: float, end: float) -> List[Dict[str, Any]]:
+        """
+        Get the segments overlapping a time range
+
+        Args:
+            start: Range start in seconds
+            end: Range end in seconds
+
+        Returns:
+            List of segments in time order
+        """
+        with self._lock:
+            first = max(self.segment_index_at(start), 0)
+            if first < len(self._seg_ends) and self._seg_ends[first] <= start:
+                first += 1
+            last = bisect.bisect_left(self._seg_starts, end)
+            return [self._segment(i) for i in range(first, last)]
+
+    def word_at(self, audio_time: float) -> Optional[Dict[str, Any]]:
+        """
+        Get the word being spoken at a point in the audio
+
+        Args:
+            audio_time: Position in seconds
+
+        Returns:
+            Word with its timing or None if no word covers the time
+        """
+        with self._lock:
+            idx = bisect.bisect_right(self._word_starts, audio_time) - 1
+            if idx < 0 or audio_time >= self._word_ends[idx]:
+                return None
+            return {
+                "word": self._word_texts[idx],
+                "start": self._word_starts[idx],
+                "end": self._word_ends[idx],
+                "segment": self._word_segments[idx]
+            }
+
+    def text_between(self, start: float, end: float) -> str:
+        """
+        Get the transcript text for a time range
+
+        Args:
+            start: Range start in seconds
+            end: Range end in seconds
+
+        Returns:
+            Concatenated segment text
+        """
+        return " ".join(s["text"] for s in self.segments_between(start, end))
+
+    def _segment(self, idx: int) -> Dict[str, Any]:
+        """Build a segment dictionary from the arrays"""
+        return {
+            "index": idx,
+            "start": self._seg_starts[idx],
+            "end": self._seg_ends[idx],
+            "text": self._seg_texts[idx]
+        }
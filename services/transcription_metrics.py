@@ -0,0 +1,221 @@
+# app/services/transcription_metrics.py
+import json
+import logging
+import threading
+from collections import deque, defaultdict
+from typing import List, Dict, Any, Optional
+
+from app.utils.stats import percentile
+
+
+class MetricsSink:
+    """Base class for destinations of transcription metrics"""
+
+    def record(self, metric: Dict[str, Any]):
+        """
+        Record a single metric event
+
+        Args:
+            metric: Metric event with an "event" field (utterance, dropped)
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Flush and release any resources"""
+        pass
+
+
+class LoggingMetricsSink(MetricsSink):
+    """Writes metric events to the application log"""
+
+    def __init__(self, level: int = logging.INFO):
+        self.level = level
+
+    def record(self, metric: Dict[str, Any]):
+        logging.log(self.level, f"transcription_metric {json.dumps(metric, default=str)}")
+
+
+class JsonlMetricsSink(MetricsSink):
+    """Appends metric events to a JSON Lines file"""
+
+    def __init__(self, path: str):
+        """
+        Initialize the sink
+
+        Args:
+            path: Path of the JSONL file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a")
+
+    def record(self, metric: Dict[str, Any]):
+        with self._lock:
+            self._file.write(json.dumps(metric, default=str) + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class TranscriptionMetrics:
+    """
+    Collects per-utterance transcription metrics and summarizes them.
+
+    Every event is forwarded to the configured sinks; a bounded window of
+    recent utterances is kept in memory for the summary API.
+    """
+
+    def __init__(self, sinks: Optional[List[MetricsSink]] = None, window: int = 1000):
+        """
+        Initialize the metrics collector
+
+        Args:
+            sinks: Destinations for metric events
+            window: Number of recent utterances kept for percentiles
+        """
+        self.sinks = list(sinks or [])
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def add_sink(self, sink: MetricsSink):
+        """
+        Add a destination for metric events
+
+        Args:
+            sink: Metrics sink
+        """
+        self.sinks.append(sink)
+
+    def reset(self):
+        """Clear all counters and the recent window"""
+        with self._lock:
+            self._recent.clear()
+            self.utterances = 0
+            self.failed = 0
+            self.audio_seconds = 0.0
+            self.processing_seconds = 0.0
+            self.dropped_chunks = 0
+            self.dropped_segments = 0
+            self.dropped_audio_seconds = 0.0
+            self.max_queue_depth = 0
+            self.by_model = defaultdict(lambda: {"utterances": 0, "audio_seconds": 0.0, "processing_seconds": 0.0})
+
+    def record_utterance(self, latency: float, audio_seconds: float, processing_seconds: float,
+                         queue_depth: int, model: str, backend: str, failed: bool = False,
+                         **extra):
+        """
+        Record a transcribed utterance
+
+        Args:
+            latency: Seconds from the end of capture to text delivery
+            audio_seconds: Length of the utterance audio
+            processing_seconds: Time spent in the transcription backend
+            queue_depth: Segments waiting or running when the utterance was submitted
+            model: Model used
+            backend: Backend used (openai, whisper-local)
+            failed: Whether transcription failed
+            **extra: Additional fields passed through to the sinks
+        """
+        rtf = processing_seconds / audio_seconds if audio_seconds > 0 else None
+        metric = {
+            "event": "utterance",
+            "latency": latency,
+            "audio_seconds": audio_seconds,
+            "processing_seconds": processing_seconds,
+            "real_time_factor": rtf,
+            "queue_depth": queue_depth,
+            "model": model,
+            "backend": backend,
+            "failed": failed,
+            **extra
+        }
+
+        with self._lock:
+            if failed:
+                self.failed += 1
+            else:
+                self.utterances += 1
+                self.audio_seconds += audio_seconds
+                self.processing_seconds += processing_seconds
+                stats = self.by_model[f"{backend}:{model}"]
+                stats["utterances"] += 1
+                stats["audio_seconds"] += audio_seconds
+                stats["processing_seconds"] += processing_seconds
+                self._recent.append((latency, rtf))
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+
+        self._emit(metric)
+
+    def record_drop(self, chunks: int = 0, segments: int = 0, audio_seconds: float = 0.0,
+                    reason: str = ""):
+        """
+        Record audio dropped because transcription fell behind
+
+        Args:
+            chunks: Number of captured chunks dropped
+            segments: Number of queued segments dropped
+            audio_seconds: Amount of audio lost
+            reason: Why the audio was dropped
+        """
+        with self._lock:
+            self.dropped_chunks += chunks
+            self.dropped_segments += segments
+            self.dropped_audio_seconds += audio_seconds
+
+        self._emit({
+            "event": "dropped",
+            "chunks": chunks,
+            "segments": segments,
+            "audio_seconds": audio_seconds,
+            "reason": reason
+        })
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the collected metrics
+
+        Returns:
+            Latency percentiles, real-time factor, throughput and drop counts
+        """
+        with self._lock:
+            latencies = sorted(latency for latency, _ in self._recent)
+            rtfs = sorted(rtf for _, rtf in self._recent if rtf is not None)
+            by_model = {
+                key: {
+                    **stats,
+                    "real_time_factor": (stats["processing_seconds"] / stats["audio_seconds"]
+                                         if stats["audio_seconds"] else None)
+                }
+                for key, stats in self.by_model.items()
+            }
+            total_audio = self.audio_seconds + self.dropped_audio_seconds
+            return {
+                "utterances": self.utterances,
+                "failed": self.failed,
+                "audio_seconds": self.audio_seconds,
+                "latency_p50": percentile(latencies, 50),
+                "latency_p95": percentile(latencies, 95),
+                "latency_p99": percentile(latencies, 99),
+                "latency_max": latencies[-1] if latencies else None,
+                "real_time_factor": (self.processing_seconds / self.audio_seconds
+                                     if self.audio_seconds else None),
+                "real_time_factor_p95": percentile(rtfs, 95),
+                "max_queue_depth": self.max_queue_depth,
+                "dropped_chunks": self.dropped_chunks,
+                "dropped_segments": self.dropped_segments,
+                "dropped_audio_seconds": self.dropped_audio_seconds,
+                "dropped_audio_ratio": (self.dropped_audio_seconds / total_audio
+                                        if total_audio else 0.0),
+                "by_model": by_model
+            }
+
+    def _emit(self, metric: Dict[str, Any]):
+        """Forward a metric event to every sink"""
+        for sink in self.sinks:
+            try:
+                sink.record(metric)
+            except Exception as e:
+                logging.error(f"Error recording transcription metric: {e}")
@@ -6,16 +6,79 @@ import queue
 import tempfile
 import wave
 import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
 from typing import List, Dict, Any, Callable, Optional
 import openai
-import whisper
 import sounddevice as sd
+from app.services.model_registry import model_registry
+from app.services.transcript_index import TranscriptIndex, align_segments
+from app.services.transcription_metrics import MetricsSink, TranscriptionMetrics
+
+# Whisper models ordered from fastest to most accurate
+WHISPER_MODEL_LADDER = ["tiny", "base", "small", "medium", "large"]
+
+# Overload policies for the transcription worker pool
+OVERLOAD_POLICIES = ("drop", "degrade")
+
+# Models loaded inside a worker process, keyed by model name
+_worker_models: Dict[str, Any] = {}
+
+
+def _smaller_model(model_name: str) -> Optional[str]:
+    """
+    Get the next smaller Whisper model
+    
+    Args:
+        model_name: Current Whisper model name
+        
+    Returns:
+        Smaller model name or None if already at the smallest model
+    """
+    base_name, dot, suffix = model_name.partition(".")
+    if base_name not in WHISPER_MODEL_LADDER:
+        return None
+    idx = WHISPER_MODEL_LADDER.index(base_name)
+    # Keep variants such as the English-only ".en" models
+    return WHISPER_MODEL_LADDER[idx - 1] + dot + suffix if idx > 0 else None
+
+
+def _init_worker_process(model_name: str):
+    """Warm up the Whisper model when a worker process starts"""
+    if model_name not in _worker_models:
+        # Held for the lifetime of the worker process
+        _worker_models[model_name] = model_registry.acquire("whisper", model_name)
+
+
+def _transcribe_in_worker_process(audio_data: np.ndarray, model_name: str) -> Dict[str, Any]:
+    """
+    Transcribe an audio segment inside a worker process
+    
+    Args:
+        audio_data: NumPy array of audio samples
+        model_name: Whisper model name to use
+        
+    Returns:
+        Raw Whisper transcription result
+    """
+    _init_worker_process(model_name)
+    start = time.time()
+    result = _worker_models[model_name].transcribe(
+        audio_data, language="en", fp16=False, word_timestamps=True)
+    return {
+        "text": result["text"],
+        "segments": result.get("segments", []),
+        "processing_time": time.time() - start
+    }
 
 class TranscriptionService:
     """Service for real-time speech-to-text transcription"""
     
     def __init__(self, model_name: str = "base", use_openai: bool = False, 
-                openai_api_key: Optional[str] = None, buffer_duration: float = 5.0):
+                openai_api_key: Optional[str] = None, buffer_duration: float = 5.0,
+                num_workers: int = 2, use_processes: Optional[bool] = None,
+                max_pending: int = 4, max_queued_chunks: int = 500,
+                overload_policy: str = "degrade",
+                metrics_sinks: Optional[List[MetricsSink]] = None):
         """
         Initialize the transcription service
         
@@ -24,24 +87,76 @@ class TranscriptionService:
             use_openai: Whether to use OpenAI's API instead of local Whisper
             openai_api_key: OpenAI API key (required if use_openai is True)
             buffer_duration: Duration in seconds for the audio buffer
+            num_workers: Number of transcription workers
+            use_processes: Run workers in processes instead of threads
+                (default: processes for local Whisper, threads for the API)
+            max_pending: Maximum number of segments waiting for a worker
+                before the overload policy kicks in
+            max_queued_chunks: Maximum number of captured audio chunks held
+                before new audio is dropped
+            overload_policy: "drop" to discard the oldest waiting segment, or
+                "degrade" to switch to a smaller Whisper model first
+            metrics_sinks: Destinations for per-utterance performance metrics
         """
+        if overload_policy not in OVERLOAD_POLICIES:
+            raise ValueError(f"Unsupported overload policy: {overload_policy}")
+        
         self.use_openai = use_openai
         self.model_name = model_name
+        self.active_model_name = model_name
         self.buffer_duration = buffer_duration
         self.is_running = False
-        self.audio_queue = queue.Queue()
+        self.audio_queue = queue.Queue(maxsize=max_queued_chunks)
+        self.audio_thread = None
         self.transcription_thread = None
         self.callback = None
         self.sample_rate = 16000  # Hz
         
+        # Worker pool settings
+        self.num_workers = max(1, num_workers)
+        self.use_processes = (not use_openai) if use_processes is None else use_processes
+        self.max_pending = max(1, max_pending)
+        self.overload_policy = overload_policy
+        self.executor = None
+        
+        # Ordered reassembly of results coming back from the pool
+        self._pool_lock = threading.Lock()
+        self._delivery_lock = threading.Lock()
+        self._in_flight: Dict[int, Future] = {}
+        self._completed: Dict[int, Optional[Dict[str, Any]]] = {}
+        self._next_sequence = 0
+        self._next_delivery = 0
+        self._calm_segments = 0
+        self._models: Dict[str, Any] = {}
+        self._models_lock = threading.Lock()
+        self.queue_metrics = self._empty_queue_metrics()
+        
+        # Session audio clock and the aligned transcript
+        self._captured_frames = 0
+        
+        # Capture drops, counted by the capture callback only and reported
+        # to the metrics sinks from the transcription thread
+        self._dropped_chunks = 0
+        self._dropped_frames = 0
+        self._reported_chunks = 0
+        self._reported_frames = 0
+        self.transcript_index = TranscriptIndex()
+        
+        # Per-utterance latency and real-time factor
+        self.metrics = TranscriptionMetrics(sinks=metrics_sinks)
+        
         # Set up the appropriate transcription engine
         if use_openai:
             if not openai_api_key and not os.getenv("OPENAI_API_KEY"):
                 raise ValueError("OpenAI API key is required when use_openai is True")
             openai.api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
+        elif not self.use_processes:
+            # Local Whisper models are shared through the process-wide registry
+            self.model = self._get_model(model_name)
         else:
-            # Load local Whisper model
-            self.model = whisper.load_model(model_name)
+            # Worker processes load their own copy; the parent loads one only
+            # if transcribe_file() needs it
+            self.model = None
     
     def start_transcribing(self, callback: Callable[[Dict[str, Any]], None]):
         """
@@ -55,6 +170,8 @@ class TranscriptionService:
             
         self.callback = callback
         self.is_running = True
+        self._reset_pool_state()
+        self.executor = self._create_executor()
         
         # Start audio recording
         self.audio_thread = threading.Thread(target=self._record_audio)
@@ -73,16 +190,112 @@ class TranscriptionService:
             self.audio_thread.join(timeout=1.0)
         if self.transcription_thread and self.transcription_thread.is_alive():
             self.transcription_thread.join(timeout=1.0)
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+    
+    def get_queue_metrics(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the transcription queue metrics
+        
+        Returns:
+            Queue depths, throughput counters and the active model
+        """
+        with self._pool_lock:
+            metrics = dict(self.queue_metrics)
+            metrics["pending_segments"] = sum(1 for f in self._in_flight.values() if not f.running())
+            metrics["in_flight_segments"] = len(self._in_flight)
+        
+        metrics["chunks_dropped"] = self._dropped_chunks
+        metrics["capture_queue_depth"] = self.audio_queue.qsize()
+        metrics["capture_queue_capacity"] = self.audio_queue.maxsize
+        metrics["active_model"] = self.active_model_name
+        metrics["worker_mode"] = "process" if self.use_processes else "thread"
+        metrics["num_workers"] = self.num_workers
+        return metrics
+    
+    def _empty_queue_metrics(self) -> Dict[str, Any]:
+        """Create zeroed queue metric counters"""
+        return {
+            "segments_submitted": 0,
+            "segments_completed": 0,
+            "segments_dropped": 0,
+            "segments_failed": 0,
+            "chunks_dropped": 0,
+            "max_in_flight": 0,
+            "degrade_events": 0,
+            "recover_events": 0
+        }
+    
+    def get_metrics_summary(self) -> Dict[str, Any]:
+        """
+        Get a summary of transcription performance for the current session
+        
+        Returns:
+            Latency percentiles, real-time factor, drop counts and queue metrics
+        """
+        summary = self.metrics.summary()
+        summary["queue"] = self.get_queue_metrics()
+        return summary
+    
+    def get_transcript_index(self) -> TranscriptIndex:
+        """
+        Get the audio-aligned transcript index for the current session
+        
+        Returns:
+            Transcript index of segments and words
+        """
+        return self.transcript_index
+    
+    def _reset_pool_state(self):
+        """Reset sequencing and metrics before a new capture session"""
+        self._captured_frames = 0
+        self._dropped_chunks = self._dropped_frames = 0
+        self._reported_chunks = self._reported_frames = 0
+        self.transcript_index = TranscriptIndex()
+        self.metrics.reset()
+        with self._pool_lock:
+            self._in_flight = {}
+            self._next_sequence = 0
+            self._calm_segments = 0
+            self.active_model_name = self.model_name
+            self.queue_metrics = self._empty_queue_metrics()
+        with self._delivery_lock:
+            self._completed = {}
+            self._next_delivery = 0
+    
+    def _create_executor(self):
+        """Create the worker pool for the configured backend"""
+        if self.use_processes and not self.use_openai:
+            return ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                initializer=_init_worker_process,
+                initargs=(self.model_name,)
+            )
+        return ThreadPoolExecutor(
+            max_workers=self.num_workers,
+            thread_name_prefix="transcription"
+        )
     
     def _record_audio(self):
         """Record audio from the microphone and add to the queue"""
         buffer_size = int(self.sample_rate * self.buffer_duration)
         
-        def audio_callback(indata, frames, time, status):
+        def audio_callback(indata, frames, time_info, status):
             if status:
                 print(f"Audio status: {status}")
             if self.is_running:
-                self.audio_queue.put(indata.copy())
+                # Position of this chunk on the session audio clock. Dropped
+                # chunks still advance it so later segments stay aligned.
+                audio_offset = self._captured_frames / self.sample_rate
+                self._captured_frames += frames
+                try:
+                    self.audio_queue.put_nowait((audio_offset, time.time(), indata.copy()))
+                except queue.Full:
+                    # Capture must never block; drop audio when we are too far
+                    # behind and leave reporting to the transcription thread
+                    self._dropped_frames += frames
+                    self._dropped_chunks += 1
         
         with sd.InputStream(callback=audio_callback, channels=1, samplerate=self.sample_rate):
             while self.is_running:
@@ -116,26 +329,31 @@ class TranscriptionService:
         
         while self.is_running:
             try:
-                # Get audio chunk from queue with a timeout
-                audio_chunk = self.audio_queue.get(timeout=1.0)
+                # Get audio chunk, its clock position and capture time from queue
+                audio_offset, captured_at, audio_chunk = self.audio_queue.get(timeout=1.0)
+                if buffer and abs(audio_offset - buffer_end) > 0.5 / self.sample_rate:
+                    # Chunks were dropped since the last one; transcribe what we
+                    # have so the segment after the gap keeps its own offset
+                    self._submit_segment(np.concatenate(buffer).flatten(), segment_offset, last_captured_at)
+                    buffer = []
+                    last_transcription_time = time.time()
+                if not buffer:
+                    segment_offset = audio_offset
                 buffer.append(audio_chunk)
+                buffer_end = audio_offset + len(audio_chunk) / self.sample_rate
+                last_captured_at = captured_at
                 
                 current_time = time.time()
-                buffer_duration = len(buffer) * self.buffer_duration
+                buffer_duration = sum(len(chunk) for chunk in buffer) / self.sample_rate
                 
                 # Process buffer when it reaches appropriate size or time threshold
                 if buffer_duration >= 3.0 or (current_time - last_transcription_time) >= 5.0:
                     if buffer:
                         # Concatenate all chunks in the buffer
-                        audio_data = np.concatenate(buffer)
+                        audio_data = np.concatenate(buffer).flatten()
                         
-                        # Transcribe audio
-                        transcription = self._transcribe_audio(audio_data)
-                        
-                        # If we got a valid transcription, call the callback
-                        if transcription and transcription.get("text"):
-                            if self.callback:
-                                self.callback(transcription)
+                        # Hand the segment to the worker pool
+                        self._submit_segment(audio_data, segment_offset, captured_at)
                         
                         # Clear buffer and update last transcription time
                         buffer = []
@@ -143,17 +361,280 @@ class TranscriptionService:
                 
             except queue.Empty:
                 pass
+            self._report_capture_drops()
+        
+        self._report_capture_drops()
+    
+    def _report_capture_drops(self):
+        """Forward chunks dropped by the capture callback to the metrics sinks"""
+        chunks = self._dropped_chunks - self._reported_chunks
+        frames = self._dropped_frames - self._reported_frames
+        if chunks <= 0:
+            return
+        self._reported_chunks += chunks
+        self._reported_frames += frames
+        self.metrics.record_drop(chunks=chunks, audio_seconds=frames / self.sample_rate,
+                                 reason="capture_queue_full")
+    
+    def _submit_segment(self, audio_data: np.ndarray, audio_offset: float = 0.0,
+                        captured_at: Optional[float] = None):
+        """
+        Submit an audio segment to the worker pool, applying the overload policy
+        
+        Args:
+            audio_data: NumPy array of audio samples
+            audio_offset: Start of the segment on the session audio clock, in seconds
+            captured_at: Wall time the last chunk of the segment was captured
+        """
+        executor = self.executor
+        if executor is None:
+            return
+        
+        oldest_waiting = None
+        
+        with self._pool_lock:
+            sequence = self._next_sequence
+            self._next_sequence += 1
+            
+            waiting = [seq for seq, f in self._in_flight.items() if not f.running()]
+            if len(waiting) >= self.max_pending:
+                self._calm_segments = 0
+                if not (self.overload_policy == "degrade" and self._degrade_model()):
+                    oldest_waiting = self._in_flight[min(waiting)]
+            elif not waiting:
+                self._calm_segments += 1
+                if self._calm_segments >= 2 * self.max_pending:
+                    self._recover_model()
+            
+            model_name = self.active_model_name
+            if self.use_processes and not self.use_openai:
+                future = executor.submit(_transcribe_in_worker_process, audio_data, model_name)
+            else:
+                future = executor.submit(self._transcribe_audio, audio_data, model_name)
+            
+            self._in_flight[sequence] = future
+            queue_depth = len(self._in_flight)
+            self.queue_metrics["segments_submitted"] += 1
+            self.queue_metrics["max_in_flight"] = max(
+                self.queue_metrics["max_in_flight"], len(self._in_flight))
+        
+        # Drop the oldest segment that has not started yet. Cancelling runs its
+        # done callback, so this must happen outside the pool lock.
+        if oldest_waiting is not None:
+            oldest_waiting.cancel()
+        
+        context = {
+            "audio_offset": audio_offset,
+            "duration": len(audio_data) / self.sample_rate,
+            "captured_at": captured_at or time.time(),
+            "queue_depth": queue_depth
+        }
+        future.add_done_callback(
+            lambda f, seq=sequence, model=model_name: self._on_segment_done(seq, model, f, context))
+    
+    def _record_utterance_metrics(self, result: Dict[str, Any]):
+        """
+        Record latency and real-time factor for a delivered segment
+        
+        Args:
+            result: Transcription result with its submit context
+        """
+        context = result.pop("_context")
+        self.metrics.record_utterance(
+            latency=time.time() - context["captured_at"],
+            audio_seconds=context["duration"],
+            processing_seconds=result.get("processing_time", 0.0),
+            queue_depth=context["queue_depth"],
+            model=result.get("model", self.active_model_name),
+            backend=result.get("source", "openai" if self.use_openai else "whisper-local"),
+            failed=bool(result.get("error")),
+            sequence=result.get("sequence")
+        )
+    
+    def _degrade_model(self) -> bool:
+        """
+        Switch to a smaller Whisper model under overload (caller holds the pool lock)
+        
+        Returns:
+            True if a smaller model was selected, False otherwise
+        """
+        if self.use_openai:
+            return False
+        smaller = _smaller_model(self.active_model_name)
+        if not smaller:
+            return False
+        print(f"Transcription overloaded, switching model {self.active_model_name} -> {smaller}")
+        self.active_model_name = smaller
+        self.queue_metrics["degrade_events"] += 1
+        return True
+    
+    def _recover_model(self):
+        """Step back towards the configured model once load subsides (caller holds the pool lock)"""
+        if self.active_model_name == self.model_name:
+            return
+        base_name, dot, suffix = self.active_model_name.partition(".")
+        idx = WHISPER_MODEL_LADDER.index(base_name)
+        larger = WHISPER_MODEL_LADDER[idx + 1] + dot + suffix
+        if larger.split(".")[0] == self.model_name.split(".")[0]:
+            larger = self.model_name
+        self.active_model_name = larger
+        self.queue_metrics["recover_events"] += 1
+        self._calm_segments = 0
+    
+    def _on_segment_done(self, sequence: int, model_name: str, future: Future,
+                         context: Dict[str, Any]):
+        """
+        Collect a finished segment and deliver results in capture order
+        
+        Args:
+            sequence: Sequence number of the segment
+            model_name: Model used for the segment
+            future: Completed future for the segment
+            context: Audio clock position, duration, capture time and queue
+                depth recorded when the segment was submitted
+        """
+        audio_offset = context["audio_offset"]
+        duration = context["duration"]
+        transcription = None
+        
+        # Segments cancelled by stop_transcribing() are not overload drops
+        drop_reason = "overload" if self.is_running else "shutdown"
+        
+        with self._pool_lock:
+            self._in_flight.pop(sequence, None)
+            if future.cancelled():
+                if drop_reason == "overload":
+                    self.queue_metrics["segments_dropped"] += 1
+            elif future.exception() is not None:
+                self.queue_metrics["segments_failed"] += 1
+            else:
+                transcription = future.result()
+                # Thread workers report failures in the result instead of raising
+                if transcription.get("error"):
+                    self.queue_metrics["segments_failed"] += 1
+                else:
+                    self.queue_metrics["segments_completed"] += 1
+        
+        if future.cancelled():
+            self.metrics.record_drop(segments=1, audio_seconds=duration, reason=drop_reason)
+        elif future.exception() is not None:
+            print(f"Transcription error: {future.exception()}")
+            transcription = {"text": "", "error": str(future.exception()), "timestamp": time.time()}
+        
+        if transcription is not None and "source" not in transcription and "error" not in transcription:
+            # Raw result from a worker process
+            transcription = {
+                "text": transcription["text"],
+                "timestamp": time.time(),
+                "segments": transcription.get("segments", []),
+                "processing_time": transcription.get("processing_time", 0.0),
+                "source": "whisper-local"
+            }
+        if transcription is not None:
+            transcription["_context"] = context
+            transcription["sequence"] = sequence
+            transcription["model"] = model_name
+            transcription["audio_start"] = audio_offset
+            transcription["audio_end"] = audio_offset + duration
+            transcription["segments"] = align_segments(transcription.get("segments"), audio_offset)
+        
+        with self._delivery_lock:
+            self._completed[sequence] = transcription
+            while self._next_delivery in self._completed:
+                result = self._completed.pop(self._next_delivery)
+                self._next_delivery += 1
+                
+                if result is not None:
+                    self._record_utterance_metrics(result)
+                
+                if result and result.get("segments"):
+                    self.transcript_index.add_segments(result["segments"])
+                
+                # If we got a valid transcription, call the callback
+                if result and result.get("text") and self.callback:
+                    self.callback(result)
+    
+    def _get_model(self, model_name: str):
+        """
+        Get a loaded local Whisper model, loading it on first use
+        
+        Args:
+            model_name: Whisper model name
+            
+        Returns:
+            Loaded Whisper model
+        """
+        # Pool threads may ask at once; each model is acquired only once
+        with self._models_lock:
+            if model_name not in self._models:
+                self._models[model_name] = model_registry.acquire("whisper", model_name)
+            return self._models[model_name]
     
-    def _transcribe_audio(self, audio_data: np.ndarray) -> Dict[str, Any]:
+    def close(self):
+        """Stop transcription and release shared models"""
+        self.stop_transcribing()
+        with self._models_lock:
+            models, self._models = self._models, {}
+        for model_name in models:
+            model_registry.release("whisper", model_name)
+    
+    def _transcribe_with_openai(self, audio_file) -> Dict[str, Any]:
+        """
+        Transcribe an open audio file with the OpenAI API, keeping segment and word timing
+        
+        Args:
+            audio_file: Binary file object with the audio
+            
+        Returns:
+            Verbose JSON response from the API
+        """
+        return openai.Audio.transcribe(
+            model="whisper-1",
+            file=audio_file,
+            response_format="verbose_json",
+            timestamp_granularities=["segment", "word"]
+        )
+    
+    def _openai_segments(self, response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Build Whisper-style segments from a verbose OpenAI response
+        
+        The API returns words as a flat list; attach each word to the
+        segment its start time falls in.
+        
+        Args:
+            response: Verbose JSON response from the API
+            
+        Returns:
+            Segments relative to the submitted audio, with words where available
+        """
+        segments = [
+            {"start": seg["start"], "end": seg["end"], "text": seg["text"], "words": []}
+            for seg in response.get("segments") or []
+        ]
+        words = response.get("words") or []
+        if not segments:
+            return segments
+        
+        seg_idx = 0
+        for word in words:
+            while seg_idx + 1 < len(segments) and word["start"] >= segments[seg_idx + 1]["start"]:
+                seg_idx += 1
+            segments[seg_idx]["words"].append(word)
+        return segments
+    
+    def _transcribe_audio(self, audio_data: np.ndarray, model_name: Optional[str] = None) -> Dict[str, Any]:
         """
         Transcribe audio data to text
         
         Args:
             audio_data: NumPy array of audio samples
+            model_name: Local Whisper model to use (default: configured model)
             
         Returns:
             Transcription result with text and metadata
         """
+        start = time.time()
         try:
             if self.use_openai:
                 # Save audio to a temporary file
@@ -161,10 +642,7 @@ class TranscriptionService:
                 
                 # Transcribe using OpenAI API
                 with open(temp_filename, "rb") as audio_file:
-                    response = openai.Audio.transcribe(
-                        model="whisper-1",
-                        file=audio_file
-                    )
+                    response = self._transcribe_with_openai(audio_file)
                 
                 # Clean up temporary file
                 os.unlink(temp_filename)
@@ -172,22 +650,27 @@ class TranscriptionService:
                 return {
                     "text": response["text"],
                     "timestamp": time.time(),
+                    "segments": self._openai_segments(response),
+                    "processing_time": time.time() - start,
                     "source": "openai"
                 }
             else:
                 # Transcribe using local Whisper model
-                result = self.model.transcribe(audio_data, language="en", fp16=False)
+                model = self._get_model(model_name or self.model_name)
+                result = model.transcribe(audio_data, language="en", fp16=False, word_timestamps=True)
                 
                 return {
                     "text": result["text"],
                     "timestamp": time.time(),
                     "segments": result.get("segments", []),
+                    "processing_time": time.time() - start,
                     "source": "whisper-local"
                 }
                 
         except Exception as e:
             print(f"Transcription error: {e}")
-            return {"text": "", "error": str(e), "timestamp": time.time()}
+            return {"text": "", "error": str(e), "timestamp": time.time(),
+                    "processing_time": time.time() - start}
 
     def transcribe_file(self, file_path: str) -> Dict[str, Any]:
         """
@@ -202,24 +685,22 @@ class TranscriptionService:
         try:
             if self.use_openai:
                 with open(file_path, "rb") as audio_file:
-                    response = openai.Audio.transcribe(
-                        model="whisper-1",
-                        file=audio_file
-                    )
+                    response = self._transcribe_with_openai(audio_file)
                 
                 return {
                     "text": response["text"],
                     "timestamp": time.time(),
+                    "segments": align_segments(self._openai_segments(response), 0.0),
                     "source": "openai"
                 }
             else:
                 # Transcribe using local Whisper model
-                result = self.model.transcribe(file_path, language="en", fp16=False)
+                result = self._get_model(self.model_name).transcribe(file_path, language="en", fp16=False, word_timestamps=True)
                 
                 return {
                     "text": result["text"],
                     "timestamp": time.time(),
-                    "segments": result.get("segments", []),
+                    "segments": align_segments(result.get("segments", []), 0.0),
                     "source": "whisper-local"
                 }
                 
@@ -1,24 +1,66 @@
 # app/services/user_service.py
 import os
+import copy
 import json
+import time
 import uuid
-import hashlib
-import secrets
-from typing import Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from datetime import datetime
 
+from app.services.password_hasher import PasswordHasher, password_hasher
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
 class UserService:
     """Service for user authentication and management"""
     
-    def __init__(self, storage_dir: str = "app_data/users"):
+    def __init__(self, storage_dir: str = "app_data/users", cache_size: int = 1024,
+                 hasher: Optional[PasswordHasher] = None, index_rebuild_interval: float = 60.0):
         """
         Initialize user service
         
         Args:
             storage_dir: Directory for user data storage
+            cache_size: Number of users kept in the in-process cache (0 disables it)
+            hasher: Password hasher (default: the shared bounded hasher)
+            index_rebuild_interval: Minimum seconds between index rebuilds
+                triggered by lookups of unknown emails
         """
         self.storage_dir = storage_dir
+        self.hasher = hasher or password_hasher
         os.makedirs(storage_dir, exist_ok=True)
+        
+        # Per-user locks guarding read-modify-write of user files, kept only
+        # while a thread holds or waits for them: [lock, holders]
+        self.lock_dir = os.path.join(storage_dir, ".locks")
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self._user_locks: Dict[str, List[Any]] = {}
+        self._user_locks_guard = threading.Lock()
+        
+        # Write-through LRU cache of raw user data with the file signature
+        # it was read from, so copies replaced by other processes are not served
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], Tuple[int, int, int]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # Persistent email -> user ID index, kept in memory for O(1) lookups.
+        # Changes are read-modify-write of the index file under a file lock
+        # shared with other processes.
+        self.index_path = os.path.join(storage_dir, ".email_index.json")
+        self.index_lock_path = os.path.join(self.lock_dir, "email_index.lock")
+        self.index_rebuild_interval = index_rebuild_interval
+        self._index_lock = threading.RLock()
+        self._index_depth = 0
+        self._email_index: Dict[str, str] = {}
+        self._index_signature = None
+        self._last_rebuild = 0.0
+        self._load_email_index()
     
     def register_user(self, username: str, email: str, password: str) -> Dict[str, Any]:
         """
@@ -39,9 +81,8 @@ class UserService:
         # Generate user ID
         user_id = str(uuid.uuid4())
         
-        # Create salt and hash password
-        salt = secrets.token_hex(16)
-        password_hash = self._hash_password(password, salt)
+        # Hash password on the bounded hashing pool
+        password_hash = self.hasher.hash(password)
         
         # Create user data
         user_data = {
@@ -49,14 +90,19 @@ class UserService:
             "username": username,
             "email": email,
             "password_hash": password_hash,
-            "salt": salt,
             "created_at": datetime.now().isoformat(),
             "last_login": datetime.now().isoformat(),
             "interviews": []
         }
         
-        # Save user data
-        self._save_user(user_data)
+        # Save user data; re-check under the index lock so concurrent
+        # registrations of the same email, in any process, cannot both succeed
+        with self._index_locked():
+            if self._email_exists(email):
+                raise ValueError("Email already registered")
+            with self._user_lock(user_id):
+                self._save_user(user_data)
+            self._index_set(email, user_id)
         
         # Return user data without sensitive information
         return self._clean_user_data(user_data)
@@ -77,17 +123,23 @@ class UserService:
         if not user_data:
             return None
         
-        # Verify password
-        salt = user_data.get("salt", "")
+        # Verify password, upgrading hashes written with older KDF settings
         stored_hash = user_data.get("password_hash", "")
-        input_hash = self._hash_password(password, salt)
-        
-        if input_hash != stored_hash:
+        verified, new_hash = self.hasher.verify_and_update(
+            password, stored_hash, salt=user_data.get("salt")
+        )
+        if not verified:
             return None
         
-        # Update last login time
-        user_data["last_login"] = datetime.now().isoformat()
-        self._save_user(user_data)
+        # Update last login time on the latest copy of the user
+        with self._user_lock(user_data["id"]):
+            user_data = self._load_user(user_data["id"], use_cache=False) or user_data
+            # Skip the upgrade if the password changed since it was verified
+            if new_hash and user_data.get("password_hash") == stored_hash:
+                user_data["password_hash"] = new_hash
+                user_data.pop("salt", None)
+            user_data["last_login"] = datetime.now().isoformat()
+            self._save_user(user_data)
         
         # Return user data without sensitive information
         return self._clean_user_data(user_data)
@@ -102,13 +154,10 @@ class UserService:
         Returns:
             User data if found, None otherwise
         """
-        user_file = os.path.join(self.storage_dir, f"{user_id}.json")
-        if not os.path.exists(user_file):
+        user_data = self._load_user(user_id)
+        if not user_data:
             return None
         
-        with open(user_file, "r") as f:
-            user_data = json.load(f)
-        
         return self._clean_user_data(user_data)
     
     def update_user(self, user_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -122,28 +171,36 @@ class UserService:
         Returns:
             Updated user data if successful, None otherwise
         """
-        user_file = os.path.join(self.storage_dir, f"{user_id}.json")
-        if not os.path.exists(user_file):
-            return None
+        updates = dict(updates)
         
-        with open(user_file, "r") as f:
-            user_data = json.load(f)
-        
-        # Handle password update separately
+        # Handle password update separately; hash before taking the lock
+        password_hash = None
         if "password" in updates:
-            salt = secrets.token_hex(16)
-            password_hash = self._hash_password(updates["password"], salt)
-            user_data["password_hash"] = password_hash
-            user_data["salt"] = salt
-            del updates["password"]
-        
-        # Update other fields
-        for key, value in updates.items():
-            if key not in ["id", "password_hash", "salt", "created_at"]:
-                user_data[key] = value
+            password_hash = self.hasher.hash(updates.pop("password"))
         
-        # Save updated user data
-        self._save_user(user_data)
+        with self._user_lock(user_id):
+            user_data = self._load_user(user_id, use_cache=False)
+            if not user_data:
+                return None
+            
+            if password_hash:
+                user_data["password_hash"] = password_hash
+                user_data.pop("salt", None)
+            
+            # Email changes must keep the index unique; claim the new email
+            # first so a taken address fails before anything is written
+            old_email = user_data.get("email")
+            new_email = updates.get("email", old_email)
+            if new_email != old_email:
+                self._index_set(new_email, user_id, old_email=old_email)
+            
+            # Update other fields
+            for key, value in updates.items():
+                if key not in ["id", "password_hash", "salt", "created_at"]:
+                    user_data[key] = value
+            
+            # Save updated user data
+            self._save_user(user_data)
         
         return self._clean_user_data(user_data)
     
@@ -158,15 +215,22 @@ class UserService:
             True if successful, False otherwise
         """
         user_file = os.path.join(self.storage_dir, f"{user_id}.json")
-        if not os.path.exists(user_file):
-            return False
         
-        try:
-            os.remove(user_file)
-            return True
-        except Exception as e:
-            print(f"Error deleting user: {e}")
-            return False
+        with self._user_lock(user_id):
+            user_data = self._load_user(user_id, use_cache=False)
+            if not os.path.exists(user_file):
+                self._cache_evict(user_id)
+                return False
+            
+            try:
+                os.remove(user_file)
+                self._cache_evict(user_id)
+                if user_data and user_data.get("email"):
+                    self._index_remove(user_data["email"], user_id)
+                return True
+            except Exception as e:
+                print(f"Error deleting user: {e}")
+                return False
     
     def _email_exists(self, email: str) -> bool:
         """
@@ -178,22 +242,7 @@ class UserService:
         Returns:
             True if email exists, False otherwise
         """
-        # This is inefficient for a large number of users
-        # In a production system, use a database with indexing
-        for filename in os.listdir(self.storage_dir):
-            if not filename.endswith(".json"):
-                continue
-                
-            file_path = os.path.join(self.storage_dir, filename)
-            with open(file_path, "r") as f:
-                try:
-                    user_data = json.load(f)
-                    if user_data.get("email") == email:
-                        return True
-                except json.JSONDecodeError:
-                    continue
-        
-        return False
+        return self._get_user_by_email(email) is not None
     
     def _get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """
@@ -205,41 +254,287 @@ class UserService:
         Returns:
             User data if found, None otherwise
         """
-        # This is inefficient for a large number of users
-        # In a production system, use a database with indexing
-        for filename in os.listdir(self.storage_dir):
-            if not filename.endswith(".json"):
-                continue
+        user_id = self._index_get(email)
+        if user_id:
+            user_data = self._load_user(user_id)
+            if user_data and user_data.get("email") == email:
+                return user_data
+        
+        # The index may be stale or missing an entry if user files were
+        # changed outside this service; rebuild it from disk when a hit turns
+        # out wrong, and on a miss at most once per rebuild interval
+        if user_id or time.time() - self._last_rebuild >= self.index_rebuild_interval:
+            self._rebuild_email_index()
+            user_id = self._index_get(email)
+            if user_id:
+                user_data = self._load_user(user_id)
+                if user_data and user_data.get("email") == email:
+                    return user_data
+        
+        return None
+    
+    def _load_user(self, user_id: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Load raw user data from disk
+        
+        The cached copy is only used while the file still has the
+        modification time, size and inode it was read with; any write,
+        including one from another process, replaces the file.
+        
+        Args:
+            user_id: User ID
+            use_cache: Serve a valid cached copy; read-modify-write paths
+                pass False so they always start from the file
+            
+        Returns:
+            User data including sensitive fields, or None if not found
+        """
+        user_file = os.path.join(self.storage_dir, f"{user_id}.json")
+        try:
+            signature = self._file_signature(os.stat(user_file))
+        except OSError:
+            self._cache_evict(user_id)
+            return None
+        
+        with self._cache_lock:
+            entry = self._cache.get(user_id) if use_cache else None
+            if entry is not None and entry[1] == signature:
+                self._cache.move_to_end(user_id)
+                return copy.deepcopy(entry[0])
+        
+        try:
+            with open(user_file, "r") as f:
+                user_data = json.load(f)
+                signature = self._file_signature(os.fstat(f.fileno()))
+        except (OSError, json.JSONDecodeError):
+            return None
+        
+        self._cache_put(user_id, user_data, signature)
+        return copy.deepcopy(user_data)
+    
+    @staticmethod
+    def _file_signature(stat: os.stat_result) -> Tuple[int, int, int]:
+        """Modification time, size and inode identifying one version of a file"""
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def _cache_put(self, user_id: str, user_data: Dict[str, Any], signature: Tuple[int, int, int]):
+        """
+        Store user data in the LRU cache
+        
+        Args:
+            user_id: User ID
+            user_data: Raw user data
+            signature: Signature of the file the data was read from or written to
+        """
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[user_id] = (copy.deepcopy(user_data), signature)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def _cache_evict(self, user_id: str):
+        """
+        Drop a user from the LRU cache
+        
+        Args:
+            user_id: User ID
+        """
+        with self._cache_lock:
+            self._cache.pop(user_id, None)
+    
+    @contextmanager
+    def _user_lock(self, user_id: str) -> Iterator[None]:
+        """
+        Hold the lock for one user's file, across threads and processes
+        
+        Args:
+            user_id: User ID
+        """
+        with self._user_locks_guard:
+            entry = self._user_locks.get(user_id)
+            if entry is None:
+                entry = self._user_locks[user_id] = [threading.Lock(), 0]
+            entry[1] += 1
+        
+        try:
+            with entry[0]:
+                with self._file_lock(os.path.join(self.lock_dir, f"{user_id}.lock")):
+                    yield
+        finally:
+            with self._user_locks_guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._user_locks[user_id]
+    
+    @contextmanager
+    def _file_lock(self, lock_file: str, remove: bool = True) -> Iterator[None]:
+        """
+        Hold an exclusive flock on a lock file (a no-op without fcntl)
+        
+        Args:
+            lock_file: Path of the lock file
+            remove: Delete the lock file on release so lock files do not pile up
+        """
+        if fcntl is None:
+            yield
+            return
+        
+        while True:
+            f = open(lock_file, "a")
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                # The previous holder may have deleted the file while we
+                # waited; the lock only counts on the file at the path now
+                locked = os.fstat(f.fileno()).st_ino == os.stat(lock_file).st_ino
+            except OSError:
+                locked = False
+            if locked:
+                break
+            f.close()
+        
+        try:
+            yield
+        finally:
+            if remove:
+                try:
+                    os.remove(lock_file)
+                except OSError:
+                    pass
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            f.close()
+    
+    @contextmanager
+    def _index_locked(self) -> Iterator[None]:
+        """
+        Hold the email index lock across threads and processes (re-entrant)
+        
+        The index is reloaded from disk when the lock is taken, so changes
+        made under it start from the latest file.
+        """
+        with self._index_lock:
+            self._index_depth += 1
+            try:
+                if self._index_depth > 1:
+                    yield
+                    return
+                with self._file_lock(self.index_lock_path, remove=False):
+                    self._refresh_email_index(force=True)
+                    yield
+            finally:
+                self._index_depth -= 1
+    
+    def _load_email_index(self):
+        """Load the email index from disk, rebuilding it if it is missing or corrupt"""
+        with self._index_lock:
+            if self._refresh_email_index(force=True):
+                return
+        
+        self._rebuild_email_index()
+    
+    def _rebuild_email_index(self):
+        """Rebuild the email index by scanning every user file"""
+        with self._index_locked():
+            index = {}
+            for filename in os.listdir(self.storage_dir):
+                if not filename.endswith(".json") or filename.startswith("."):
+                    continue
                 
-            file_path = os.path.join(self.storage_dir, filename)
-            with open(file_path, "r") as f:
+                file_path = os.path.join(self.storage_dir, filename)
                 try:
-                    user_data = json.load(f)
-                    if user_data.get("email") == email:
-                        return user_data
-                except json.JSONDecodeError:
+                    with open(file_path, "r") as f:
+                        user_data = json.load(f)
+                except (OSError, json.JSONDecodeError):
                     continue
+                if user_data.get("email") and user_data.get("id"):
+                    index[user_data["email"]] = user_data["id"]
+            
+            self._email_index = index
+            self._write_email_index()
+            self._last_rebuild = time.time()
+    
+    def _refresh_email_index(self, force: bool = False) -> bool:
+        """
+        Reload the index if another process replaced it (caller holds the index lock)
         
-        return None
+        Args:
+            force: Reload even if the file looks unchanged
+            
+        Returns:
+            True if the in-memory index matches the file
+        """
+        try:
+            signature = self._file_signature(os.stat(self.index_path))
+        except OSError:
+            return False
+        if not force and signature == self._index_signature:
+            return True
+        try:
+            with open(self.index_path, "r") as f:
+                self._email_index = json.load(f)
+                self._index_signature = self._file_signature(os.fstat(f.fileno()))
+            return True
+        except (OSError, json.JSONDecodeError):
+            return False
     
-    def _hash_password(self, password: str, salt: str) -> str:
+    def _index_get(self, email: str) -> Optional[str]:
         """
-        Hash a password with a salt
+        Look up a user ID by email
         
         Args:
-            password: Password to hash
-            salt: Salt to use
+            email: User's email
             
         Returns:
-            Hashed password
+            User ID or None if the email is not registered
         """
-        pw_hash = hashlib.pbkdf2_hmac(
-            "sha256",
-            password.encode("utf-8"),
-            salt.encode("utf-8"),
-            100000  # Number of iterations
-        )
-        return pw_hash.hex()
+        with self._index_lock:
+            self._refresh_email_index()
+            return self._email_index.get(email)
+    
+    def _index_set(self, email: str, user_id: str, old_email: Optional[str] = None):
+        """
+        Point an email at a user ID and persist the index
+        
+        Args:
+            email: User's email
+            user_id: User ID
+            old_email: Previous email of the user to remove
+            
+        Raises:
+            ValueError: If the email belongs to another user
+        """
+        with self._index_locked():
+            if self._email_index.get(email) not in (None, user_id):
+                raise ValueError("Email already registered")
+            if old_email and self._email_index.get(old_email) == user_id:
+                del self._email_index[old_email]
+            self._email_index[email] = user_id
+            self._write_email_index()
+    
+    def _index_remove(self, email: str, user_id: str):
+        """
+        Remove an email from the index
+        
+        Args:
+            email: User's email
+            user_id: User ID the email must currently point to
+        """
+        with self._index_locked():
+            if self._email_index.get(email) == user_id:
+                del self._email_index[email]
+                self._write_email_index()
+    
+    def _write_email_index(self):
+        """Atomically replace the index file (caller holds the index file lock)"""
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self._email_index, f)
+            f.flush()
+            os.fsync(f.fileno())
+            signature = self._file_signature(os.fstat(f.fileno()))
+        os.replace(temp_path, self.index_path)
+        self._index_signature = signature
     
     def _save_user(self, user_data: Dict[str, Any]):
         """
@@ -252,9 +547,24 @@ class UserService:
         if not user_id:
             raise ValueError("User data must have an ID")
             
+        # Write to a temporary file and rename it over the old one, so
+        # readers never see a partially written file
         user_file = os.path.join(self.storage_dir, f"{user_id}.json")
-        with open(user_file, "w") as f:
-            json.dump(user_data, f, indent=2)
+        temp_file = f"{user_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_file, "w") as f:
+                json.dump(user_data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+                # The rename keeps the inode, size and modification time
+                signature = self._file_signature(os.fstat(f.fileno()))
+            os.replace(temp_file, user_file)
+        except Exception:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+        
+        self._cache_put(user_id, user_data, signature)
     
     def _clean_user_data(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """
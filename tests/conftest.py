@@ -0,0 +1,13 @@
+import os
+import sys
+import types
+import importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules import each other through the app package, which is this
+# directory; register it when the checkout is not importable as app
+if importlib.util.find_spec("app") is None:
+    app = types.ModuleType("app")
+    app.__path__ = [ROOT]
+    sys.modules["app"] = app
@@ -0,0 +1,43 @@
+import pytest
+
+from app.services.batch_transcription import split_windows, SAMPLE_RATE
+
+
+def seconds(duration):
+    return int(duration * SAMPLE_RATE)
+
+
+def test_short_recording_is_one_window():
+    windows = split_windows(seconds(90), window_seconds=600, overlap_seconds=5)
+    assert windows == [{"start": 0.0, "end": 90.0, "own_start": 0.0, "own_end": 90.0}]
+
+
+def test_windows_overlap_and_cover_the_recording():
+    windows = split_windows(seconds(1500), window_seconds=600, overlap_seconds=10)
+
+    assert [(w["start"], w["end"]) for w in windows] == [(0.0, 600.0), (590.0, 1190.0), (1180.0, 1500.0)]
+    for previous, window in zip(windows, windows[1:]):
+        assert previous["end"] - window["start"] == 10
+
+
+def test_owned_regions_tile_the_recording():
+    windows = split_windows(seconds(1234.5), window_seconds=300, overlap_seconds=8)
+
+    assert windows[0]["own_start"] == 0.0
+    assert windows[-1]["own_end"] == 1234.5
+    for previous, window in zip(windows, windows[1:]):
+        # Each boundary sits in the middle of the overlap
+        assert previous["own_end"] == window["own_start"]
+        assert window["start"] < window["own_start"] < previous["end"]
+    for window in windows:
+        assert window["start"] <= window["own_start"] < window["own_end"] <= window["end"]
+
+
+def test_recording_ending_on_a_window_boundary():
+    windows = split_windows(seconds(1190), window_seconds=600, overlap_seconds=10)
+    assert [(w["start"], w["end"]) for w in windows] == [(0.0, 600.0), (590.0, 1190.0)]
+
+
+def test_overlap_must_be_shorter_than_the_window():
+    with pytest.raises(ValueError):
+        split_windows(seconds(60), window_seconds=10, overlap_seconds=10)
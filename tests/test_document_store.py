@@ -0,0 +1,159 @@
+import datetime
+import threading
+
+import pytest
+
+from app.database import document_store as ds
+from app.database.document_store import (
+    MemoryDocumentStore, SQLiteDocumentStore, AlreadyExists, NotFound, SERVER_TIMESTAMP, DELETE_FIELD
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryDocumentStore()
+    else:
+        store = SQLiteDocumentStore(str(tmp_path / "documents.db"))
+    yield store
+    store.close()
+
+
+def test_set_get_and_merge(store):
+    ref = store.collection("users").document("a")
+    ref.set({"email": "a@x.com", "profile": {"name": "A", "city": "Oslo"}})
+    ref.set({"profile": {"city": "Bergen"}, "role": "admin"}, merge=True)
+
+    assert ref.get().to_dict() == {
+        "email": "a@x.com", "profile": {"name": "A", "city": "Bergen"}, "role": "admin"
+    }
+    assert ref.get().get("profile.name") == "A"
+    assert not store.collection("users").document("missing").get().exists
+
+
+def test_update_dotted_fields_and_delete_field(store):
+    ref = store.collection("users").document("a")
+    ref.set({"profile": {"name": "A", "city": "Oslo"}, "n": 1})
+    ref.update({"profile.city": DELETE_FIELD, "profile.age": 30, "n": 2})
+
+    assert ref.get().to_dict() == {"profile": {"name": "A", "age": 30}, "n": 2}
+    with pytest.raises(NotFound):
+        store.collection("users").document("missing").update({"n": 1})
+
+
+def test_server_timestamp_and_datetimes_come_back_aware(store):
+    ref = store.collection("sessions").document("s")
+    ref.set({"created_at": SERVER_TIMESTAMP, "start": datetime.datetime(2024, 1, 1, 10, 0)})
+
+    data = ref.get().to_dict()
+    assert data["created_at"].tzinfo is not None
+    assert data["start"] == datetime.datetime(2024, 1, 1, 10, 0, tzinfo=datetime.timezone.utc)
+
+
+def test_failed_batch_writes_nothing(store):
+    users = store.collection("users")
+    users.document("taken").set({"n": 0})
+
+    batch = store.batch()
+    batch.set(users.document("new"), {"n": 1})
+    batch.create(users.document("taken"), {"n": 2})
+    with pytest.raises(AlreadyExists):
+        batch.commit()
+
+    assert not users.document("new").get().exists
+    assert users.document("taken").get().to_dict() == {"n": 0}
+
+
+def test_queries_filter_order_and_page(store):
+    interviews = store.collection("interviews")
+    for i, score in enumerate([7, 3, 9, 5, 3]):
+        interviews.document(f"i{i}").set({"user_id": "u1" if i < 4 else "u2", "score": score, "tags": ["x"]})
+
+    query = interviews.where("user_id", "==", "u1").order_by("score", direction="DESCENDING")
+    assert [doc.id for doc in query.stream()] == ["i2", "i0", "i3", "i1"]
+
+    first = query.limit(2).get()
+    rest = query.start_after(first[-1]).get()
+    assert [doc.id for doc in first + rest] == ["i2", "i0", "i3", "i1"]
+
+    assert [doc.id for doc in interviews.where("score", ">", 4).stream()] == ["i3", "i0", "i2"]
+    assert [doc.to_dict() for doc in interviews.where("tags", "array-contains", "x")
+            .select(["score"]).limit(1).stream()] == [{"score": 7}]
+
+
+def test_values_of_different_types_order_like_firestore(store):
+    values = store.collection("values")
+    for doc_id, value in [("s", "text"), ("n", 2), ("f", 1.5), ("b", True), ("z", None)]:
+        values.document(doc_id).set({"v": value})
+
+    assert [doc.id for doc in values.order_by("v").stream()] == ["z", "b", "f", "n", "s"]
+
+
+def test_listener_sees_changes(store):
+    users = store.collection("users")
+    users.document("a").set({"role": "admin"})
+    snapshots = []
+    watch = users.where("role", "==", "admin").on_snapshot(
+        lambda docs, changes, read_time: snapshots.append(
+            (sorted(doc.id for doc in docs), [(c.type, c.document.id) for c in changes])))
+
+    users.document("b").set({"role": "admin"})
+    users.document("a").update({"role": "user"})
+    users.document("c").set({"role": "user"})
+    watch.unsubscribe()
+    users.document("d").set({"role": "admin"})
+
+    assert snapshots == [
+        (["a"], [("ADDED", "a")]),
+        (["a", "b"], [("ADDED", "b")]),
+        (["b"], [("REMOVED", "a")]),
+    ]
+
+
+def test_concurrent_creates_have_one_winner(store):
+    ref = store.collection("user_emails").document("a@x.com")
+    barrier = threading.Barrier(8)
+    results = []
+
+    def claim(i):
+        barrier.wait()
+        try:
+            ref.create({"user_id": f"u{i}"})
+            results.append(i)
+        except AlreadyExists:
+            pass
+
+    threads = [threading.Thread(target=claim, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 1
+    assert ref.get().to_dict() == {"user_id": f"u{results[0]}"}
+
+
+def test_sqlite_stores_share_one_database(tmp_path):
+    path = str(tmp_path / "shared.db")
+    first, second = SQLiteDocumentStore(path), SQLiteDocumentStore(path)
+    first.collection("users").document("a").set({"ref": first.document("jobs/j1"), "blob": b"\x00\x01"})
+
+    data = second.collection("users").document("a").get().to_dict()
+    assert data["ref"].path == "jobs/j1"
+    assert data["blob"] == b"\x00\x01"
+    with pytest.raises(AlreadyExists):
+        second.collection("users").document("a").create({})
+    first.close()
+    second.close()
+
+
+def test_create_client_urls(tmp_path, monkeypatch):
+    assert ds.create_client("memory") is ds.create_client("memory")
+    monkeypatch.setenv("DOCUMENT_STORE", "memory")
+    assert ds.create_client() is ds.create_client("memory")
+
+    store = ds.create_client(f"sqlite:///{tmp_path}/url.db")
+    assert isinstance(store, SQLiteDocumentStore)
+    store.close()
+    with pytest.raises(ValueError):
+        ds.create_client("postgres://db")
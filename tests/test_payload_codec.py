@@ -0,0 +1,109 @@
+import json
+import threading
+
+import pytest
+
+from app.services.payload_codec import (
+    PayloadCodec, available_serializers, available_compressors, sample_interview_payload,
+    MAGIC, FORMAT_VERSION, COMPRESSORS
+)
+
+CODECS = [(serializer, compressor) for serializer in available_serializers()
+          for compressor in available_compressors()]
+
+
+@pytest.fixture(scope="module")
+def payload():
+    return json.loads(json.dumps(sample_interview_payload(num_turns=20)))
+
+
+@pytest.mark.parametrize("serializer,compressor", CODECS)
+def test_round_trip(serializer, compressor, payload):
+    codec = PayloadCodec(serializer=serializer, compressor=compressor)
+    encoded = codec.encode(payload)
+
+    assert encoded[:3] == MAGIC
+    assert encoded[5] == COMPRESSORS[compressor]
+    assert codec.decode(encoded) == payload
+    assert not codec.needs_migration(encoded)
+
+
+@pytest.mark.parametrize("serializer,compressor", CODECS)
+def test_any_codec_decodes_any_payload(serializer, compressor, payload):
+    encoded = PayloadCodec(serializer=serializer, compressor=compressor).encode(payload)
+    for other_serializer, other_compressor in CODECS:
+        other = PayloadCodec(serializer=other_serializer, compressor=other_compressor)
+        assert other.decode(encoded) == payload
+
+
+def test_small_payloads_are_stored_uncompressed():
+    codec = PayloadCodec(compressor="zlib", min_compress_size=256)
+    encoded = codec.encode({"score": 7})
+
+    assert encoded[5] == COMPRESSORS["none"]
+    assert codec.decode(encoded) == {"score": 7}
+    assert not codec.needs_migration(encoded)
+
+
+def test_legacy_json_text_is_decoded_and_migrated(payload):
+    codec = PayloadCodec()
+    legacy = json.dumps(payload, indent=2)
+
+    assert codec.decode(legacy) == payload
+    assert codec.decode(legacy.encode("utf-8")) == payload
+    assert codec.decode(None) is None
+    assert codec.needs_migration(legacy)
+    assert not codec.needs_migration(None)
+
+
+def test_needs_migration_when_the_configuration_changes(payload):
+    zlib_payload = PayloadCodec(serializer="json", compressor="zlib").encode(payload)
+    raw_payload = PayloadCodec(serializer="json", compressor="none").encode(payload)
+
+    assert PayloadCodec(serializer="json", compressor="none").needs_migration(zlib_payload)
+    assert PayloadCodec(serializer="json", compressor="zlib").needs_migration(raw_payload)
+    if "orjson" in available_serializers():
+        assert PayloadCodec(serializer="orjson", compressor="zlib").needs_migration(zlib_payload)
+
+
+def test_unknown_header_values_are_rejected(payload):
+    encoded = PayloadCodec(compressor="none").encode(payload)
+
+    with pytest.raises(ValueError):
+        PayloadCodec().decode(encoded[:3] + bytes([FORMAT_VERSION + 1]) + encoded[4:])
+    with pytest.raises(ValueError):
+        PayloadCodec().decode(encoded[:5] + bytes([99]) + encoded[6:])
+    with pytest.raises(ValueError):
+        PayloadCodec().decode(encoded[:4] + bytes([99]) + encoded[5:])
+
+
+def test_unavailable_codecs_are_rejected():
+    with pytest.raises(ValueError):
+        PayloadCodec(serializer="pickle")
+    with pytest.raises(ValueError):
+        PayloadCodec(compressor="lz4")
+
+
+@pytest.mark.parametrize("compressor", available_compressors())
+def test_shared_codec_across_threads(compressor):
+    codec = PayloadCodec(compressor=compressor, min_compress_size=0)
+    payloads = [json.loads(json.dumps(sample_interview_payload(num_turns=5 + i, seed=i)))
+                for i in range(8)]
+    errors = []
+    barrier = threading.Barrier(8)
+
+    def worker(i):
+        barrier.wait()
+        try:
+            for n in range(40):
+                expected = payloads[(i + n) % len(payloads)]
+                assert codec.decode(codec.encode(expected)) == expected
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
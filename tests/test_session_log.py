@@ -0,0 +1,253 @@
+import os
+
+import pytest
+
+from app.interview.session_log import (
+    SessionLog, SessionSyncer, SQLiteSyncTarget, SyncTarget, encode_record, recover_session_logs,
+    SEGMENT_PREFIX, CHECKPOINT_FILE
+)
+
+
+def event(session_id="s1", path=None, merge=False, kind="session", **data):
+    return {"kind": kind, "session_id": session_id, "path": path, "data": data, "merge": merge}
+
+
+def segments(path):
+    return sorted(name for name in os.listdir(path) if name.startswith(SEGMENT_PREFIX))
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    return str(tmp_path / "log")
+
+
+@pytest.fixture
+def target(tmp_path):
+    return SQLiteSyncTarget(str(tmp_path / "mirror.db"))
+
+
+class FlakyTarget(SyncTarget):
+    """Fails the first `failures` batches, then forwards to another target"""
+
+    def __init__(self, target, failures=1):
+        self.target = target
+        self.failures = failures
+        self.batches = []
+
+    def apply(self, records):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("store unavailable")
+        self.batches.append([r["seq"] for r in records])
+        self.target.apply(records)
+
+
+# Torn tail
+
+def test_torn_tail_is_truncated_on_open(log_dir):
+    log = SessionLog(log_dir)
+    for i in range(3):
+        log.append(event(n=i))
+    log.close()
+
+    segment = os.path.join(log_dir, segments(log_dir)[-1])
+    intact = os.path.getsize(segment)
+    with open(segment, "ab") as f:
+        f.write(encode_record({"seq": 4, **event(n=3)})[:-7])
+
+    log = SessionLog(log_dir)
+    assert os.path.getsize(segment) == intact
+    assert [r["data"]["n"] for r in log.read_from(0)] == [0, 1, 2]
+    assert log.append(event(n=3)) == 4
+    assert [r["seq"] for r in log.read_from(0)] == [1, 2, 3, 4]
+    log.close()
+
+
+def test_corrupt_tail_record_is_truncated(log_dir):
+    log = SessionLog(log_dir)
+    log.append(event(n=0))
+    log.append(event(n=1))
+    log.close()
+
+    segment = os.path.join(log_dir, segments(log_dir)[-1])
+    with open(segment, "rb") as f:
+        lines = f.read().splitlines(keepends=True)
+    # Complete line whose body does not match its checksum
+    lines[-1] = lines[-1].replace(b'"n":1', b'"n":7')
+    with open(segment, "wb") as f:
+        f.writelines(lines)
+
+    log = SessionLog(log_dir)
+    assert [r["data"]["n"] for r in log.read_from(0)] == [0]
+    assert log.next_seq == 2
+    log.close()
+
+
+def test_torn_only_record_drops_segment(log_dir):
+    log = SessionLog(log_dir, segment_size=1)
+    log.append(event(n=0))
+    log.append(event(n=1))
+    log.close()
+    assert len(segments(log_dir)) == 3
+
+    # The last sealed segment holds nothing but a torn record
+    segment = os.path.join(log_dir, segments(log_dir)[1])
+    with open(segment, "r+b") as f:
+        f.truncate(os.path.getsize(segment) - 1)
+
+    log = SessionLog(log_dir, segment_size=1)
+    assert [r["seq"] for r in log.read_from(0)] == [1]
+    assert log.append(event(n=1)) == 2
+    log.close()
+
+
+# Replay idempotency
+
+def test_replayed_records_are_ignored(log_dir, target):
+    log = SessionLog(log_dir)
+    log.append(event(status="in_progress", score=0))
+    log.append(event(merge=True, score=5))
+    log.append(event(path=["answers", "0"], text="first"))
+    records = log.read_from(0)
+    log.close()
+
+    target.apply(records)
+    expected = target.get_documents("s1")
+    assert expected == {
+        "": {"status": "in_progress", "score": 5},
+        "answers/0": {"text": "first"}
+    }
+
+    # The whole batch again, and an older prefix after newer writes
+    target.apply(records)
+    target.apply(records[:1])
+    assert target.get_documents("s1") == expected
+
+
+def test_sync_after_lost_checkpoint_is_idempotent(log_dir, target):
+    log = SessionLog(log_dir)
+    log.append(event(status="in_progress"))
+    log.append(event(merge=True, score=3))
+    log.append(event(path=["answers", "0"], text="first"))
+    assert SessionSyncer(log, target).drain() == 3
+    log.close()
+    expected = target.get_documents("s1")
+
+    # Crash after the batch was applied but before the checkpoint was written
+    os.remove(os.path.join(log_dir, CHECKPOINT_FILE))
+    log = SessionLog(log_dir)
+    assert log.pending() == 3
+    assert SessionSyncer(log, target).drain() == 3
+    assert log.pending() == 0
+    assert target.get_documents("s1") == expected
+    log.close()
+
+
+def test_failed_batch_does_not_advance_checkpoint(log_dir, target):
+    log = SessionLog(log_dir)
+    for i in range(5):
+        log.append(event(path=["answers", str(i)], text=str(i)))
+    flaky = FlakyTarget(target)
+    syncer = SessionSyncer(log, flaky, batch_size=3)
+
+    with pytest.raises(ConnectionError):
+        syncer.sync_once()
+    assert log.synced_seq == 0
+    assert log.pending() == 5
+
+    assert syncer.drain() == 5
+    assert flaky.batches == [[1, 2, 3], [4, 5]]
+    assert len(target.get_documents("s1")) == 5
+    log.close()
+
+
+# Incremental reads
+
+def test_sync_reads_only_new_records(log_dir, target, monkeypatch):
+    log = SessionLog(log_dir, segment_size=400)
+    syncer = SessionSyncer(log, target, batch_size=4)
+    reads = []
+    read_segment = log._read_segment
+
+    def tracking_read_segment(first_seq, offset=0, end=None):
+        reads.append((first_seq, offset))
+        return read_segment(first_seq, offset, end)
+
+    monkeypatch.setattr(log, "_read_segment", tracking_read_segment)
+
+    seen = []
+    for i in range(30):
+        log.append(event(path=["answers", str(i)], text="x" * 20))
+        if i % 3 == 2:
+            before = log.synced_seq
+            syncer.drain()
+            seen.extend(range(before + 1, log.synced_seq + 1))
+    assert seen == list(range(1, 31))
+    assert len(target.get_documents("s1")) == 30
+
+    # After the first batch every read resumes where the last one stopped
+    assert all(offset > 0 or first_seq > 1 for first_seq, offset in reads[1:])
+    reads.clear()
+    assert syncer.sync_once() == 0
+    assert len(reads) == 1 and reads[0][1] > 0
+    log.close()
+
+
+# Compaction
+
+def test_compaction_deletes_synced_segments(log_dir, target):
+    log = SessionLog(log_dir, segment_size=200, compact=True)
+    for i in range(20):
+        log.append(event(path=["answers", str(i)], text="x" * 50))
+    assert len(segments(log_dir)) > 10
+
+    syncer = SessionSyncer(log, target, batch_size=7)
+    syncer.sync_once()
+    # Segments holding seq 8 onwards are still needed
+    assert [r["seq"] for r in log.read_from(log.synced_seq)][0] == 8
+    assert int(segments(log_dir)[0][len(SEGMENT_PREFIX):-4]) <= 8
+
+    syncer.drain()
+    assert len(segments(log_dir)) == 1
+    assert log.read_from(0) == []
+    seq = log.append(event(path=["answers", "20"], text="y"))
+    assert seq == 21
+    assert [r["seq"] for r in log.read_from(log.synced_seq)] == [21]
+    log.close()
+
+    # Reopening a compacted log continues after the checkpoint
+    log = SessionLog(log_dir, segment_size=200, compact=True)
+    assert log.synced_seq == 20
+    assert log.pending() == 1
+    assert log.append(event(path=["answers", "21"], text="z")) == 22
+    log.close()
+
+
+def test_segments_are_kept_without_compaction(log_dir, target):
+    log = SessionLog(log_dir, segment_size=200)
+    for i in range(10):
+        log.append(event(path=["answers", str(i)], text="x" * 50))
+    count = len(segments(log_dir))
+    SessionSyncer(log, target).drain()
+    assert len(segments(log_dir)) == count
+    assert len(log.read_from(0)) == 10
+    log.close()
+
+
+def test_recover_deletes_completed_logs_only(tmp_path, target):
+    log_root = tmp_path / "logs"
+    done = SessionLog(str(log_root / "done"))
+    done.append(event("done", status="in_progress"))
+    done.append(event("done", merge=True, status="completed"))
+    done.close()
+    open_log = SessionLog(str(log_root / "open"))
+    open_log.append(event("open", status="in_progress"))
+    open_log.close()
+
+    assert recover_session_logs(str(log_root), target) == {"done": 2, "open": 1}
+    assert not (log_root / "done").exists()
+    assert (log_root / "open").exists()
+    assert target.get_documents("done")[""]["status"] == "completed"
+
+    # Running recovery again pushes nothing new
+    assert recover_session_logs(str(log_root), target) == {"open": 0}
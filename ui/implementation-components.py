@@ -796,11 +796,11 @@ class SessionRecorder:
 
 # app/livekit_integration.py
 import os
-import requests
 import json
 import base64
 from datetime import datetime, timedelta
 import jwt
+from app.services.livekit_admin import LiveKitAdminClient
 
 class LiveKitManager:
     def __init__(self, api_key=None, api_secret=None, livekit_url=None):
@@ -811,6 +811,9 @@ class LiveKitManager:
         
         if not self.api_key or not self.api_secret:
             raise ValueError("LiveKit API key and secret are required")
+        
+        # Pooled keep-alive session with timeouts and retries
+        self.admin_client = LiveKitAdminClient(self.livekit_url, token_provider=self._generate_admin_token)
     
     def create_room(self, room_name=None):
         """Create a LiveKit room"""
@@ -821,11 +824,6 @@ class LiveKitManager:
         token = self._generate_admin_token(room_name)
         
         # Create room via LiveKit API
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-        
         data = {
             "name": room_name,
             "empty_timeout": 5 * 60,  # 5 minutes
@@ -833,13 +831,7 @@ class LiveKitManager:
         }
         
         try:
-            response = requests.post(
-                f"{self.livekit_url}/twirp/livekit.RoomService/CreateRoom",
-                headers=headers,
-                data=json.dumps(data)
-            )
-            response.raise_for_status()
-            return response.json()
+            return self.admin_client.request("livekit.RoomService/CreateRoom", data, token=token)
         except Exception as e:
             print(f"Error creating LiveKit room: {e}")
             return None
@@ -907,24 +899,15 @@ class LiveKitManager:
         token = self._generate_admin_token(room_name)
         
         # Start recording via LiveKit API
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-        
         data = {
             "room_name": room_name,
             "output_type": "mp4"
         }
         
         try:
-            response = requests.post(
-                f"{self.livekit_url}/twirp/livekit.Egress/StartRoomCompositeEgress",
-                headers=headers,
-                data=json.dumps(data)
-            )
-            response.raise_for_status()
-            return response.json()
+            # Not idempotent: a retried start could record the room twice
+            return self.admin_client.request("livekit.Egress/StartRoomCompositeEgress", data, token=token,
+                                             idempotent=False)
         except Exception as e:
             print(f"Error starting recording: {e}")
             return None
@@ -0,0 +1,19 @@
+# app/utils/stats.py
+from typing import List, Optional
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of an already sorted list
+
+    Args:
+        sorted_values: Values in ascending order
+        pct: Percentile (0-100)
+
+    Returns:
+        The percentile value, or None if there are no values
+    """
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[idx]